@@ -0,0 +1,461 @@
+import argparse
+import math
+import time
+
+import numpy as np
+
+from dungeon_draw import (GOLDEN_GAMMA, MASK64, RANKS, ROLL_STREAM, SHUFFLE_STREAM,
+                          STANDARD_CODES, SUITS, RANK_VALUES, CounterRNG, Deck)
+from dungeon_rules import DEFAULT_TABLES, VALUE_FIELDS, RuleTables
+
+
+# Deck Layout Shared by Every Game in the Batch (Deck Slot -> Value / Suit)
+HEARTS, DIAMONDS, CLUBS, SPADES, JESTER = range(5)
+CARD_VALUES = np.array(
+    [RANK_VALUES[rank] for suit in SUITS for rank in RANKS] + [RANK_VALUES['J']] * 2,
+    dtype=np.int32
+)
+CARD_SUITS = np.array(
+    [SUITS.index(suit) for suit in SUITS for rank in RANKS] + [JESTER] * 2,
+    dtype=np.int8
+)
+DECK_SIZE = len(CARD_VALUES)
+
+# Final Outcomes (Matches DungeonDrawGame.outcome)
+PLAYING, DEAD, CLEARED, QUIT = range(4)
+OUTCOME_NAMES = ("playing", "dead", "cleared", "quit")
+
+
+# CounterRNG Draws on uint64 Arrays, Bit for Bit: Products Wrap Mod 2**64 Just Like
+# the & MASK64 in dungeon_draw.py
+
+def mix64_many(z: np.ndarray) -> np.ndarray:
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def stream_keys(seeds, stream: int) -> np.ndarray:
+    # CounterRNG(seed, stream).key for Every Seed
+    return mix64_many(np.array([(seed + stream * GOLDEN_GAMMA) & MASK64 for seed in seeds],
+                               dtype=np.uint64))
+
+
+def below_many(z: np.ndarray, n) -> np.ndarray:
+    # (z * n) >> 64 (CounterRNG.below) in 32-Bit Halves, Exact for Any n Under 2**32
+    n = np.asarray(n, dtype=np.uint64)
+    high = (z >> np.uint64(32)) * n + ((z & np.uint64(0xFFFFFFFF)) * n >> np.uint64(32))
+    return (high >> np.uint64(32)).astype(np.intp)
+
+
+def seeded_decks(seeds) -> np.ndarray:
+    # The Decks DungeonDrawGame(seed=...) Deals, One Row per Seed: the Same Fisher-Yates
+    # Swaps from the Same Draws as CounterRNG.shuffle, a Column at a Time
+    keys = stream_keys(seeds, SHUFFLE_STREAM)
+    decks = np.tile(np.arange(DECK_SIZE, dtype=np.uint8), (len(keys), 1))
+    rows = np.arange(len(keys))
+    for counter, i in enumerate(range(DECK_SIZE - 1, 0, -1), start=1):
+        j = below_many(mix64_many(keys + np.uint64(counter * GOLDEN_GAMMA & MASK64)), i + 1)
+        swapped = decks[rows, j]
+        decks[rows, j] = decks[:, i]
+        decks[:, i] = swapped
+    # A Jester on Top Goes Back Through Deck.draw_first()'s Reshuffle; Only About 1 Deck
+    # in 27, so the Game's Own Deck Deals Those
+    slots = {code: slot for slot, code in enumerate(STANDARD_CODES)}
+    for row in np.flatnonzero(CARD_SUITS[decks[:, 0]] == JESTER):
+        deck = Deck(CounterRNG(seeds[row], SHUFFLE_STREAM))
+        deck.draw_first()
+        decks[row] = [slots[code] for code in deck.codes]
+    return decks
+
+
+def shuffled_decks(rng, n: int) -> np.ndarray:
+    # One Row per Game; First Card is Never a Jester (Same as DungeonDrawGame)
+    decks = rng.permuted(np.tile(np.arange(DECK_SIZE, dtype=np.uint8), (n, 1)), axis=1)
+    bad = CARD_SUITS[decks[:, 0]] == JESTER
+    while bad.any():
+        decks[bad] = rng.permuted(
+            np.tile(np.arange(DECK_SIZE, dtype=np.uint8), (int(bad.sum()), 1)), axis=1
+        )
+        bad = CARD_SUITS[decks[:, 0]] == JESTER
+    return decks
+
+
+class BatchSimulator:
+    # Holds N Games as Arrays and Steps them All Together
+    def __init__(self, n: int, seed=None, threshold: int = 8, decks: np.ndarray = None,
+                 rules: RuleTables = None):
+        self.n = n
+        self.rng = np.random.default_rng(seed)
+        self.threshold = threshold
+        self.decks = shuffled_decks(self.rng, n) if decks is None else decks
+        self.rows = np.arange(n)
+        self.compile_rules(rules or DEFAULT_TABLES)
+
+        def zeros():
+            return np.zeros(n, dtype=np.int32)
+
+        # Player Stats
+        self.max_hp = np.full(n, self.rules.max_hp, dtype=np.int32)
+        self.hp = self.max_hp.copy()
+        self.gold = zeros()
+        self.score = zeros()
+        self.streak = zeros()
+        self.best_streak = zeros()
+        self.armor = zeros()
+
+        # Over Time Effects
+        self.poison_turns = zeros()
+        self.poison_damage = zeros()
+        self.regen_turns = zeros()
+        self.regen_amount = zeros()
+
+        # Items
+        self.totem = zeros()
+        self.rope = zeros()
+
+        # Jester Boss State
+        self.in_jester = np.zeros(n, dtype=bool)
+        self.jester_left = zeros()
+        self.jester_correct = zeros()
+
+        # Deck Cursor and Bookkeeping
+        self.current = self.decks[:, 0].copy()
+        self.pos = np.ones(n, dtype=np.int32)
+        self.turns = zeros()
+        self.outcome = np.full(n, PLAYING, dtype=np.int8)
+
+    def compile_rules(self, rules: RuleTables):
+        # The Rule Tables as Arrays, Plus the Rule Slot for Every (Suit, Correct, Roll)
+        self.rules = rules
+        self.roll_span = math.lcm(*(len(options) for options in rules.choices.values()))
+        self.room_slots = np.zeros((len(SUITS), 2, self.roll_span), dtype=np.int32)
+        for suit_index, suit in enumerate(SUITS):
+            for correct in (False, True):
+                options = rules.choices[suit, correct]
+                for roll in range(self.roll_span):
+                    self.room_slots[suit_index, int(correct), roll] = options[roll % len(options)][1]
+        self.table = {field: np.array(getattr(rules, field), dtype=np.int32)
+                      for field in VALUE_FIELDS + ("damage",)}
+        self.damage_floor = np.array(rules.damage_floor, dtype=np.int32)
+        self.damage_hp_div = np.array(rules.damage_hp_div, dtype=np.int32)
+        self.damage_armor = np.array(rules.damage_armor, dtype=np.int32)
+        self.chance = np.array(rules.chance)
+        self.score_correct = np.array(rules.score_correct, dtype=np.int32)
+
+    def variant(self, variants, suit: str, name: str):
+        # Which Games Rolled a Given Variant (variants Holds Each Game's Index Within its Suit)
+        names = self.rules.variants[suit]
+        if name not in names:
+            return np.zeros(self.n, dtype=bool)
+        return variants == names.index(name)
+
+    def room_damage(self, slot, at):
+        hp_div = self.damage_hp_div[slot]
+        damage = self.table["damage"][at] - self.damage_armor[slot] * self.armor
+        damage += np.where(hp_div > 0, self.hp // np.maximum(hp_div, 1), 0)
+        return np.maximum(self.damage_floor[slot], damage)
+
+    # Masked Helpers (Mirrors take_damage / heal in DungeonDrawGame)
+
+    def damage(self, mask, amount):
+        hit = mask & (amount > 0)
+        if not hit.any():
+            return
+        self.hp -= np.where(hit, amount, 0)
+        saved = hit & (self.hp <= 0) & (self.totem > 0)
+        self.totem -= saved
+        self.hp = np.where(saved, self.max_hp // self.rules.totem_revive_div, self.hp)
+        np.maximum(self.hp, 0, out=self.hp)
+
+    def heal(self, mask, amount):
+        if not mask.any():
+            return
+        self.hp = np.where(mask, np.minimum(self.max_hp, self.hp + amount), self.hp)
+
+    # Suit Behaviour with Variants
+
+    def spades(self, mask, variants, at, damage):
+        goblin = mask & self.variant(variants, "Spades", "goblin")
+        self.damage(goblin, damage)
+        self.gold += np.where(goblin, self.table["gold"][at], 0)
+
+        slime = mask & self.variant(variants, "Spades", "slime")
+        self.damage(slime, damage)
+        self.poison_turns += np.where(slime, self.table["poison_turns"][at], 0)
+        self.poison_damage = np.where(slime, np.maximum(self.poison_damage, self.table["poison"][at]),
+                                      self.poison_damage)
+
+        warlock = mask & self.variant(variants, "Spades", "warlock")
+        self.damage(warlock, damage)
+
+    def hearts(self, mask, variants, slot, at, coin):
+        pure = mask & self.variant(variants, "Hearts", "pure")
+        self.heal(pure, self.table["heal"][at])
+
+        regen = mask & self.variant(variants, "Hearts", "regen")
+        self.regen_turns += np.where(regen, self.table["regen_turns"][at], 0)
+        self.regen_amount = np.where(regen, np.maximum(self.regen_amount, self.table["regen"][at]),
+                                     self.regen_amount)
+
+        blessing = mask & self.variant(variants, "Hearts", "blessing")
+        burst = blessing & (coin < self.chance[slot])
+        self.heal(burst, self.table["heal"][at])
+        boost = np.where(blessing & ~burst, self.table["boost"][at], 0)
+        self.max_hp += boost
+        self.hp += boost
+
+    def diamonds(self, mask, at, damage):
+        self.damage(mask, damage)
+        self.gold += np.where(mask, self.table["gold"][at], 0)
+
+    def clubs(self, mask, variants, slot, at, coin, damage):
+        totem = mask & self.variant(variants, "Clubs", "totem")
+        new_totem = totem & (self.totem == 0)
+        self.totem += np.where(new_totem, self.table["totem"][at], 0)
+        stone = (totem & ~new_totem) | (mask & self.variant(variants, "Clubs", "stone"))
+        self.armor += np.where(stone, self.table["armor"][at], 0)
+        self.rope += np.where(mask & self.variant(variants, "Clubs", "escape"), self.table["rope"][at], 0)
+
+        trap = mask & self.variant(variants, "Clubs", "trap")
+        self.damage(trap, damage)
+        self.armor -= trap & (self.armor > 0) & (coin < self.chance[slot])
+
+    # Jester Boss Logic
+
+    def end_jester(self, mask):
+        if not mask.any():
+            return
+        rules = self.rules
+        won = mask & (self.jester_correct >= rules.jester_wins_needed)
+        self.gold += np.where(won, rules.jester_win_gold, 0)
+        self.score += np.where(won, rules.jester_win_score, 0)
+        self.heal(won, rules.jester_win_heal)
+
+        lost = mask & ~won
+        self.damage(lost, np.full(self.n, rules.jester_loss_hp, dtype=np.int32))
+        self.gold = np.where(lost, np.maximum(0, self.gold - rules.jester_loss_gold), self.gold)
+        self.in_jester &= ~mask
+
+    # Over Time Effects
+
+    def over_time(self, mask):
+        poison = mask & (self.poison_turns > 0) & (self.poison_damage > 0) & (self.hp > 0)
+        self.damage(poison, self.poison_damage)
+        self.poison_turns -= poison
+        self.poison_damage = np.where(poison & (self.poison_turns == 0), 0, self.poison_damage)
+
+        regen = mask & (self.regen_turns > 0) & (self.regen_amount > 0) & (self.hp > 0)
+        self.heal(regen, self.regen_amount)
+        self.regen_turns -= regen
+        self.regen_amount = np.where(regen & (self.regen_turns == 0), 0, self.regen_amount)
+
+    # One Decision for Every Live Game
+
+    def guesses(self) -> np.ndarray:
+        # True = Higher; Midpoint Rule by Default
+        return CARD_VALUES[self.current] <= self.threshold
+
+    def draw(self) -> np.ndarray:
+        # Deck Slot of Every Game's Next Card
+        return self.decks[self.rows, np.minimum(self.pos, DECK_SIZE - 1)]
+
+    def rolls(self) -> tuple:
+        # Room Variant Roll and Coin Flip for Every Game
+        return self.rng.integers(0, self.roll_span, self.n), self.rng.random(self.n)
+
+    def step(self) -> bool:
+        live = self.outcome == PLAYING
+        if not live.any():
+            return False
+
+        higher = self.guesses()
+        slot = self.draw()
+        self.pos += live
+        self.turns += live
+        remaining = DECK_SIZE - self.pos
+
+        value = CARD_VALUES[slot]
+        suit = CARD_SUITS[slot]
+        current_value = CARD_VALUES[self.current]
+        equal = value == current_value
+        correct = np.where(higher, value > current_value, value < current_value)
+
+        # Jester Rounds
+        jester = live & self.in_jester
+        self.jester_correct += jester & correct
+        self.jester_left -= jester
+        self.current = np.where(jester, slot, self.current)
+        self.end_jester(jester & ((self.jester_left == 0) | (remaining == 0)))
+
+        # Escape Rope Skips a Hostile Room
+        normal = live & ~jester
+        roped = normal & (self.rope > 0) & ((suit == SPADES) | (suit == CLUBS))
+        self.rope -= roped
+        self.current = np.where(roped, slot, self.current)
+
+        # Jester Boss Trigger
+        start = normal & ~roped & (suit == JESTER)
+        self.in_jester |= start
+        self.jester_left = np.where(start, self.rules.jester_rounds, self.jester_left)
+        self.jester_correct = np.where(start, 0, self.jester_correct)
+        self.end_jester(start & (remaining == 0))
+
+        # Base Result Scoring
+        room = normal & ~roped & ~start
+        self.score += np.where(room & equal, self.rules.score_equal, 0)
+        hit = room & ~equal & correct
+        miss = room & ~equal & ~correct
+        self.streak = np.where(hit, self.streak + 1, np.where(miss, 0, self.streak))
+        np.maximum(self.best_streak, self.streak, out=self.best_streak)
+        self.score += np.where(hit, self.score_correct[value], 0)
+        self.score = np.where(miss, np.maximum(0, self.score - self.rules.score_incorrect), self.score)
+
+        # Suit Specific Logic as Table Lookups and Masked Array Operations
+        acted = hit | miss
+        roll, coin = self.rolls()
+        rule_slot = self.room_slots[np.minimum(suit, SPADES), hit.astype(np.int32), roll]
+        at = rule_slot * 16 + value
+        variants = (rule_slot // 2) % self.rules.width
+        damage = self.room_damage(rule_slot, at)
+        self.spades(acted & (suit == SPADES), variants, at, damage)
+        self.hearts(acted & (suit == HEARTS), variants, rule_slot, at, coin)
+        self.diamonds(acted & (suit == DIAMONDS), at, damage)
+        self.clubs(acted & (suit == CLUBS), variants, rule_slot, at, coin, damage)
+        self.current = np.where(room & (self.hp > 0), slot, self.current)
+
+        # End of Turn, then Over Time Effects for the Next One
+        dead = live & (self.hp <= 0)
+        self.outcome[dead] = DEAD
+        self.outcome[live & ~dead & (remaining == 0)] = CLEARED
+        ticking = self.outcome == PLAYING
+        self.over_time(ticking)
+        dead = ticking & (self.hp <= 0)
+        self.end_jester(dead & self.in_jester)
+        self.outcome[dead] = DEAD
+        return True
+
+    def run(self):
+        while self.step():
+            pass
+        return self
+
+    def results(self) -> dict:
+        return {
+            "hp": self.hp,
+            "max_hp": self.max_hp,
+            "gold": self.gold,
+            "score": self.score,
+            "best_streak": self.best_streak,
+            "turns": self.turns,
+            "outcome": self.outcome,
+        }
+
+
+class ReplaySimulator(BatchSimulator):
+    # Re-Plays Recorded Games in Lockstep. Each Row Takes its Own Decisions (One
+    # Column per Turn: H=1, L=2, Q=3, 0 Past the End) on the Deck its Seed Dealt,
+    # and Rooms Roll the Same Counter-Based Draws DungeonDrawGame Makes: the Variant
+    # at Twice the Deck Position After the Draw (Only if There's a Choice), the Coin
+    # Flip at the Draw After That
+    def __init__(self, seeds, decks: np.ndarray, actions: np.ndarray, rules: RuleTables = None):
+        super().__init__(len(decks), decks=decks, rules=rules)
+        self.actions = actions
+        self.keys = stream_keys(seeds, ROLL_STREAM)
+        self.options = np.array([[len(self.rules.choices[suit, correct]) for correct in (False, True)]
+                                 for suit in SUITS])
+        self.taken = 0
+        # Decisions the Game Would Refuse: None Left While Playing, or a Quit in a Jester Fight
+        self.illegal = np.zeros(self.n, dtype=bool)
+
+    def guesses(self) -> np.ndarray:
+        return self.code == 1
+
+    def rolls(self) -> tuple:
+        return self.roll, self.coin
+
+    def draws(self, index: np.ndarray) -> np.ndarray:
+        # CounterRNG.at(index) for Every Row
+        return mix64_many(self.keys + (index + np.uint64(1)) * np.uint64(GOLDEN_GAMMA))
+
+    def step(self) -> bool:
+        live = self.outcome == PLAYING
+        if not live.any():
+            return False
+        code = (self.actions[:, self.taken] if self.taken < self.actions.shape[1]
+                else np.zeros(self.n, dtype=np.uint8))
+        self.taken += 1
+        bad = live & ((code == 0) | ((code == 3) & self.in_jester))
+        quit = live & (code == 3)
+        self.illegal |= bad
+        self.outcome[quit | bad] = QUIT
+        self.turns += quit & ~bad
+        self.code = code
+
+        # The Next Card's Room as step() Will See it, to Know Whether its Variant Rolls
+        slot = self.draw()
+        value = CARD_VALUES[slot]
+        current = CARD_VALUES[self.current]
+        correct = np.where(code == 1, value > current, value < current)
+        options = self.options[np.minimum(CARD_SUITS[slot], SPADES), correct.astype(np.intp)]
+        at = (self.pos.astype(np.uint64) + np.uint64(1)) * np.uint64(2)
+        variant = self.draws(at)
+        self.roll = np.where(options > 1, below_many(variant, options), 0)
+        coin = np.where(options > 1, self.draws(at + np.uint64(1)), variant)
+        self.coin = (coin >> np.uint64(11)).astype(np.float64) * (1.0 / (1 << 53))
+        super().step()
+        return True
+
+
+def simulate(games: int, seed=None, threshold: int = 8, chunk: int = 1 << 16,
+             rules: RuleTables = None) -> dict:
+    # Chunks Keep Memory Flat; Child Seeds Keep the Batch Reproducible
+    chunks = [min(chunk, games - start) for start in range(0, games, chunk)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+    parts = [BatchSimulator(size, child, threshold, rules=rules).run().results()
+             for size, child in zip(chunks, seeds)]
+    return {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+
+
+def summarise(results: dict) -> dict:
+    score = results["score"]
+    outcome = results["outcome"]
+    percentiles = (5, 25, 50, 75, 95)
+    return {
+        "games": int(len(score)),
+        "win_rate": float(np.mean(outcome == CLEARED)),
+        "death_rate": float(np.mean(outcome == DEAD)),
+        "mean_score": float(score.mean()),
+        "score_std": float(score.std()),
+        "score_percentiles": dict(zip(percentiles, np.percentile(score, percentiles).tolist())),
+        "mean_gold": float(results["gold"].mean()),
+        "mean_best_streak": float(results["best_streak"].mean()),
+        "mean_turns": float(results["turns"].mean()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run many Dungeon Draw games at once with NumPy.")
+    parser.add_argument("--games", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--threshold", type=int, default=8,
+                        help="guess Higher when the current card is at or below this value")
+    parser.add_argument("--chunk", type=int, default=1 << 16)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = simulate(args.games, args.seed, args.threshold, args.chunk)
+    elapsed = time.perf_counter() - start
+
+    stats = summarise(results)
+    print(f"Simulated {stats['games']} runs in {elapsed:.2f}s")
+    print(f"Win rate: {stats['win_rate']:.2%}   Death rate: {stats['death_rate']:.2%}")
+    print(f"Score: mean {stats['mean_score']:.1f}, std {stats['score_std']:.1f}")
+    print("Score percentiles: " + ", ".join(
+        f"p{p}={v:.0f}" for p, v in stats["score_percentiles"].items()))
+    print(f"Mean gold: {stats['mean_gold']:.1f}   Mean best streak: "
+          f"{stats['mean_best_streak']:.2f}   Mean turns: {stats['mean_turns']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,445 @@
+import argparse
+import functools
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from dungeon_draw import (CARDS_BY_CODE, JESTER_SUIT, RANKS, RULES_VERSION, SHUFFLE_STREAM,
+                          STANDARD_CODES, SUITS, CounterRNG, Deck, DeckSpec, DungeonDrawGame,
+                          FrameRenderer)
+from dungeon_sim import midpoint_policy, play_headless, game_seed
+from dungeon_telemetry import TelemetryWriter
+
+BENCH_SEED = 2024
+CORPUS_DECKS = 2_000
+
+
+# Benchmarks: Each Takes an Op Count, Does its Setup Untimed and Returns the Seconds Spent
+
+def bench_deck_construct(ops: int) -> float:
+    rng = random.Random(BENCH_SEED)
+    start = time.perf_counter()
+    for _ in range(ops):
+        Deck(rng)
+    return time.perf_counter() - start
+
+
+def bench_deck_draw(ops: int) -> float:
+    rng = random.Random(BENCH_SEED)
+    decks = [Deck(rng) for _ in range(ops // len(STANDARD_CODES) + 1)]
+    start = time.perf_counter()
+    left = ops
+    for deck in decks:
+        for _ in range(min(left, len(STANDARD_CODES))):
+            deck.draw()
+        left -= len(STANDARD_CODES)
+    return time.perf_counter() - start
+
+
+# The List Deck these Replaced, Kept Here as a Yardstick: Plain Card Objects, a
+# random.shuffle and pop(0) from the Front, with No Counts Kept
+class ListCard:
+    def __init__(self, rank: str, suit: str):
+        self.rank = rank
+        self.suit = suit
+
+
+class ListDeck:
+    def __init__(self, rng):
+        self.cards = [ListCard(rank, suit) for suit in SUITS for rank in RANKS]
+        self.cards.append(ListCard('J', JESTER_SUIT))
+        self.cards.append(ListCard('J', JESTER_SUIT))
+        rng.shuffle(self.cards)
+
+    def draw(self):
+        if not self.cards:
+            return None
+        return self.cards.pop(0)
+
+
+def bench_list_deck_construct(ops: int) -> float:
+    rng = random.Random(BENCH_SEED)
+    start = time.perf_counter()
+    for _ in range(ops):
+        ListDeck(rng)
+    return time.perf_counter() - start
+
+
+def bench_list_deck_draw(ops: int) -> float:
+    rng = random.Random(BENCH_SEED)
+    decks = [ListDeck(rng) for _ in range(ops // len(STANDARD_CODES) + 1)]
+    start = time.perf_counter()
+    left = ops
+    for deck in decks:
+        for _ in range(min(left, len(STANDARD_CODES))):
+            deck.draw()
+        left -= len(STANDARD_CODES)
+    return time.perf_counter() - start
+
+
+@functools.lru_cache(maxsize=None)
+def bench_corpus():
+    # One Pre-Dealt Corpus per Process, Dealt from the Same Seeds the Runs Below Use
+    from dungeon_corpus import DeckCorpus, build
+    path = os.path.join(tempfile.mkdtemp(), "decks.ddc")
+    build(path, CORPUS_DECKS, BENCH_SEED, workers=1)
+    return DeckCorpus(path)
+
+
+def bench_deal(ops: int) -> float:
+    # A Game's Opening Deal: Shuffle, Count, Draw a Card that Isn't a Jester
+    seeds = [game_seed(BENCH_SEED, index % CORPUS_DECKS) for index in range(ops)]
+    start = time.perf_counter()
+    for seed in seeds:
+        Deck(CounterRNG(seed, SHUFFLE_STREAM)).draw_first()
+    return time.perf_counter() - start
+
+
+def bench_deal_corpus(ops: int) -> float:
+    # The Same Deal Sliced Out of the Mapped Corpus, Borrowing its Counts
+    corpus = bench_corpus()
+    start = time.perf_counter()
+    for index in range(ops):
+        corpus.deck(index % CORPUS_DECKS).draw_first()
+    return time.perf_counter() - start
+
+
+def long_deck_bench(decks: int):
+    # A Turn's Deck Work (Draw, Then the Live Odds the HUD Shows) on Ever Bigger Decks:
+    # the Cost per Op Should Stay Flat as the Deck Grows
+    def bench(ops: int) -> float:
+        spec = DeckSpec(decks=decks, jesters=2 * decks)
+        rng = random.Random(BENCH_SEED)
+        piles = [Deck(rng, spec) for _ in range(ops // spec.size() + 1)]
+        start = time.perf_counter()
+        left = ops
+        for deck in piles:
+            for _ in range(min(left, spec.size())):
+                card = deck.draw()
+                deck.p_higher(card.value)
+                deck.p_lower(card.value)
+                deck.p_equal(card.value)
+            left -= spec.size()
+        return time.perf_counter() - start
+    return bench
+
+
+def bench_check_guess(ops: int) -> float:
+    rng = random.Random(BENCH_SEED)
+    game = DungeonDrawGame(seed=BENCH_SEED)
+    cards = [CARDS_BY_CODE[code] for code in STANDARD_CODES[:52]]
+    pairs = [(rng.choice("hl"), rng.choice(cards), rng.choice(cards)) for _ in range(1024)]
+    check_guess = game.check_guess
+    start = time.perf_counter()
+    for index in range(ops):
+        check_guess(*pairs[index & 1023])
+    return time.perf_counter() - start
+
+
+def room_bench(suit: str):
+    def bench(ops: int) -> float:
+        # Huge HP Keeps the Room Running Without Anyone Dying Mid-Benchmark
+        game = DungeonDrawGame(seed=BENCH_SEED)
+        game.max_hp = game.hp = 10 ** 9
+        rng = random.Random(BENCH_SEED)
+        cards = [card for card in map(CARDS_BY_CODE.__getitem__, STANDARD_CODES)
+                 if card.suit == suit]
+        rooms = [(rng.choice(("correct", "incorrect", "equal")), rng.choice(cards))
+                 for _ in range(1024)]
+        room_effect = game.room_effect
+        deck = game.deck
+        start = time.perf_counter()
+        for index in range(ops):
+            # Rolls Key on the Deck Position, so Walk it to Vary the Variants
+            deck.cursor = index % 54
+            room_effect(*rooms[index & 1023])
+            if index & 1023 == 1023:
+                game.events.clear()
+        return time.perf_counter() - start
+    return bench
+
+
+def bench_over_time_effects(ops: int) -> float:
+    game = DungeonDrawGame(seed=BENCH_SEED)
+    game.max_hp = game.hp = 10 ** 9
+    game.poison_turns = game.regen_turns = ops + 1
+    game.poison_damage_per_turn = game.regen_amount_per_turn = 2
+    start = time.perf_counter()
+    for index in range(ops):
+        game.apply_over_time_effects()
+        if index & 1023 == 1023:
+            game.events.clear()
+    return time.perf_counter() - start
+
+
+def bench_effects_fast_forward(ops: int) -> float:
+    # 40 Turns of Poison and Regen per Op, Skipped in Closed Form
+    games = []
+    for index in range(ops):
+        game = DungeonDrawGame(seed=BENCH_SEED)
+        game.record_events = False
+        game.max_hp = game.hp = 200
+        game.effects.apply("poison", 3, 40)
+        game.effects.apply("regen", 2, 25)
+        games.append(game)
+    start = time.perf_counter()
+    for game in games:
+        game.fast_forward_effects(40)
+    return time.perf_counter() - start
+
+
+def bench_card_art(ops: int) -> float:
+    cards = [CARDS_BY_CODE[code] for code in STANDARD_CODES]
+    start = time.perf_counter()
+    for index in range(ops):
+        cards[index % 54].to_ascii_lines()
+    return time.perf_counter() - start
+
+
+def bench_two_cards(ops: int) -> float:
+    # Output Goes to a String Buffer Instead of the Terminal
+    game = DungeonDrawGame(seed=BENCH_SEED)
+    game.renderer = FrameRenderer(stream=io.StringIO())
+    cards = [CARDS_BY_CODE[code] for code in STANDARD_CODES]
+    start = time.perf_counter()
+    for index in range(ops):
+        game.display_two_cards(cards[index % 54], cards[(index * 7 + 3) % 54])
+        game.renderer.flush()
+        if index & 255 == 255:
+            game.renderer.stream = io.StringIO()
+    return time.perf_counter() - start
+
+
+def run_bench(record_events: bool):
+    def bench(ops: int) -> float:
+        start = time.perf_counter()
+        for index in range(ops):
+            game = DungeonDrawGame(seed=game_seed(BENCH_SEED, index))
+            game.record_events = record_events
+            play_headless(game, midpoint_policy)
+        return time.perf_counter() - start
+    return bench
+
+
+def bench_corpus_runs(ops: int) -> float:
+    # The Same Games as run.full_game_no_events, Dealt from the Corpus
+    corpus = bench_corpus()
+    start = time.perf_counter()
+    for index in range(ops):
+        game = corpus.game(index % CORPUS_DECKS)
+        game.record_events = False
+        play_headless(game, midpoint_policy)
+    return time.perf_counter() - start
+
+
+def bench_telemetry(ops: int) -> float:
+    # Full Games with a Row Written per Decision (Batches Go to the Null Device)
+    with TelemetryWriter(os.devnull) as writer:
+        start = time.perf_counter()
+        for index in range(ops):
+            writer.play(DungeonDrawGame(seed=game_seed(BENCH_SEED, index)), index)
+        writer.flush()
+        return time.perf_counter() - start
+
+
+@functools.lru_cache(maxsize=None)
+def bench_replays():
+    # One Set of Recorded Bot Games per Process, the Same Games the Runs Above Play
+    from dungeon_replay import encode
+    blobs = []
+    for index in range(CORPUS_DECKS):
+        game = DungeonDrawGame(seed=game_seed(BENCH_SEED, index))
+        game.record_events = False
+        play_headless(game, midpoint_policy)
+        blobs.append(encode(game))
+    return blobs
+
+
+def bench_replay_verify(ops: int) -> float:
+    # Batched Verification on One Core (No Worker Pool), One Op per Replay
+    from dungeon_replay import verify_many
+    blobs = bench_replays()
+    blobs = [blobs[index % CORPUS_DECKS] for index in range(ops)]
+    start = time.perf_counter()
+    if not all(verify_many(blobs, workers=1)):
+        raise RuntimeError("A recorded bot game failed verification")
+    return time.perf_counter() - start
+
+
+def bench_replay_rerun(ops: int) -> float:
+    # The Scalar Fallback: One Game at a Time on advance(), Without Events
+    from dungeon_replay import verify
+    blobs = bench_replays()
+    start = time.perf_counter()
+    for index in range(ops):
+        verify(blobs[index % CORPUS_DECKS])
+    return time.perf_counter() - start
+
+
+def bench_replay_full(ops: int) -> float:
+    # The Full step() Path replay() Takes, for Comparison
+    from dungeon_replay import decode, game_summary, replay
+    blobs = bench_replays()
+    start = time.perf_counter()
+    for index in range(ops):
+        record = decode(blobs[index % CORPUS_DECKS])
+        if game_summary(replay(record)) != tuple(record.summary):
+            raise RuntimeError("A recorded bot game failed verification")
+    return time.perf_counter() - start
+
+
+@functools.lru_cache(maxsize=None)
+def scores_board():
+    # One 200k-Run Leaderboard per Process, Indexed so Queries Hit the mmap
+    from dungeon_scores import Entry, Leaderboard
+    rng = random.Random(BENCH_SEED)
+    path = os.path.join(tempfile.mkdtemp(), "scores.dat")
+    board = Leaderboard(path)
+    with open(path, "ab") as handle:
+        handle.write(b"".join(
+            Entry(f"player{rng.randrange(10_000)}", rng.randrange(600), 0, 0, 0, "dead",
+                  index).pack() for index in range(200_000)))
+    board.reindex()
+    return board
+
+
+def scores_bench(query):
+    def bench(ops: int) -> float:
+        board = scores_board()
+        start = time.perf_counter()
+        for index in range(ops):
+            query(board, index)
+        return time.perf_counter() - start
+    return bench
+
+
+BENCHMARKS = {
+    "deck.construct": (bench_deck_construct, 2_000),
+    "deck.construct.list_baseline": (bench_list_deck_construct, 2_000),
+    "deck.draw": (bench_deck_draw, 50_000),
+    "deck.draw.list_baseline": (bench_list_deck_draw, 50_000),
+    "deck.deal": (bench_deal, 5_000),
+    "deck.deal_corpus": (bench_deal_corpus, 5_000),
+    **{f"deck.long_turn.{decks}x": (long_deck_bench(decks), 50_000) for decks in (1, 64, 4096)},
+    "rules.check_guess": (bench_check_guess, 100_000),
+    **{f"rules.room_effect.{suit.lower()}": (room_bench(suit), 20_000) for suit in SUITS},
+    "rules.over_time_effects": (bench_over_time_effects, 50_000),
+    "rules.effects_fast_forward_40": (bench_effects_fast_forward, 20_000),
+    "render.to_ascii_lines": (bench_card_art, 100_000),
+    "render.display_two_cards": (bench_two_cards, 10_000),
+    "run.full_game": (run_bench(True), 200),
+    "run.full_game_no_events": (run_bench(False), 200),
+    "run.full_game_corpus": (bench_corpus_runs, 200),
+    "run.full_game_telemetry": (bench_telemetry, 200),
+    "replay.verify": (bench_replay_verify, 10_000),
+    "replay.verify_rerun": (bench_replay_rerun, 1_000),
+    "replay.verify_full_step": (bench_replay_full, 1_000),
+    "scores.top_100": (scores_bench(lambda board, index: board.top(100)), 2_000),
+    "scores.rank": (scores_bench(lambda board, index: board.rank(index % 600)), 20_000),
+    "scores.player_best": (scores_bench(lambda board, index: board.best(f"player{index % 10_000}")),
+                           20_000),
+}
+
+# Baseline Benchmark -> the Benchmark it's a Yardstick For
+BASELINES = {name: name.rsplit(".", 1)[0] for name in BENCHMARKS
+             if name.endswith(".list_baseline")}
+
+
+def measure(bench, ops: int, repeat: int) -> dict:
+    bench(max(1, ops // 10))   # Warm Up
+    samples = [bench(ops) / ops * 1e9 for _ in range(repeat)]
+    return {
+        "ns_per_op": statistics.median(samples),
+        "min_ns": min(samples),
+        "ops_per_s": 1e9 / statistics.median(samples),
+        "ops": ops,
+        "repeat": repeat,
+    }
+
+
+def run_suite(names=None, repeat: int = 5, scale: float = 1.0) -> dict:
+    results = {}
+    for name, (bench, ops) in BENCHMARKS.items():
+        if names and not any(name.startswith(prefix) for prefix in names):
+            continue
+        results[name] = measure(bench, max(1, int(ops * scale)), repeat)
+        line = f"{name:32} {results[name]['ns_per_op']:>12,.0f} ns/op"
+        # A Baseline Runs Right After the Benchmark it Measures, so Print the Two Side by Side
+        measured = BASELINES.get(name)
+        if measured in results:
+            ratio = results[measured]["ns_per_op"] / results[name]["ns_per_op"]
+            results[measured]["vs_baseline"] = ratio
+            line += f"  {measured} takes {ratio:.2f}x"
+        print(line, file=sys.stderr)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "rules_version": RULES_VERSION,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list:
+    # Returns (name, baseline ns, current ns, ratio, regressed) for Every Shared Benchmark
+    rows = []
+    for name, old in baseline["results"].items():
+        new = current["results"].get(name)
+        if new is None:
+            continue
+        ratio = new["ns_per_op"] / old["ns_per_op"]
+        rows.append((name, old["ns_per_op"], new["ns_per_op"], ratio, ratio > 1 + threshold))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Dungeon Draw engine.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_cmd = commands.add_parser("run", help="run the benchmarks and write JSON results")
+    run_cmd.add_argument("--out", default="-", help="results file (default: stdout)")
+    run_cmd.add_argument("--only", nargs="*", help="benchmark name prefixes to run")
+    run_cmd.add_argument("--repeat", type=int, default=5)
+    run_cmd.add_argument("--scale", type=float, default=1.0, help="multiply every op count")
+
+    compare_cmd = commands.add_parser("compare", help="flag regressions against a baseline")
+    compare_cmd.add_argument("baseline")
+    compare_cmd.add_argument("current")
+    compare_cmd.add_argument("--threshold", type=float, default=0.10,
+                             help="allowed slowdown before flagging (default: 10%%)")
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        report = json.dumps(run_suite(args.only, args.repeat, args.scale), indent=2)
+        if args.out == "-":
+            print(report)
+        else:
+            with open(args.out, "w") as handle:
+                handle.write(report + "\n")
+        return
+
+    with open(args.baseline) as handle:
+        baseline = json.load(handle)
+    with open(args.current) as handle:
+        current = json.load(handle)
+    rows = compare(baseline, current, args.threshold)
+    for name, old, new, ratio, regressed in rows:
+        flag = "REGRESSION" if regressed else ""
+        print(f"{name:32} {old:>12,.0f} -> {new:>12,.0f} ns/op  {ratio:6.2f}x  {flag}")
+    regressions = sum(row[4] for row in rows)
+    print(f"{regressions} regression(s) over {args.threshold:.0%}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
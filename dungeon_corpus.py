@@ -0,0 +1,198 @@
+import argparse
+import mmap
+import os
+import random
+import struct
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from dungeon_draw import (SHUFFLE_STREAM, STANDARD_CODES, STANDARD_DECK, CounterRNG, Deck,
+                          DeckSpec, DungeonDrawGame)
+from dungeon_sim import game_seed
+
+
+# Corpus File (Little Endian): a Header, the Unshuffled Deck, Then One Order per Game
+# header: magic, format version, cards per deck, decks, root seed
+# base: the card codes every order is a shuffle of, in recipe order
+# order: card codes, top of the deck first, already past the first-card rule; order N is
+# exactly the deck DungeonDrawGame(seed=game_seed(root seed, N)) deals
+MAGIC = b"DDDC"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sB3xIQq")
+
+
+def deal(seed: int, base=STANDARD_CODES) -> bytes:
+    # The Same Shuffle Deck() Does, Then the Same First-Card Rule the Game Applies
+    rng = CounterRNG(seed, SHUFFLE_STREAM)
+    codes = list(base)
+    rng.shuffle(codes)
+    deck = Deck.from_codes(codes, rng)
+    deck.draw_first()
+    return deck.codes.tobytes()
+
+
+def deal_chunk(root_seed: int, start: int, stop: int, base) -> bytes:
+    return b"".join(deal(game_seed(root_seed, index), base) for index in range(start, stop))
+
+
+def _deal_chunk(args) -> bytes:
+    return deal_chunk(*args)
+
+
+def build(path: str, decks: int, seed: int = 0, spec: DeckSpec = None, workers: int = None,
+          chunk_size: int = 20_000):
+    # Chunks are Written in Order, so the File Never Depends on the Worker Count; it's
+    # Written Aside and Swapped in Whole, so Readers Never See Half a Corpus
+    base = (spec or STANDARD_DECK).codes()
+    chunks = [(seed, start, min(start + chunk_size, decks), base)
+              for start in range(0, decks, chunk_size)]
+    workers = workers or os.cpu_count() or 1
+    temp = f"{path}.tmp"
+    with open(temp, "wb") as handle:
+        handle.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(base), decks, seed))
+        handle.write(bytes(base))
+        if workers == 1 or len(chunks) <= 1:
+            for chunk in chunks:
+                handle.write(_deal_chunk(chunk))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for block in pool.map(_deal_chunk, chunks):
+                    handle.write(block)
+    os.replace(temp, path)
+
+
+class DeckCorpus:
+    # Read Side: the File is Mapped Once and an Order is a memoryview Slice of the
+    # Mapping, so Nothing is Copied Until a Deck Takes its Own Cards. Processes Mapping
+    # the Same File Share One Copy in the Page Cache
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as handle:
+            size = os.fstat(handle.fileno()).st_size
+            if size < HEADER.size:
+                raise ValueError(f"{path} is too short to be a deck corpus")
+            self.data = mmap.mmap(handle.fileno(), size, access=mmap.ACCESS_READ)
+        magic, version, self.cards, self.count, self.seed = HEADER.unpack_from(self.data)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.data.close()
+            raise ValueError(f"{path} is not a v{FORMAT_VERSION} deck corpus")
+        self.offset = HEADER.size + self.cards
+        if size != self.offset + self.count * self.cards:
+            self.data.close()
+            raise ValueError(f"{path} is truncated: its header promises {self.count} decks")
+        self.view = memoryview(self.data)
+        self.base = list(self.view[HEADER.size:self.offset])
+        # Every Order Holds the Same Cards, so they All Borrow One Set of Counts
+        self.counted = Deck.from_codes(self.base)
+        # Games Dealt from a Standard Corpus Keep the Standard Recipe (Replays Need it)
+        self.spec = STANDARD_DECK if self.base == STANDARD_CODES else None
+
+    def __len__(self) -> int:
+        return self.count
+
+    def order(self, index: int) -> memoryview:
+        if not 0 <= index < self.count:
+            raise IndexError(f"deck {index} is outside a corpus of {self.count}")
+        start = self.offset + index * self.cards
+        return self.view[start:start + self.cards]
+
+    def game_seed(self, index: int) -> int:
+        return game_seed(self.seed, index)
+
+    def deck(self, index: int, seed: int = None) -> Deck:
+        # Its RNG Picks Up Where One Shuffle Leaves Off. A Seeded Game that Reshuffled a
+        # Jester Off the Top Has Gone Further, Which Only its Snapshot Shows
+        seed = self.game_seed(index) if seed is None else seed
+        rng = CounterRNG(seed, SHUFFLE_STREAM, self.cards - 1)
+        return Deck.from_codes(self.order(index), rng, counted=self.counted)
+
+    def game(self, index: int, rules=None) -> DungeonDrawGame:
+        # The Same Game as DungeonDrawGame(seed=game_seed(root seed, index)), Minus the Shuffle
+        seed = self.game_seed(index)
+        return DungeonDrawGame(seed=seed, rules=rules, deck=self.spec,
+                               dealt=self.deck(index, seed))
+
+    def close(self):
+        # Orders Still Held Elsewhere Keep the Mapping Open Until They Go
+        self.view.release()
+        try:
+            self.data.close()
+        except BufferError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_corpora = {}
+
+
+def open_corpus(path: str) -> DeckCorpus:
+    # One Mapping per Process, However Many Chunks it Plays
+    corpus = _corpora.get(path)
+    if corpus is None:
+        corpus = _corpora[path] = DeckCorpus(path)
+    return corpus
+
+
+def verify(corpus: DeckCorpus, sample: int = 1000, seed: int = 0) -> list:
+    # Re-Deals the First, the Last and a Random Sample of Decks; Returns the Mismatches
+    rng = random.Random(seed)
+    indices = {0, corpus.count - 1} | {rng.randrange(corpus.count)
+                                       for _ in range(min(sample, corpus.count))}
+    return sorted(index for index in indices if 0 <= index < corpus.count
+                  and corpus.order(index) != deal(corpus.game_seed(index), corpus.base))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-dealt deck orders for sims and benchmarks.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = commands.add_parser("build", help="deal a corpus of deck orders")
+    build_parser.add_argument("path")
+    build_parser.add_argument("--decks", type=int, default=1_000_000)
+    build_parser.add_argument("--seed", type=int, default=0,
+                              help="root seed: deck N is the deal of game N under this seed")
+    build_parser.add_argument("--deck", metavar="SPEC", type=DeckSpec.parse, default=None,
+                              help="custom deck, e.g. decks=4,jesters=8 (see dungeon_draw.py)")
+    build_parser.add_argument("--workers", type=int, default=None,
+                              help="worker processes (default: all cores)")
+    build_parser.add_argument("--chunk-size", type=int, default=20_000)
+
+    info_parser = commands.add_parser("info", help="describe a corpus")
+    info_parser.add_argument("path")
+
+    verify_parser = commands.add_parser("verify", help="re-deal a sample of decks and compare")
+    verify_parser.add_argument("path")
+    verify_parser.add_argument("--sample", type=int, default=1000)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        start = time.perf_counter()
+        build(args.path, args.decks, args.seed, args.deck, args.workers, args.chunk_size)
+        elapsed = time.perf_counter() - start
+        size = os.path.getsize(args.path)
+        print(f"Dealt {args.decks} decks into {args.path} in {elapsed:.2f}s "
+              f"({size / 1e6:.1f} MB)")
+        return
+
+    with DeckCorpus(args.path) as corpus:
+        if args.command == "info":
+            kind = "standard" if corpus.spec is not None else "custom"
+            print(f"{corpus.count} decks of {corpus.cards} cards ({kind} deck), "
+                  f"root seed {corpus.seed}")
+            print(f"{os.path.getsize(args.path) / 1e6:.1f} MB, format v{FORMAT_VERSION}")
+        else:
+            mismatches = verify(corpus, args.sample)
+            if mismatches:
+                print(f"{len(mismatches)} decks don't match their seeds, first at {mismatches[0]}")
+                sys.exit(1)
+            print(f"Sampled decks match their seeds (root seed {corpus.seed})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,14 @@
+import argparse
+import json
+import os
 import random
+import struct
 import sys
+import time
+from array import array
+
+from dungeon_effects import Timeline
+from dungeon_rules import DEFAULT_TABLES, RuleTables, load_rules
 
 
 # Define Constants for Cards and Decks
@@ -7,11 +16,19 @@ RANKS = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
 SUITS = ["Hearts", "Diamonds", "Clubs", "Spades"]
 JESTER_SUIT = "Jester" # To be implemented into a boss fight
 
+# Bump Whenever a Rule or the Order of RNG Calls Changes (Replays Depend on It)
+RULES_VERSION = 2
+
+# Set DUNGEON_DRAW_PROFILE=1 to Profile Every Game by Default
+PROFILE_ENABLED = bool(os.environ.get("DUNGEON_DRAW_PROFILE"))
+
 RANK_VALUES = {
     '2': 2, '3': 3, '4': 4, '5': 5, '6': 6, '7': 7, '8': 8, '9': 9,
     '10': 10, 'J': 11, 'Q': 12, 'K': 13, 'A': 14
 }
 
+SUIT_INDEX = {suit: index for index, suit in enumerate(SUITS)}
+
 SUIT_SYMBOLS = {
     "Hearts": "♥",
     "Diamonds": "♦",
@@ -20,72 +37,733 @@ SUIT_SYMBOLS = {
     JESTER_SUIT: "🃏"
 }
 
-# Define the Card Class
-class Card:
-    def __init__(self, rank: str, suit: str):
-        self.rank = rank
-        self.suit = suit
+# Create the ASCII representation of a card
+def card_art(rank: str, symbol: str) -> tuple:
+    inside_width = 9
+    top = "┌" + "─" * inside_width + "┐"
+    bottom = "└" + "─" * inside_width + "┘"
 
-    @property
-    def value(self) -> int:
-        return RANK_VALUES.get(self.rank, 0)
+    rank_top = f"│{rank:<2}" + " " * (inside_width - 2) + "│"
+    rank_bottom = "│" + " " * (inside_width - 2) + f"{rank:>2}│"
+    blank = "│" + " " * inside_width + "│"
+    suit_line = "│" + symbol.center(inside_width) + "│"
+
+    return (
+        top,
+        rank_top,
+        blank,
+        suit_line,
+        blank,
+        rank_bottom,
+        bottom,
+    )
 
-    @property
-    def symbol(self) -> str:
-        return SUIT_SYMBOLS.get(self.suit, "?")
+
+# Define the Card Class
+# Cards are interned flyweights: Card(rank, suit) always hands back the same
+# object, and each one carries a compact byte code (suit * 16 + value).
+class Card:
+    __slots__ = ("rank", "suit", "value", "symbol", "code", "art")
+    _interned = {}
+
+    def __new__(cls, rank: str, suit: str):
+        card = cls._interned.get((rank, suit))
+        if card is None:
+            card = object.__new__(cls)
+            card.rank = rank
+            card.suit = suit
+            card.value = RANK_VALUES.get(rank, 0)
+            card.symbol = SUIT_SYMBOLS.get(suit, "?")
+            card.code = card_code(suit, card.value)
+            card.art = card_art(rank, card.symbol)
+            cls._interned[(rank, suit)] = card
+        return card
+
+    def __reduce__(self):
+        return Card, (self.rank, self.suit)
+
+    @staticmethod
+    def from_code(code: int) -> "Card":
+        return CARDS_BY_CODE[code]
 
     def __str__(self) -> str:
         return f"{self.rank}{self.symbol}"
     
-    # Create the ASCII representation of the card
+    # Create the ASCII representation of the card (Built Once, See card_art)
     def to_ascii_lines(self):
-        inside_width = 9
-        top = "┌" + "─" * inside_width + "┐"
-        bottom = "└" + "─" * inside_width + "┘"
-
-        rank = self.rank
-        rank_top = f"│{rank:<2}" + " " * (inside_width - 2) + "│"
-        rank_bottom = "│" + " " * (inside_width - 2) + f"{rank:>2}│"
-        blank = "│" + " " * inside_width + "│"
-        suit_line = "│" + self.symbol.center(inside_width) + "│"
-
-        return [
-            top,
-            rank_top,
-            blank,
-            suit_line,
-            blank,
-            rank_bottom,
-            bottom,
-        ]
+        return list(self.art)
+
+
+# Compact Card Codes
+JESTER_INDEX = len(SUITS)
+
+
+def card_code(suit: str, value: int):
+    if suit == JESTER_SUIT:
+        return JESTER_INDEX * 16 + value
+    if suit in SUIT_INDEX:
+        return SUIT_INDEX[suit] * 16 + value
+    return None
+
+
+CARDS_BY_CODE = [None] * ((JESTER_INDEX + 1) * 16)
+for _suit in SUITS:
+    for _rank in RANKS:
+        _card = Card(_rank, _suit)
+        CARDS_BY_CODE[_card.code] = _card
+JESTER_CARD = Card('J', JESTER_SUIT)
+CARDS_BY_CODE[JESTER_CARD.code] = JESTER_CARD
+
+# Where Each Code is Counted: its Slot in a Deck's card_counts (suit * 13 + value - 2),
+# or -1 for Jesters, Which Only Count Toward their Suit
+CARD_SLOTS = [-1] * len(CARDS_BY_CODE)
+for _card in CARDS_BY_CODE:
+    if _card is not None and _card.suit != JESTER_SUIT:
+        CARD_SLOTS[_card.code] = SUIT_INDEX[_card.suit] * 13 + _card.value - 2
+
+# Standard Deck Order Before Shuffling: 52 Cards Plus Two Jesters
+STANDARD_CODES = [Card(rank, suit).code for suit in SUITS for rank in RANKS] \
+    + [JESTER_CARD.code] * 2
+
+
+# Deck Recipes: Long Dungeons Shuffle Several Decks Together, Can Add Jesters, Change
+# How Many Copies of Each Suit a Deck Holds or Play with Fewer Ranks
+class DeckSpec:
+    def __init__(self, decks: int = 1, jesters: int = 2, suits: dict = None, ranks=None):
+        self.decks = decks
+        self.jesters = jesters
+        self.suits = {suit: 1 for suit in SUITS} if suits is None else dict(suits)
+        self.ranks = list(RANKS) if ranks is None else list(ranks)
+        self._counted = None
+        if decks < 1 or jesters < 0 or any(count < 0 for count in self.suits.values()):
+            raise ValueError("A deck needs at least one pack and no negative counts")
+        unknown = [name for name in self.suits if name not in SUIT_INDEX] \
+            + [rank for rank in self.ranks if rank not in RANK_VALUES]
+        if unknown:
+            raise ValueError(f"Unknown suits or ranks in deck spec: {', '.join(unknown)}")
+        if not self.size() - jesters:
+            raise ValueError("A deck needs at least one ranked card")
+
+    @classmethod
+    def parse(cls, text: str) -> "DeckSpec":
+        # "decks=4,jesters=8,Spades=2,Hearts=0,ranks=7-A" (Ranks as a Range or Single Rank)
+        options = {}
+        suits = {suit: 1 for suit in SUITS}
+        for part in filter(None, text.split(",")):
+            key, _, value = part.partition("=")
+            key = key.strip()
+            if key.capitalize() in SUIT_INDEX:
+                suits[key.capitalize()] = int(value)
+            elif key == "ranks":
+                low, _, high = value.upper().partition("-")
+                start, stop = RANKS.index(low), RANKS.index(high or low)
+                options["ranks"] = RANKS[start:stop + 1]
+            elif key in ("decks", "jesters"):
+                options[key] = int(value)
+            else:
+                raise ValueError(f"Unknown deck option {key!r}")
+        return cls(suits=suits, **options)
+
+    def codes(self) -> list:
+        # Same Order as STANDARD_CODES for the Standard Deck, so Seeds Deal the Same Cards
+        pack = [card_code(suit, RANK_VALUES[rank]) for suit in SUITS
+                for _ in range(self.suits.get(suit, 0)) for rank in self.ranks]
+        return pack * self.decks + [JESTER_CARD.code] * self.jesters
+
+    def counted(self) -> "Deck":
+        # Counted Once per Recipe: Every Shuffle Holds the Same Cards, so New Decks Copy
+        # These Counts Instead of Recounting
+        if self._counted is None:
+            self._counted = Deck.from_codes(self.codes())
+        return self._counted
+
+    def size(self) -> int:
+        return self.decks * len(self.ranks) * sum(self.suits.values()) + self.jesters
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, DeckSpec) and (
+            (self.decks, self.jesters, self.suits, self.ranks)
+            == (other.decks, other.jesters, other.suits, other.ranks))
+
+    def __repr__(self) -> str:
+        return (f"DeckSpec(decks={self.decks}, jesters={self.jesters}, suits={self.suits}, "
+                f"ranks={self.ranks[0]}-{self.ranks[-1]})")
+
+
+STANDARD_DECK = DeckSpec()
+
+
+class RankCounts:
+    # Counts by Card Value. There are Only 16 Values However Big the Deck, so a Change
+    # is One Step and "How Many Below" is a Sum Over a Slice (Done in C, and Cheaper
+    # Than Walking a Fenwick Tree in Python Either Way)
+    __slots__ = ("counts",)
+
+    def __init__(self, counts: list):
+        self.counts = list(counts)
+
+    def copy(self) -> "RankCounts":
+        other = RankCounts.__new__(RankCounts)
+        other.counts = self.counts[:]
+        return other
+
+    def add(self, value: int, delta: int):
+        self.counts[value] += delta
+
+    def below(self, value: int) -> int:
+        return sum(self.counts[:value])
+
+    def above(self, value: int) -> int:
+        return sum(self.counts[value + 1:])
+
+
+# Counter-Based RNG: Every Number is a Keyed Hash (SplitMix64) of (seed, stream, index),
+# so Any Draw Can be Regenerated Directly Without Running Through the Ones Before it.
+# The Deck Shuffles on One Stream, and Each Room Rolls at a Fixed Index on Another, Set
+# by the Position of its Card in the Deck
+MASK64 = (1 << 64) - 1
+GOLDEN_GAMMA = 0x9E3779B97F4A7C15
+SHUFFLE_STREAM = 1
+ROLL_STREAM = 2
+ROLLS_PER_CARD = 2   # Variant Pick, Then Coin Flip
+
+
+def mix64(z: int) -> int:
+    z = (z ^ (z >> 30)) * 0xBF58476D1CE4E5B9 & MASK64
+    z = (z ^ (z >> 27)) * 0x94D049BB133111EB & MASK64
+    return z ^ (z >> 31)
+
+
+class CounterRNG:
+    # The Slice of random.Random the Game Uses (random, choice, shuffle), Plus seek()
+    __slots__ = ("key", "counter")
+
+    def __init__(self, seed: int, stream: int = 0, counter: int = 0):
+        self.key = mix64((seed + stream * GOLDEN_GAMMA) & MASK64)
+        self.counter = counter
+
+    def at(self, index: int) -> int:
+        return mix64((self.key + (index + 1) * GOLDEN_GAMMA) & MASK64)
+
+    def seek(self, index: int):
+        self.counter = index
+
+    def next64(self) -> int:
+        value = self.at(self.counter)
+        self.counter += 1
+        return value
+
+    def random(self) -> float:
+        return (self.next64() >> 11) * (1.0 / (1 << 53))
+
+    def below(self, n: int) -> int:
+        # Multiply-Shift: Bias Under n / 2**64, Far Below Anything a Game Can Show
+        return (self.next64() * n) >> 64
+
+    def choice(self, seq):
+        return seq[self.below(len(seq))]
+
+    def shuffle(self, items: list):
+        # Fisher-Yates, One Draw per Swap (below() Inlined: Shuffles Start Every Game)
+        key, counter = self.key, self.counter
+        for i in range(len(items) - 1, 0, -1):
+            counter += 1
+            z = (key + counter * GOLDEN_GAMMA) & MASK64
+            z = (z ^ (z >> 30)) * 0xBF58476D1CE4E5B9 & MASK64
+            z = (z ^ (z >> 27)) * 0x94D049BB133111EB & MASK64
+            j = ((z ^ (z >> 31)) * (i + 1)) >> 64
+            items[i], items[j] = items[j], items[i]
+        self.counter = counter
 
 
 # Define the Deck Class to hold a set of cards
+# The order lives in a byte array and draws just move a cursor forward.
 class Deck:
-    def __init__(self):
-        # Initialises a standard 52 card deck
-        self.cards = [Card(rank, suit) for suit in SUITS for rank in RANKS]
-        # Add Two Jester Boss Cards
-        self.cards.append(Card('J', JESTER_SUIT))
-        self.cards.append(Card('J', JESTER_SUIT))
-        random.shuffle(self.cards) # .Shuffle used to randomise the deck (its just convenient)
+    def __init__(self, rng=None, spec: DeckSpec = None):
+        # Each Deck Shuffles with its Owner's RNG (Falls Back to the Global One)
+        self.rng = rng if rng is not None else random
+        # Standard 52 Card Deck Plus Two Jester Boss Cards, Unless a Spec Says Otherwise
+        codes = list(STANDARD_CODES) if spec is None else spec.codes()
+        self.rng.shuffle(codes) # .Shuffle used to randomise the deck (its just convenient)
+        self.codes = array('B', codes)
+        self.cursor = 0
+        self.borrow_counts((spec or STANDARD_DECK).counted())
+
+    @classmethod
+    def from_codes(cls, codes, rng=None, cursor: int = 0, counted: "Deck" = None) -> "Deck":
+        # Rebuild a Deck in a Known Order Without Shuffling (the First cursor Cards Drawn).
+        # A `counted` Deck with the Same Cards Left Lends its Counts Instead of a Recount
+        deck = cls.__new__(cls)
+        deck.rng = rng if rng is not None else random
+        deck.codes = array('B', codes)
+        deck.cursor = cursor
+        if counted is None:
+            deck.count_cards()
+        else:
+            deck.borrow_counts(counted)
+        return deck
+
+    def borrow_counts(self, counted: "Deck"):
+        self._card_counts = counted.card_counts[:]
+        self._ranks = counted.ranks.copy()
+        self._jesters = counted.jesters
+        self.counted = self.cursor
+
+    # Counts Catch Up Lazily: a Draw Only Moves the Cursor, and the Cards Drawn Since
+    # the Last Query Come Off the Counts the Next Time Anything Asks for Them
+
+    @property
+    def card_counts(self):
+        if self.counted != self.cursor:
+            self.catch_up()
+        return self._card_counts
+
+    @property
+    def ranks(self) -> RankCounts:
+        if self.counted != self.cursor:
+            self.catch_up()
+        return self._ranks
+
+    @property
+    def jesters(self) -> int:
+        if self.counted != self.cursor:
+            self.catch_up()
+        return self._jesters
+
+    def catch_up(self):
+        # Takes Off the Cards Drawn Since the Counts Were Last Right (or Adds Them Back
+        # if the Cursor Moved Back)
+        counted, cursor = self.counted, self.cursor
+        if cursor == counted + 1:
+            # One Card Since the Last Query (a Turn's Draw Before the HUD's Odds)
+            code = self.codes[counted]
+            slot = CARD_SLOTS[code]
+            if slot >= 0:
+                self._card_counts[slot] -= 1
+                self._ranks.counts[code & 15] -= 1
+            else:
+                self._jesters -= 1
+            self.counted = cursor
+            return
+        if cursor > counted:
+            codes, delta = self.codes[counted:cursor], -1
+        else:
+            codes, delta = self.codes[cursor:counted], 1
+        card_counts, values = self._card_counts, self._ranks.counts
+        for code in codes:
+            slot = CARD_SLOTS[code]
+            if slot >= 0:
+                card_counts[slot] += delta
+                values[code & 15] += delta
+            else:
+                self._jesters += delta
+        self.counted = cursor
+
+    @property
+    def cards(self) -> list:
+        # Remaining Cards, Top of the Deck First
+        return [CARDS_BY_CODE[code] for code in self.codes[self.cursor:]]
+
+    @cards.setter
+    def cards(self, cards):
+        self.codes = array('B', (card.code for card in cards))
+        self.cursor = 0
+        self.count_cards()
+
+    def count_cards(self):
+        # Histograms so the Odds Never Need a Scan of the Deck: One Pass Here, Then a
+        # Few Steps per Card Drawn, Whatever the Size of the Deck
+        totals = [0] * ((JESTER_INDEX + 1) * 16)                # by card code
+        for code in self.codes[self.cursor:]:
+            totals[code] += 1
+        # Bytes While Every Card Fits, Wider for Big Decks (Keys Use tuple(card_counts))
+        card_totals = [totals[suit * 16 + value] for suit in range(len(SUITS))
+                       for value in range(2, 15)]               # suit * 13 + value - 2
+        self._card_counts = bytearray(card_totals) if max(card_totals) < 256 \
+            else array('I', card_totals)
+        values = [sum(totals[suit * 16 + value] for suit in range(len(SUITS)))
+                  for value in range(16)]
+        self._ranks = RankCounts(values)                        # by card value
+        self._jesters = sum(totals[JESTER_INDEX * 16:])
+        self.counted = self.cursor
+
+    @property
+    def suit_counts(self) -> dict:
+        # Suit Totals are Summed from card_counts When Asked, so Draws Only Track Jesters
+        counts = self.card_counts
+        totals = {suit: sum(counts[SUIT_INDEX[suit] * 13:SUIT_INDEX[suit] * 13 + 13])
+                  for suit in SUITS}
+        totals[JESTER_SUIT] = self.jesters
+        return totals
+
+    def count(self, card: Card, delta: int):
+        slot = CARD_SLOTS[card.code]
+        if slot >= 0:
+            self.card_counts[slot] += delta
+            self._ranks.add(card.value, delta)
+        else:
+            self._jesters = self.jesters + delta
 
     def draw(self):
-        if not self.cards:
+        # Every Turn Draws, so Counting Waits for catch_up()
+        cursor = self.cursor
+        if cursor >= len(self.codes):
             return None
-        return self.cards.pop(0)
+        self.cursor = cursor + 1
+        return CARDS_BY_CODE[self.codes[cursor]]
+
+    def draw_first(self):
+        # The Opening Card is Never a Jester: Put it Back and Reshuffle Until it Isn't
+        first = self.draw()
+        while first is not None and first.suit == JESTER_SUIT:
+            self.put_back(first)
+            self.shuffle()
+            first = self.draw()
+        return first
+
+    def put_back(self, card: Card):
+        self.codes.append(card.code)
+        self.count(card, 1)
+
+    def shuffle(self):
+        if self.counted != self.cursor:
+            self.catch_up()
+        remaining = self.codes[self.cursor:].tolist()
+        self.rng.shuffle(remaining)
+        self.codes = array('B', remaining)
+        self.cursor = self.counted = 0
 
     def remaining(self) -> int:
-        return len(self.cards)
+        return len(self.codes) - self.cursor
+
+    # Live Odds for the Next Card (Jesters are Counted Separately); Each Checks the
+    # Counts Have Caught Up Itself, Skipping the Properties on the HUD's Path
+
+    def p_higher(self, value: int) -> float:
+        cursor = self.cursor
+        remaining = len(self.codes) - cursor
+        if not remaining:
+            return 0.0
+        if self.counted != cursor:
+            self.catch_up()
+        return self._ranks.above(value) / remaining
+
+    def p_lower(self, value: int) -> float:
+        cursor = self.cursor
+        remaining = len(self.codes) - cursor
+        if not remaining:
+            return 0.0
+        if self.counted != cursor:
+            self.catch_up()
+        return self._ranks.below(value) / remaining
+
+    def p_equal(self, value: int) -> float:
+        cursor = self.cursor
+        remaining = len(self.codes) - cursor
+        if not remaining:
+            return 0.0
+        if self.counted != cursor:
+            self.catch_up()
+        return self._ranks.counts[value] / remaining
+
+    def p_jester(self) -> float:
+        cursor = self.cursor
+        remaining = len(self.codes) - cursor
+        if not remaining:
+            return 0.0
+        if self.counted != cursor:
+            self.catch_up()
+        return self._jesters / remaining
+
+    def suit_odds(self) -> dict:
+        total = self.remaining() or 1
+        return {suit: count / total for suit, count in self.suit_counts.items()}
+
+
+# Structured Events Emitted by the Game Engine
+class Event:
+    __slots__ = ("kind", "data")
+
+    def __init__(self, kind: str, **data):
+        self.kind = kind
+        self.data = data
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{k}={v}" for k, v in self.data.items())
+        return f"Event({self.kind}{', ' if fields else ''}{fields})"
+
+
+# The Jester's Face (the Terminal Prints it, the Pygame Front End Draws it)
+JESTER_FACE = (
+    "         /\\  \\",
+    "        /  \\/ \\",
+    "   ___  \\   O /  ___",
+    "  /    \\ \\   / /    \\",
+    " /   __ -    -  __   \\",
+    "/___/ | <>   <> | \\___\\",
+    "O  ___|    ^    |___  O",
+    " /     \\  -^-  /    \\",
+    "/   /\\  \\_____/ /\\   \\",
+    "\\_ / /          \\ \\_ /",
+    "O   /   /\\   /\\  \\  O",
+    "     \\ /  \\ /  \\ /",
+    "      O    O    O",
+)
+
+
+# Narration for the Simple Events (Anything Fancier is Drawn by render_event)
+EVENT_TEXT = {
+    "poison_tick": "Poison courses through your veins for {amount} damage!",
+    "poison_fade": "The poison finally fades.",
+    "regen_tick": "Regenerative magic fixes your wounds. You heal {amount} HP.",
+    "regen_fade": "Your regenerative blessing fades.",
+    "totem": "\n*** The Totem Shatters, pulling you back from the very brink of death! ***\n"
+             "You are restored to {hp} HP.\n",
+    "quit": "You choose to leave the dungeon early.",
+    "goblin": "You stab first! You take {damage} damage and loot {loot} gold.",
+    "goblin_hit": "The goblin slashes wildly! You take {damage} damage.",
+    "slime": "The slime's toxins melt into your wounds; you are poisoned "
+             "({poison} dmg for {turns} turns).",
+    "warlock": "Dark magic drains your lifespan for {damage} damage.",
+    "pure_heal": "You heal {amount} HP.",
+    "regen": "You feel your body putting itself back together over time "
+             "({per_turn} HP for {turns} turns).",
+    "blessing_heal": "You receive a surge of holy light, healing {amount} HP.",
+    "blessing_boost": "Your body is permanently strengthened! Max HP +{boost}.",
+    "treasure": "Treasure Room: You find a chest filled to the brim with gold!\n"
+                "You gain {gold} gold.",
+    "treasure_trap": "Treasure Room: A trap triggers as you open the chest!\n"
+                     "You take {damage} damage and only get {gold} gold.",
+    "totem_found": "Equipment Room: You find a Totem of Rebirth.\n"
+                   "If you die, the totem will save you once.",
+    "totem_unstable": "You find another eerie totem, but its magic is unstable.\n"
+                      "Instead, you reinforce your armor. Armor +{armor}.",
+    "escape_rope": "Equipment Room: You find an Escape Rope.\n"
+                   "You can automatically skip the next hostile room once.",
+    "sharpening_stone": "Equipment Room: A Sharpening Stone lets you upgrade your gear.\n"
+                        "Your armor increases by {armor}.",
+    "death": "\nYou have succumbed to the dangers of the dungeon... it claims yet another soul.",
+}
+
+ROOM_INTROS = {
+    "goblin": "Enemy Room (Goblin): A sneaky goblin rushes you!",
+    "slime": "Enemy Room (Slime): A dripping slime oozes toward you.",
+    "warlock": "Enemy Room (Warlock): A corrupt warlock mutters a curse.",
+    "pure": "Rest Room (Pure Healing): A calm fountain restores you.",
+    "regen": "Rest Room (Regeneration): A green aura wraps around you.",
+    "blessing": "Rest Room (Blessing of Fortune): A radiant altar hums with power.",
+}
+
+RESULT_TEXT = {
+    "equal": "You navigate carefully through the room, but nothing major happens.",
+    "correct": "Your senses were right; you've successfully navigated the room!",
+    "incorrect": "You misjudged the room's danger and suffered the consequences!",
+}
+
+JESTER_RESULT_TEXT = {
+    "correct": "You read his games correctly. The Jester snarls.",
+    "incorrect": "Your prediction fails. The Jester laughs at your misfortune.",
+    "equal": "Equal value the Jester tilts his head, amused but unimpressed.",
+}
+
+
+# Buffered Terminal Output
+# Everything for a turn is collected into one frame and written with a single
+# flush. In diff mode the HUD is pinned to the top of the screen and only the
+# fields that changed since the last turn are rewritten in place.
+class FrameRenderer:
+    def __init__(self, stream=None, diff: bool = False, width: int = 40):
+        self.stream = stream
+        self.diff = diff
+        self.width = width
+        self.frame = []
+        self.hud_rows = None
+        self.bytes_written = 0
+        self.flushes = 0
+
+    def line(self, text: str = ""):
+        self.frame.append(text)
+        self.frame.append("\n")
+
+    def flush(self):
+        if not self.frame:
+            return
+        data = "".join(self.frame)
+        self.frame.clear()
+        stream = self.stream or sys.stdout
+        stream.write(data)
+        stream.flush()
+        self.bytes_written += len(data.encode())
+        self.flushes += 1
+
+    def hud(self, rows):
+        if not self.diff:
+            self.line("-" * self.width)
+            for row in rows:
+                self.line("".join(label + value for label, value in row))
+            self.line("-" * self.width)
+            return
+        if self.hud_rows is None or [len(row) for row in rows] != \
+                [len(row) for row in self.hud_rows]:
+            self.pin_hud(rows)
+        else:
+            self.update_hud(rows)
+        self.hud_rows = rows
+
+    def pin_hud(self, rows):
+        # Clear the Screen, Draw the HUD at the Top and Scroll Only Below It
+        top = len(rows) + 2
+        self.frame.append("\x1b[r\x1b[2J\x1b[H")
+        self.line("-" * self.width)
+        for row in rows:
+            self.line("".join(label + value for label, value in row))
+        self.line("-" * self.width)
+        self.frame.append(f"\x1b[{top + 1}r\x1b[{top + 1};1H")
+
+    def update_hud(self, rows):
+        updates = []
+        for number, (row, old) in enumerate(zip(rows, self.hud_rows), start=2):
+            column = 1
+            for index, ((label, value), (_, old_value)) in enumerate(zip(row, old)):
+                column += len(label)
+                if len(value) != len(old_value):
+                    # Width Changed: Rewrite the Rest of the Line
+                    rest = value + "".join(l + v for l, v in row[index + 1:])
+                    updates.append(f"\x1b[{number};{column}H{rest}\x1b[K")
+                    break
+                if value != old_value:
+                    updates.append(f"\x1b[{number};{column}H{value}")
+                column += len(value)
+        if updates:
+            # Save the Cursor, Patch the Fields, Then Jump Back into the Scroll Area
+            self.frame.append("\x1b7" + "".join(updates) + "\x1b8")
+
+    def close(self):
+        if self.diff and self.hud_rows is not None:
+            self.frame.append("\x1b[r")
+            self.hud_rows = None
+        self.flush()
+
+
+# Opt-In Profiler: Wraps a Game's Methods Only When Switched On, so Games Without it Pay Nothing
+# Phase times are exclusive (a render inside an input wait only counts as render).
+class Profiler:
+    def __init__(self):
+        self.seconds = {}
+        self.calls = {}
+        self.counters = {}
+        self.stack = []
+
+    def wrap(self, phase: str, func):
+        clock = time.perf_counter
+        stack = self.stack
+
+        def timed(*args, **kwargs):
+            frame = [phase, 0.0]
+            stack.append(frame)
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = clock() - start
+                stack.pop()
+                name = frame[0]
+                self.seconds[name] = self.seconds.get(name, 0.0) + elapsed - frame[1]
+                self.calls[name] = self.calls.get(name, 0) + 1
+                if stack:
+                    stack[-1][1] += elapsed
+        return timed
+
+    def rename(self, phase: str):
+        # Lets a Phase Name Itself Once it Knows More (e.g. Which Room Variant Rolled)
+        if self.stack:
+            self.stack[-1][0] = phase
+
+    def count(self, name: str, amount: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def as_dict(self) -> dict:
+        return {
+            "phases": {phase: {"calls": self.calls[phase], "seconds": self.seconds[phase]}
+                       for phase in sorted(self.seconds)},
+            "counters": dict(sorted(self.counters.items())),
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.as_dict(), indent=2)
+
+    def to_prometheus(self, prefix: str = "dungeon_draw") -> str:
+        lines = [f"# TYPE {prefix}_phase_seconds_total counter"]
+        lines += [f'{prefix}_phase_seconds_total{{phase="{phase}"}} {self.seconds[phase]:.9f}'
+                  for phase in sorted(self.seconds)]
+        lines.append(f"# TYPE {prefix}_phase_calls_total counter")
+        lines += [f'{prefix}_phase_calls_total{{phase="{phase}"}} {self.calls[phase]}'
+                  for phase in sorted(self.calls)]
+        lines.append(f"# TYPE {prefix}_events_total counter")
+        lines += [f'{prefix}_events_total{{kind="{kind}"}} {count}'
+                  for kind, count in sorted(self.counters.items())]
+        return "\n".join(lines) + "\n"
+
+
+# Snapshot Layout (Little Endian)
+# rules version, seed, hp, max hp, gold, score, streak, best streak, armor,
+# totem and rope charges, jester fight flag/turns left/correct, turns, outcome,
+# current card, deck size, then the whole deck (drawn cards first), the RNG state
+# and every effect on the timeline (Timeline.to_bytes)
+SNAPSHOT = struct.Struct("<BQhHIIHHHBBBBBIBBI")
+SNAPSHOT_OUTCOMES = (None, "dead", "cleared", "quit")
+# After the Deck: the Shuffle Counter and Cards Drawn (Room Rolls Key on the Position)
+RNG_STATE = struct.Struct("<QI")
 
 
 # Gameplay Logic
 
+class EffectField:
+    # poison_turns, regen_amount_per_turn, ...: Views onto One Effect on the Timeline
+    def __init__(self, effect: str, field: str):
+        self.effect = effect
+        self.field = field
+
+    def __get__(self, game, owner=None):
+        if game is None:
+            return self
+        return game.effects.field(self.effect, self.field)
+
+    def __set__(self, game, value: int):
+        game.effects.set_field(self.effect, self.field, value)
+
+
 class DungeonDrawGame:
-    def __init__(self):
+    poison_turns = EffectField("poison", "turns")
+    poison_damage_per_turn = EffectField("poison", "strength")
+    regen_turns = EffectField("regen", "turns")
+    regen_amount_per_turn = EffectField("regen", "strength")
+
+    def __init__(self, seed: int = None, profile: bool = None, rules: RuleTables = None,
+                 deck: DeckSpec = None, dealt: "Deck" = None):
+        # Every Game Owns its RNG so Runs are Reproducible from the Seed Alone; Room
+        # Rolls Depend on the Card's Place in the Deck, Not on the Rolls Before Them
+        self.seed = seed if seed is not None else random.getrandbits(64)
+        self.rng = CounterRNG(self.seed, ROLL_STREAM)
+        # Balance Numbers Come from Compiled Rule Tables (See dungeon_rules.py)
+        self.rules = rules or DEFAULT_TABLES
+
         # Initialise Game State and Stats
-        self.deck = Deck()
-        self.max_hp = 20
+        if dealt is None:
+            self.deck_spec = deck or STANDARD_DECK
+            self.deck = Deck(CounterRNG(self.seed, SHUFFLE_STREAM), self.deck_spec)
+        else:
+            # A Pre-Dealt Deck (See dungeon_corpus.py) Skips the Shuffle; Without a Recipe
+            # it's Just the Cards
+            self.deck_spec = deck
+            self.deck = dealt
+        self.max_hp = self.rules.max_hp
         self.hp = self.max_hp
         self.gold = 0
         self.score = 0
@@ -93,11 +771,8 @@ class DungeonDrawGame:
         self.best_streak = 0
         self.armor = 0
 
-        # Over Time Effects
-        self.poison_turns = 0
-        self.poison_damage_per_turn = 0
-        self.regen_turns = 0
-        self.regen_amount_per_turn = 0
+        # Over Time Effects (Poison, Regen, ...) Tick from One Timeline (dungeon_effects.py)
+        self.effects = Timeline()
 
         # Items
         self.totem_charges = 0       
@@ -108,112 +783,355 @@ class DungeonDrawGame:
         self.jester_turns_left = 0
         self.jester_correct = 0
 
+        # Show Live Odds in the HUD; Output Goes Through a Buffered Renderer
+        self.show_odds = False
+        self.renderer = None
+        self.profiler = None
+
+        # A Policy (See dungeon_policy.py) Makes the Guesses in play() Instead of input()
+        self.policy = None
+        # A Hint Engine (See dungeon_hint.py) Suggests a Guess at Every Prompt
+        self.hints = None
+
+        # Engine State (Simulations can Turn Event Recording Off for Speed)
+        self.record_events = True
+        self.events = []
+        self.actions = []
+        self.turns = 0
+        self.over = False
+        self.outcome = None
+
         # Draw First Card (Make sure it's not a Jester)
-        first = self.deck.draw()
-        while first is not None and first.suit == JESTER_SUIT:
-            self.deck.cards.append(first)
-            random.shuffle(self.deck.cards)
-            first = self.deck.draw()
-        self.current_card = first
+        self.current_card = self.deck.draw_first()
+
+        if profile or (profile is None and PROFILE_ENABLED):
+            self.enable_profiling()
+
+    # Profiling
+
+    def enable_profiling(self, profiler: Profiler = None) -> Profiler:
+        # Pass One Profiler to Several Games to Aggregate Them
+        self.profiler = profiler = profiler or Profiler()
+        wrap = profiler.wrap
+        self.step = wrap("rules.step", self.step)
+        self.apply_over_time_effects = wrap("rules.over_time", self.apply_over_time_effects)
+        self.deck.draw = wrap("rules.draw", self.deck.draw)
+        self.use_escape_rope = wrap("rules.rope_check", self.use_escape_rope)
+        self.jester_round = wrap("rules.jester_round", self.jester_round)
+        self.handle_spades_enemy = wrap("rules.room.spades", self.handle_spades_enemy)
+        self.handle_hearts_heal = wrap("rules.room.hearts", self.handle_hearts_heal)
+        self.handle_diamonds_treasure = wrap("rules.room.diamonds", self.handle_diamonds_treasure)
+        self.handle_clubs_utility = wrap("rules.room.clubs", self.handle_clubs_utility)
+        self.ask = wrap("input", self.ask)
+        for name in ("flush", "render_events", "display_title", "display_hud",
+                     "display_card", "display_summary"):
+            setattr(self, name, wrap("render", getattr(self, name)))
+
+        emit = self.emit
+
+        def counted_emit(kind: str, **data):
+            profiler.count(kind)
+            if kind == "room":
+                profiler.rename(f"rules.room.{data['suit'].lower()}.{data['variant']}")
+            elif kind == "trap" and data["armor_lost"]:
+                profiler.count("armor_break")
+            emit(kind, **data)
+        self.emit = counted_emit
+        return profiler
+
+    # Save and Restore
+
+    def to_bytes(self) -> bytes:
+        # The Whole Deck Goes In, Drawn Cards Too, so Positions Survive a Restore
+        codes = self.deck.codes
+        current = self.current_card.code if self.current_card is not None else 0
+        return (
+            SNAPSHOT.pack(
+                RULES_VERSION, self.seed, self.hp, self.max_hp, self.gold, self.score,
+                self.streak, self.best_streak, self.armor,
+                self.totem_charges, self.escape_rope_charges,
+                self.in_jester_fight, self.jester_turns_left, self.jester_correct,
+                self.turns, SNAPSHOT_OUTCOMES.index(self.outcome), current, len(codes),
+            )
+            + codes.tobytes()
+            + RNG_STATE.pack(self.deck.rng.counter, self.deck.cursor)
+            + self.effects.to_bytes()
+        )
+
+    @classmethod
+    def from_bytes(cls, blob: bytes, rules: RuleTables = None) -> "DungeonDrawGame":
+        (rules_version, seed, hp, max_hp, gold, score, streak, best_streak, armor,
+         totems, ropes,
+         in_jester_fight, jester_turns_left, jester_correct,
+         turns, outcome, current, size) = SNAPSHOT.unpack_from(blob)
+        if rules_version != RULES_VERSION:
+            raise ValueError(f"Snapshot uses rules v{rules_version}, this build runs v{RULES_VERSION}")
+        deck_end = SNAPSHOT.size + size
+        if len(blob) < deck_end + RNG_STATE.size:
+            raise ValueError("Snapshot length doesn't match its layout")
+        effects, end = Timeline.from_bytes(blob, deck_end + RNG_STATE.size)
+        if len(blob) != end:
+            raise ValueError("Snapshot length doesn't match its layout")
+
+        # Skip __init__: Nothing Needs Shuffling or Drawing, Just Putting Back
+        game = cls.__new__(cls)
+        game.seed = seed
+        game.rng = CounterRNG(seed, ROLL_STREAM)
+        game.rules = rules or DEFAULT_TABLES
+        # The Blob Holds the Cards, Not the Recipe that Made Them
+        game.deck_spec = None
+        shuffles, cursor = RNG_STATE.unpack_from(blob, deck_end)
+        game.deck = Deck.from_codes(blob[SNAPSHOT.size:deck_end],
+                                    CounterRNG(seed, SHUFFLE_STREAM, shuffles), cursor)
+        game.hp, game.max_hp, game.gold, game.score = hp, max_hp, gold, score
+        game.streak, game.best_streak, game.armor = streak, best_streak, armor
+        game.effects = effects
+        game.totem_charges, game.escape_rope_charges = totems, ropes
+        game.in_jester_fight = bool(in_jester_fight)
+        game.jester_turns_left, game.jester_correct = jester_turns_left, jester_correct
+        game.show_odds = False
+        game.renderer = None
+        game.profiler = None
+        game.policy = None
+        game.hints = None
+        game.record_events = True
+        game.events = []
+        # Decisions Made Before the Snapshot Aren't Kept (turns Still Counts Them)
+        game.actions = []
+        game.turns = turns
+        game.outcome = SNAPSHOT_OUTCOMES[outcome]
+        game.over = game.outcome is not None
+        game.current_card = CARDS_BY_CODE[current] if current else None
+        return game
 
     # Helper Methods
 
+    def emit(self, kind: str, **data):
+        if self.record_events:
+            self.events.append(Event(kind, **data))
+
     def take_damage(self, amount: int, source: str = ""):
         if amount <= 0:
             return
         self.hp -= amount
+        self.emit("damage", amount=amount, source=source)
         if self.hp <= 0 and self.totem_charges > 0:
             self.totem_charges -= 1
-            self.hp = self.max_hp // 2
-            print("\n*** The Totem Shatters, pulling you back from the very brink of death! ***")
-            print(f"You are restored to {self.hp} HP.\n")
+            self.hp = self.max_hp // self.rules.totem_revive_div
+            self.emit("totem", hp=self.hp)
 
         if self.hp < 0:
             self.hp = 0
 
+    def heal(self, amount: int, source: str = "") -> int:
+        old_hp = self.hp
+        self.hp = min(self.max_hp, self.hp + amount)
+        actual = self.hp - old_hp
+        self.emit("heal", amount=actual, source=source)
+        return actual
+
     def apply_over_time_effects(self):
-        # Poison Ticks First
-        if self.poison_turns > 0 and self.poison_damage_per_turn > 0 and self.hp > 0:
-            dmg = self.poison_damage_per_turn
-            print(f"Poison courses through your veins for {dmg} damage!")
-            self.take_damage(dmg, source="poison")
-            self.poison_turns -= 1
-            if self.poison_turns == 0:
-                self.poison_damage_per_turn = 0
-                print("The poison finally fades.")
-
-        # Then Regen Ticks
-        if self.regen_turns > 0 and self.regen_amount_per_turn > 0 and self.hp > 0:
-            heal = self.regen_amount_per_turn
-            old_hp = self.hp
-            self.hp = min(self.max_hp, self.hp + heal)
-            actual = self.hp - old_hp
-            print(f"Regenerative magic fixes your wounds. You heal {actual} HP.")
-            self.regen_turns -= 1
-            if self.regen_turns == 0:
-                self.regen_amount_per_turn = 0
-                print("Your regenerative blessing fades.")
+        # Hurting Effects (Poison) Tick First, Then Healing Ones (Regen)
+        if self.effects.active:
+            self.effects.tick(self)
+
+    def fast_forward_effects(self, turns: int) -> tuple:
+        # Skips `turns` Turns of Over Time Effects in Closed Form (No Cards Drawn);
+        # Returns (HP Change, Turn of Death or None)
+        return self.effects.fast_forward(self, turns)
+
+    def legal_actions(self) -> tuple:
+        if self.over:
+            return ()
+        if self.in_jester_fight:
+            return ('h', 'l')
+        return ('h', 'l', 'q')
 
     # UI Display Methods
 
+    def output(self) -> "FrameRenderer":
+        if self.renderer is None:
+            self.renderer = FrameRenderer()
+        return self.renderer
+
+    def out(self, text: str = ""):
+        self.output().line(text)
+
+    def flush(self):
+        self.output().flush()
+
+    def ask(self, prompt: str) -> str:
+        # The Frame so Far Goes Out in One Write Before Waiting on the Player
+        self.flush()
+        return input(prompt)
+
     def display_title(self):
-        print("=" * 40)
-        print("      WELCOME TO DUNGEON DRAW      ")
-        print("=" * 40)
+        self.out("=" * 40)
+        self.out("      WELCOME TO DUNGEON DRAW      ")
+        self.out("=" * 40)
 
     def display_hud(self):
-        print("-" * 40)
+        # HUD Rows are (Label, Value) Fields so the Renderer can Redraw Single Fields
         hearts = f"{self.hp}/{self.max_hp}"
-        print(
-            f"HP: {hearts:<7}  Gold: {self.gold:<4}  "
-            f"Streak: {self.streak:<2} (Best: {self.best_streak})"
-        )
-        print(
-            f"Armor: {self.armor:<2} "
-            f"Cards left: {self.deck.remaining():<3}  "
-            f"Totem: {self.totem_charges}  Escape Rope: {self.escape_rope_charges}"
-        )
-        print("-" * 40)
+        rows = [
+            [("HP: ", f"{hearts:<7}"), ("  Gold: ", f"{self.gold:<4}"),
+             ("  Streak: ", f"{self.streak:<2}"), (" (Best: ", f"{self.best_streak})")],
+            [("Armor: ", f"{self.armor:<2}"), (" Cards left: ", f"{self.deck.remaining():<3}"),
+             ("  Totem: ", f"{self.totem_charges}"),
+             ("  Escape Rope: ", f"{self.escape_rope_charges}")],
+        ]
+        if self.show_odds:
+            value = self.current_card.value
+            rows.append([
+                ("Odds: Higher ", f"{self.deck.p_higher(value):.0%}"),
+                ("  Lower ", f"{self.deck.p_lower(value):.0%}"),
+                ("  Same ", f"{self.deck.p_equal(value):.0%}"),
+                ("  Jester ", f"{self.deck.p_jester():.0%}"),
+            ])
+        self.output().hud(rows)
 
     def display_card(self, card: Card, title: str = None):
         if title:
-            print(title)
-        for line in card.to_ascii_lines():
-            print(line)
-        print()
+            self.out(title)
+        for line in card.art:
+            self.out(line)
+        self.out()
 
     def display_two_cards(self, left: Card, right: Card,
                           left_title="Current room:", right_title="Next room:"):
-        left_lines = left.to_ascii_lines()
-        right_lines = right.to_ascii_lines()
+        left_lines = left.art
+        right_lines = right.art
 
-        print(left_title)
-        print(right_title.rjust(len(right_title) + 18))
-        print()
+        self.out(left_title)
+        self.out(right_title.rjust(len(right_title) + 18))
+        self.out()
 
         for l, r in zip(left_lines, right_lines):
-            print(l + "   " + r)
-        print()
+            self.out(l + "   " + r)
+        self.out()
 
     def display_jester_face(self):
-        art = [
-    "         /\\  \\",
-    "        /  \\/ \\",
-    "   ___  \\   O /  ___",
-    "  /    \\ \\   / /    \\",
-    " /   __ -    -  __   \\",
-    "/___/ | <>   <> | \\___\\",
-    "O  ___|    ^    |___  O",
-    " /     \\  -^-  /    \\",
-    "/   /\\  \\_____/ /\\   \\",
-    "\\_ / /          \\ \\_ /",
-    "O   /   /\\   /\\  \\  O",
-    "     \\ /  \\ /  \\ /",
-    "      O    O    O"
-        ]
-        for line in art:
-            print(line)
-        print()
+        for line in JESTER_FACE:
+            self.out(line)
+        self.out()
+
+    def display_summary(self):
+        self.out("=" * 40)
+        self.out("          DUNGEON RUN SUMMARY          ")
+        self.out("=" * 40)
+        self.out(f"Final HP: {self.hp}/{self.max_hp}")
+        self.out(f"Gold Collected: {self.gold}")
+        self.out(f"Final Score: {self.score}")
+        self.out(f"Best Streak: {self.best_streak}")
+        if self.outcome == "cleared":
+            self.out("You've conquered the dungeon deck! Well done adventurer!")
+        elif self.outcome == "dead":
+            self.out("Your journey ends here... but the dungeon awaits your return.")
+        else:
+            self.out("You turned back before uncovering all its secrets. Until next time...")
+        self.out("=" * 40)
+
+    # Event Rendering (the CLI is Just a View Over the Engine's Events)
+
+    def render_events(self, events):
+        # Pauses Sit Between a Resolved Room and the Start of the Next Turn
+        pause = None
+        for event in events:
+            if event.kind in ("turn", "jester_end") and pause:
+                self.pause(pause)
+                pause = None
+            elif event.kind == "death":
+                pause = None
+            pause = self.render_event(event) or pause
+        if pause:
+            self.pause(pause)
+
+    def pause(self, prompt: str):
+        self.out()
+        if self.policy is None:
+            self.ask(prompt)
+        self.out()
+
+    def render_event(self, event: Event):
+        kind = event.kind
+        if kind in EVENT_TEXT:
+            self.out(EVENT_TEXT[kind].format(**event.data))
+
+        elif kind == "room":
+            intro = ROOM_INTROS.get(event["variant"])
+            if intro:
+                self.out(intro)
+
+        elif kind == "room_result":
+            self.out(RESULT_TEXT[event["result"]])
+
+        elif kind == "reveal":
+            self.out()
+            self.display_two_cards(event["current"], event["card"])
+            self.out(f"You guessed: {'Higher' if event['guess'] == 'h' else 'Lower'}")
+            self.out(f"The next room was: {event['card'].rank} ({event['card'].value})")
+            return "Press Enter to continue to the next room!"
+
+        elif kind == "rope":
+            self.out()
+            self.display_two_cards(event["current"], event["card"],
+                                   left_title="Current Room:",
+                                   right_title="Next Room (skipped):")
+            self.out("Your Escape Rope activates! You flee this hostile room unscathed.")
+            return "Press Enter to continue..."
+
+        elif kind == "trap":
+            if event["armor_lost"]:
+                self.out("Equipment Room (Trap): Gears and blades launch from the walls!")
+                self.out(f"You take {event['damage']} damage and lose 1 armor.")
+            else:
+                self.out("Equipment Room (Trap): Hidden spikes shoot up from the floor!")
+                self.out(f"You take {event['damage']} damage.")
+
+        elif kind == "jester_start":
+            self.out()
+            self.out("You draw a strange card...")
+            self.display_card(event["card"], title="Jester Card:")
+            self.out("\n" + "=" * 40)
+            self.out("🃏  THE JESTER APPEARS!  🃏")
+            self.out("=" * 40)
+            self.display_jester_face()
+            self.out("The dungeon twists into a chaotic carnival.")
+            self.out(f"For the next {self.rules.jester_rounds} draws, you must predict at least "
+                     f"{self.rules.jester_wins_needed} correctly.")
+            self.out("Succeed, and you outwit the Jester. Fail, and he drains your life and gold.")
+            self.out()
+
+        elif kind == "jester_round":
+            self.out()
+            self.display_two_cards(
+                event["current"], event["card"],
+                left_title="Current card:",
+                right_title="Jester's draw:"
+            )
+            self.out(f"You guessed: {'Higher' if event['guess'] == 'h' else 'Lower'}")
+            self.out(f"Jester drew: {event['card'].rank}{event['card'].symbol}")
+            self.out(JESTER_RESULT_TEXT[event["result"]])
+            if event["turns_left"] > 0:
+                return "Press Enter for the next Jester draw..."
+
+        elif kind == "jester_end":
+            self.out("\n" + "-" * 40)
+            self.out("The Jester's game comes to an end...")
+            self.out(f"Correct predictions in his carnival: {event['correct']}/{self.rules.jester_rounds}")
+
+        elif kind == "jester_won":
+            self.out("You outplay the Jester! He claps slowly, then vanishes in smoke.")
+            self.out(f"You gain {event['gold']} gold, {event['score']} score, "
+                  f"and heal {event['healed']} HP.")
+            self.out("-" * 40 + "\n")
+
+        elif kind == "jester_lost":
+            self.out("The Jester cackles wildly as your luck runs dry.")
+            self.out(f"He steals {event['gold']} of your gold and rips away {event['hp']} HP!")
+            self.out("-" * 40 + "\n")
+
+        return None
 
     # Core Game Logic
 
@@ -229,141 +1147,105 @@ class DungeonDrawGame:
     # Suit Behaviour with Variants
 
     def handle_spades_enemy(self, correct: bool, value: int):
-        enemy_type = random.choice(["goblin", "slime", "warlock"])
+        enemy_type, slot = self.rules.roll(self.rng, "Spades", correct)
+        self.emit("room", suit="Spades", variant=enemy_type, correct=correct)
+        rules = self.rules
+        at = slot * 16 + value
+        damage = rules.damage_for(slot, value, self.hp, self.armor)
 
         if enemy_type == "goblin":
-            print("Enemy Room (Goblin): A sneaky goblin rushes you!")
+            self.take_damage(damage)
             if correct:
-                damage = max(0, value // 3 - self.armor)
-                loot = value // 2
-                self.take_damage(damage)
+                loot = rules.gold[at]
                 self.gold += loot
-                print(f"You stab first! You take {damage} damage and loot {loot} gold.")
+                self.emit("goblin", damage=damage, loot=loot)
             else:
-                damage = max(1, value - self.armor)
-                self.take_damage(damage)
-                print(f"The goblin slashes wildly! You take {damage} damage.")
+                self.emit("goblin_hit", damage=damage)
 
         elif enemy_type == "slime":
-            print("Enemy Room (Slime): A dripping slime oozes toward you.")
             # Immediate Damage is Small But Poisons
-            if correct:
-                damage = max(0, value // 4 - self.armor)
-                self.take_damage(damage)
-                # Light Poison
-                extra_turns = 2
-                poison_strength = max(1, value // 6)
-            else:
-                damage = max(1, value // 3 - self.armor)
-                self.take_damage(damage)
-                # Heavy Poison
-                extra_turns = 3
-                poison_strength = max(1, value // 4)
-
-            # Stack Poison
-            if self.poison_turns == 0:
-                self.poison_turns = extra_turns
-                self.poison_damage_per_turn = poison_strength
-            else:
-                self.poison_turns += extra_turns
-                self.poison_damage_per_turn = max(self.poison_damage_per_turn,
-                                                  poison_strength)
+            self.take_damage(damage)
+            extra_turns = rules.poison_turns[at]
+            poison_strength = rules.poison[at]
 
-            print(f"The slime's toxins melt into your wounds; you are poisoned "
-                  f"({self.poison_damage_per_turn} dmg for {self.poison_turns} turns).")
+            # Stacks by the Poison's Policy: More Turns, the Stronger Dose
+            poison = self.effects.apply("poison", poison_strength, extra_turns)
+            self.emit("slime", damage=damage, poison=poison.strength, turns=poison.turns)
 
         elif enemy_type == "warlock":
-            print("Enemy Room (Warlock): A corrupt warlock mutters a curse.")
-            if correct:
-                # Reduced curse if you guessed right
-                damage = max(3, (value // 2) + (self.hp // 20) - self.armor)
-            else:
-                damage = max(5, value + (self.hp // 10) - self.armor)
+            # The Curse Scales with Current HP (Reduced if you Guessed Right)
             self.take_damage(damage)
-            print(f"Dark magic drains your lifespan for {damage} damage.")
+            self.emit("warlock", damage=damage)
 
     def handle_hearts_heal(self, correct: bool, value: int):
-        heal_type = random.choice(["pure", "regen", "blessing"])
+        heal_type, slot = self.rules.roll(self.rng, "Hearts", correct)
+        self.emit("room", suit="Hearts", variant=heal_type, correct=correct)
+        rules = self.rules
+        at = slot * 16 + value
 
         if heal_type == "pure":
-            print("Rest Room (Pure Healing): A calm fountain restores you.")
-            if correct:
-                heal = value
-            else:
-                heal = max(1, value // 3)
-            old_hp = self.hp
-            self.hp = min(self.max_hp, self.hp + heal)
-            actual = self.hp - old_hp
-            print(f"You heal {actual} HP.")
+            actual = self.heal(rules.heal[at], source="pure")
+            self.emit("pure_heal", amount=actual)
 
         elif heal_type == "regen":
-            print("Rest Room (Regeneration): A green aura wraps around you.")
-            if correct:
-                turns = 3
-                per_turn = max(1, value // 4)
-            else:
-                turns = 2
-                per_turn = max(1, value // 6)
+            turns = rules.regen_turns[at]
+            per_turn = rules.regen[at]
 
-            if self.regen_turns == 0:
-                self.regen_turns = turns
-                self.regen_amount_per_turn = per_turn
-            else:
-                self.regen_turns += turns
-                self.regen_amount_per_turn = max(self.regen_amount_per_turn, per_turn)
-
-            print(f"You feel your body putting itself back together over time "
-                  f"({self.regen_amount_per_turn} HP for {self.regen_turns} turns).")
+            regen = self.effects.apply("regen", per_turn, turns)
+            self.emit("regen", per_turn=regen.strength, turns=regen.turns)
 
         elif heal_type == "blessing":
-            print("Rest Room (Blessing of Fortune): A radiant altar hums with power.")
-            if random.random() < 0.5:
+            if self.rng.random() < rules.chance[slot]:
                 # big immediate heal
-                heal = value * (2 if correct else 1)
-                old_hp = self.hp
-                self.hp = min(self.max_hp, self.hp + heal)
-                actual = self.hp - old_hp
-                print(f"You receive a surge of holy light, healing {actual} HP.")
+                actual = self.heal(rules.heal[at], source="blessing")
+                self.emit("blessing_heal", amount=actual)
             else:
                 # max HP boost
-                boost = 3 if correct else 1
+                boost = rules.boost[at]
                 self.max_hp += boost
                 self.hp += boost  # small top-up too
-                print(f"Your body is permanently strengthened! Max HP +{boost}.")
+                self.emit("blessing_boost", boost=boost)
 
-    def handle_clubs_utility(self, correct: bool, value: int):
+    def handle_diamonds_treasure(self, correct: bool, value: int):
+        variant, slot = self.rules.roll(self.rng, "Diamonds", correct)
+        self.emit("room", suit="Diamonds", variant=variant, correct=correct)
+        gold_gain = self.rules.gold[slot * 16 + value]
         if correct:
-            # You Safely Explore the Room and Find an Item
-            utility_type = random.choice(["totem", "escape", "stone"])
-            if utility_type == "totem":
-                if self.totem_charges == 0:
-                    self.totem_charges = 1
-                    print("Equipment Room: You find a Totem of Rebirth.")
-                    print("If you die, the totem will save you once.")
-                else:
-                    # Already Have One: Gain Armor Instead
-                    self.armor += 1
-                    print("You find another eerie totem, but its magic is unstable.")
-                    print("Instead, you reinforce your armor. Armor +1.")
-            elif utility_type == "escape":
-                self.escape_rope_charges += 1
-                print("Equipment Room: You find an Escape Rope.")
-                print("You can automatically skip the next hostile room once.")
-            elif utility_type == "stone":
-                self.armor += 1
-                print("Equipment Room: A Sharpening Stone lets you upgrade your gear.")
-                print("Your armor increases by 1.")
+            self.gold += gold_gain
+            self.emit("treasure", gold=gold_gain)
         else:
-            # Trap Outcome
-            damage = max(1, value // 2)
+            damage = self.rules.damage_for(slot, value, self.hp, self.armor)
             self.take_damage(damage)
-            if self.armor > 0 and random.random() < 0.5:
-                self.armor -= 1
-                print("Equipment Room (Trap): Gears and blades launch from the walls!")
-                print(f"You take {damage} damage and lose 1 armor.")
+            self.gold += gold_gain
+            self.emit("treasure_trap", damage=damage, gold=gold_gain)
+
+    def handle_clubs_utility(self, correct: bool, value: int):
+        # Right Guesses Find an Item, Wrong Ones Spring a Trap
+        utility_type, slot = self.rules.roll(self.rng, "Clubs", correct)
+        self.emit("room", suit="Clubs", variant=utility_type, correct=correct)
+        rules = self.rules
+        at = slot * 16 + value
+        if utility_type == "totem":
+            if self.totem_charges == 0:
+                self.totem_charges = rules.totem[at]
+                self.emit("totem_found")
             else:
-                print("Equipment Room (Trap): Hidden spikes shoot up from the floor!")
-                print(f"You take {damage} damage.")
+                # Already Have One: Gain Armor Instead
+                self.armor += rules.armor[at]
+                self.emit("totem_unstable", armor=rules.armor[at])
+        elif utility_type == "escape":
+            self.escape_rope_charges += rules.rope[at]
+            self.emit("escape_rope")
+        elif utility_type == "stone":
+            self.armor += rules.armor[at]
+            self.emit("sharpening_stone", armor=rules.armor[at])
+        elif utility_type == "trap":
+            damage = rules.damage_for(slot, value, self.hp, self.armor)
+            self.take_damage(damage)
+            armor_lost = self.armor > 0 and self.rng.random() < rules.chance[slot]
+            if armor_lost:
+                self.armor -= 1
+            self.emit("trap", damage=damage, armor_lost=armor_lost)
 
     def room_effect(self, result: str, card: Card):
         # Jester Cards are Handled Elsewhere
@@ -374,24 +1256,23 @@ class DungeonDrawGame:
         value = card.value
 
         # Base Result Messaging
+        self.emit("room_result", result=result)
         if result == 'equal':
-            self.score += 1
-            print("You navigate carefully through the room, but nothing major happens.")
+            self.score += self.rules.score_equal
             return
 
         if result == 'correct':
             self.streak += 1
             self.best_streak = max(self.best_streak, self.streak)
-            self.score += 10 + value // 2
-            print("Your senses were right; you've successfully navigated the room!")
+            self.score += self.rules.score_correct[value]
             correct = True
         else:
             self.streak = 0
-            self.score = max(0, self.score - 5)
-            print("You misjudged the room's danger and suffered the consequences!")
+            self.score = max(0, self.score - self.rules.score_incorrect)
             correct = False
 
-        # Suit Specific Logic
+        # Suit Specific Logic; Rolls Come from this Card's Place in the Deck
+        self.rng.seek(self.deck.cursor * ROLLS_PER_CARD)
         if suit == "Spades":
             self.handle_spades_enemy(correct, value)
 
@@ -399,231 +1280,374 @@ class DungeonDrawGame:
             self.handle_hearts_heal(correct, value)
 
         elif suit == "Diamonds":
-            if correct:
-                gold_gain = value * 2
-                self.gold += gold_gain
-                print("Treasure Room: You find a chest filled to the brim with gold!")
-                print(f"You gain {gold_gain} gold.")
-            else:
-                damage = max(1, value // 2)
-                gold_gain = value // 2
-                self.take_damage(damage)
-                self.gold += gold_gain
-                print("Treasure Room: A trap triggers as you open the chest!")
-                print(f"You take {damage} damage and only get {gold_gain} gold.")
+            self.handle_diamonds_treasure(correct, value)
 
         elif suit == "Clubs":
             self.handle_clubs_utility(correct, value)
 
     # Jester Boss Logic
 
-    def start_jester_fight(self):
+    def start_jester_fight(self, card: Card):
         self.in_jester_fight = True
-        self.jester_turns_left = 5
+        self.jester_turns_left = self.rules.jester_rounds
         self.jester_correct = 0
+        self.emit("jester_start", card=card)
 
-        print("\n" + "=" * 40)
-        print("🃏  THE JESTER APPEARS!  🃏")
-        print("=" * 40)
-        self.display_jester_face()
-        print("The dungeon twists into a chaotic carnival.")
-        print("For the next 5 draws, you must predict at least 3 correctly.")
-        print("Succeed, and you outwit the Jester. Fail, and he drains your life and gold.")
-        print()
+        # A Jester on the Last Card Leaves Nothing to Predict
+        if self.deck.remaining() == 0:
+            self.end_jester_fight()
 
+    def jester_round(self, guess: str):
         previous_card = self.current_card
+        next_card = self.deck.draw()
 
-        while (
-            self.jester_turns_left > 0
-            and self.hp > 0
-            and self.deck.remaining() > 0
-        ):
-            self.apply_over_time_effects()
-            if self.hp <= 0:
-                break
+        result = self.check_guess(guess, previous_card, next_card)
+        if result == 'correct':
+            self.jester_correct += 1
+        self.jester_turns_left -= 1
+        self.current_card = next_card
+        self.emit("jester_round", current=previous_card, card=next_card, guess=guess,
+                  result=result, correct=self.jester_correct,
+                  turns_left=self.jester_turns_left)
 
-            self.display_hud()
-            self.display_card(previous_card, title="Jester's current card:")
+        if self.jester_turns_left == 0 or self.deck.remaining() == 0:
+            self.end_jester_fight()
 
-            guess = None
-            while True:
-                raw = input("Jester draw: Higher (H) or Lower (L)? (H/L): ").strip().lower()
-                if raw in ('h', 'l'):
-                    guess = raw
-                    break
-                print("Invalid input. Please enter H or L.")
+    def end_jester_fight(self):
+        self.emit("jester_end", correct=self.jester_correct)
 
-            next_card = self.deck.draw()
-            if next_card is None:
-                print("The Jester's carnival collapses suddenly the deck is empty!")
-                break
+        rules = self.rules
+        if self.jester_correct >= rules.jester_wins_needed:
+            bonus_gold = rules.jester_win_gold
+            bonus_score = rules.jester_win_score
+            bonus_heal = rules.jester_win_heal
+            self.gold += bonus_gold
+            self.score += bonus_score
+            healed = self.heal(bonus_heal, source="jester")
+            self.emit("jester_won", gold=bonus_gold, score=bonus_score, healed=healed)
+        else:
+            hp_loss = rules.jester_loss_hp
+            gold_loss = rules.jester_loss_gold
+            self.take_damage(hp_loss, source="jester")
+            self.gold = max(0, self.gold - gold_loss)
+            self.emit("jester_lost", gold=gold_loss, hp=hp_loss)
 
-            print()
-            self.display_two_cards(
-                previous_card, next_card,
-                left_title="Current card:",
-                right_title="Jester's draw:"
-            )
+        self.in_jester_fight = False
 
-            result = self.check_guess(guess, previous_card, next_card)
-            print(f"You guessed: {'Higher' if guess == 'h' else 'Lower'}")
-            print(f"Jester drew: {next_card.rank}{next_card.symbol}")
+    # Turn Resolution (the Headless Engine)
+
+    def step(self, action: str) -> list:
+        if action not in self.legal_actions():
+            raise ValueError(f"Illegal action {action!r}; expected one of {self.legal_actions()}")
+        self.events = []
+        self.actions.append(action)
+        self.advance(action)
+        return self.events
+
+    def advance(self, action: str):
+        # A Turn Without step()'s Legality Check or Logs, for Callers that Already Know
+        # the Action is Legal (Replay Verification Checks its Own)
+        self.turns += 1
+        if self.in_jester_fight:
+            self.jester_round(action)
+        else:
+            self.take_turn(action)
+
+        if self.hp <= 0:
+            self.finish("dead")
+        elif self.deck.remaining() == 0:
+            self.finish("cleared")
+        elif not self.over:
+            self.begin_turn()
+
+    def use_escape_rope(self, next_card: Card) -> bool:
+        # Escape Rope Logic: Skip 1 Hostile Room
+        if self.escape_rope_charges > 0 and next_card.suit in ("Spades", "Clubs"):
+            self.escape_rope_charges -= 1
+            self.emit("rope", current=self.current_card, card=next_card)
+            # You Move into the Next Room Safely
+            self.current_card = next_card
+            return True
+        return False
 
-            if result == 'correct':
-                self.jester_correct += 1
-                print("You read his games correctly. The Jester snarls.")
-            elif result == 'incorrect':
-                print("Your prediction fails. The Jester laughs at your misfortune.")
-            else:
-                print("Equal value the Jester tilts his head, amused but unimpressed.")
+    def take_turn(self, guess: str):
+        if guess == 'q':
+            self.emit("quit")
+            self.finish("quit")
+            return
 
-            self.jester_turns_left -= 1
-            previous_card = next_card
+        next_card = self.deck.draw()
 
-            if self.jester_turns_left > 0 and self.hp > 0:
-                print()
-                input("Press Enter for the next Jester draw...")
-                print()
+        if self.use_escape_rope(next_card):
+            return
 
-        self.current_card = previous_card
-        self.end_jester_fight()
+        # Jester Boss Trigger
+        if next_card.suit == JESTER_SUIT:
+            self.start_jester_fight(next_card)
+            return
 
-    def end_jester_fight(self):
-        print("\n" + "-" * 40)
-        print("The Jester's game comes to an end...")
-        print(f"Correct predictions in his carnival: {self.jester_correct}/5")
-
-        if self.jester_correct >= 3:
-            bonus_gold = 30
-            bonus_score = 20
-            bonus_heal = 5
-            self.gold += bonus_gold
-            self.score += bonus_score
-            old_hp = self.hp
-            self.hp = min(self.max_hp, self.hp + bonus_heal)
-            healed = self.hp - old_hp
+        result = self.check_guess(guess, self.current_card, next_card)
+        self.emit("reveal", current=self.current_card, card=next_card, guess=guess,
+                  result=result)
 
-            print("You outplay the Jester! He claps slowly, then vanishes in smoke.")
-            print(f"You gain {bonus_gold} gold, {bonus_score} score, and heal {healed} HP.")
-        else:
-            hp_loss = 15
-            gold_loss = 20
-            self.take_damage(hp_loss)
-            self.gold = max(0, self.gold - gold_loss)
+        self.room_effect(result, next_card)
 
-            print("The Jester cackles wildly as your luck runs dry.")
-            print(f"He steals {gold_loss} of your gold and rips away {hp_loss} HP!")
+        if self.hp <= 0:
+            self.emit("death")
+            return
 
-        self.in_jester_fight = False
-        print("-" * 40 + "\n")
+        self.current_card = next_card
 
-    # Main Gameplay Loop
+    def begin_turn(self):
+        # Over Time Effects at the Start of Every Turn (Jester Rounds Included)
+        self.emit("turn", turn=self.turns)
+        self.apply_over_time_effects()
+        if self.hp <= 0:
+            if self.in_jester_fight:
+                self.end_jester_fight()
+            self.finish("dead")
 
-    def play(self):
-        self.display_title()
-        print("You descend into the dungeon, ready to face its challenges.")
-        print("Predict whether the card in the next room is HIGHER or LOWER in power than the current one!")
-        print("H = Higher; L = Lower; Q = Quit")
-        print()
-
-        while self.hp > 0 and self.deck.remaining() > 0:
-            # Over Time Effects at the Start of Turn
-            self.apply_over_time_effects()
-            if self.hp <= 0:
-                break
+    def finish(self, outcome: str):
+        if self.over:
+            return
+        self.over = True
+        self.outcome = outcome
+        self.emit("game_over", outcome=outcome)
 
-            self.display_hud()
-            self.display_card(self.current_card, title="Current Room:")
+    # Main Gameplay Loop
 
-            # Take in the Player's Guess
-            guess = None
+    def prompt_guess(self) -> str:
+        if self.in_jester_fight:
             while True:
-                raw = input(
-                    "Will the next room's card be Higher (H) or Lower (L)? (H/L/Q): "
-                ).strip().lower()
-                if raw in ['h', 'l', 'q']:
-                    guess = raw
-                    break
-                print("Invalid input. Please enter H, L, or Q.")
-
-            if guess == 'q':
-                print("You choose to leave the dungeon early.")
-                break
-
-            next_card = self.deck.draw()
-            if next_card is None:
-                print("The dungeon collapses behind you as there are no more rooms left!")
-                break
-
-            # Escape Rope Logic: Skip 1 Hostile Room
-            if self.escape_rope_charges > 0 and next_card.suit in ("Spades", "Clubs"):
-                print()
-                self.display_two_cards(self.current_card, next_card,
-                                       left_title="Current Room:",
-                                       right_title="Next Room (skipped):")
-                print("Your Escape Rope activates! You flee this hostile room unscathed.")
-                self.escape_rope_charges -= 1
-                # You Move into the Next Room Safely
-                self.current_card = next_card
-                print()
-                input("Press Enter to continue...")
-                print()
-                continue
-
-            # Jester Boss Trigger
-            if next_card.suit == JESTER_SUIT:
-                print()
-                print("You draw a strange card...")
-                self.display_card(next_card, title="Jester Card:")
-                self.start_jester_fight()
-                if self.hp <= 0:
-                    break
-                continue
-
-            result = self.check_guess(guess, self.current_card, next_card)
+                raw = self.ask("Jester draw: Higher (H) or Lower (L)? (H/L): ").strip().lower()
+                if raw in ('h', 'l'):
+                    return raw
+                self.out("Invalid input. Please enter H or L.")
 
-            print()
-            self.display_two_cards(self.current_card, next_card)
-            print(f"You guessed: {'Higher' if guess == 'h' else 'Lower'}")
-            print(f"The next room was: {next_card.rank} ({next_card.value})")
+        while True:
+            raw = self.ask(
+                "Will the next room's card be Higher (H) or Lower (L)? (H/L/Q): "
+            ).strip().lower()
+            if raw in ['h', 'l', 'q']:
+                return raw
+            self.out("Invalid input. Please enter H, L, or Q.")
 
-            self.room_effect(result, next_card)
+    def play(self):
+        self.display_title()
+        self.out("You descend into the dungeon, ready to face its challenges.")
+        self.out("Predict whether the card in the next room is HIGHER or LOWER in power than the current one!")
+        self.out("H = Higher; L = Lower; Q = Quit")
+        self.out()
 
-            if self.hp <= 0:
-                print()
-                print("You have succumbed to the dangers of the dungeon... it claims yet another soul.")
-                break
+        while not self.over:
+            self.display_hud()
+            if self.in_jester_fight:
+                self.display_card(self.current_card, title="Jester's current card:")
+            else:
+                self.display_card(self.current_card, title="Current Room:")
 
-            self.current_card = next_card
-            print()
-            input("Press Enter to continue to the next room!")
-            print()
+            # Take in the Player's Guess (or the Policy's)
+            if self.policy is not None:
+                guess = self.policy(self)
+                self.out(f"{self.policy.name} guesses {guess.upper()}")
+            else:
+                if self.hints is not None:
+                    # The Room Goes Out First; the Hint Follows Within its Budget
+                    self.flush()
+                    self.out(self.hints.hint(self).describe())
+                guess = self.prompt_guess()
+            self.render_events(self.step(guess))
+            self.flush()
 
         # End of Game Summary
-        print("=" * 40)
-        print("          DUNGEON RUN SUMMARY          ")
-        print("=" * 40)
-        print(f"Final HP: {self.hp}/{self.max_hp}")
-        print(f"Gold Collected: {self.gold}")
-        print(f"Final Score: {self.score}")
-        print(f"Best Streak: {self.best_streak}")
-        if self.hp > 0 and self.deck.remaining() == 0:
-            print("You've conquered the dungeon deck! Well done adventurer!")
-        elif self.hp <= 0:
-            print("Your journey ends here... but the dungeon awaits your return.")
+        self.display_summary()
+        self.flush()
+
+
+def step(state: DungeonDrawGame, action: str):
+    # Functional Entry Point: Advance a Game by One Decision
+    events = state.step(action)
+    return state, events
+
+
+# Batch Mode: Scripted Decisions, No Prompts or Narration
+
+def parse_batch(text: str) -> list:
+    # One Game per Line: an Optional seed=N, then H/L/Q Decisions (Spaces and Commas
+    # Ignored, # Starts a Comment). Returns (line number, seed or None, decisions)
+    games = []
+    for number, line in enumerate(text.splitlines(), start=1):
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        seed = None
+        if line.lower().startswith("seed="):
+            head, _, line = line.partition(" ")
+            try:
+                seed = int(head[5:])
+            except ValueError:
+                raise ValueError(f"line {number}: bad seed {head!r}") from None
+        actions = line.lower().replace(" ", "").replace(",", "").replace("\t", "")
+        bad = set(actions) - set("hlq")
+        if bad:
+            raise ValueError(f"line {number}: unexpected {''.join(sorted(bad))!r}; "
+                             f"decisions are H, L or Q")
+        games.append((number, seed, actions))
+    return games
+
+
+def result_line(number: int, game: DungeonDrawGame) -> str:
+    return (f"game {number} seed={game.seed} {game.outcome or 'unfinished'} turns={game.turns} "
+            f"hp={game.hp}/{game.max_hp} gold={game.gold} score={game.score} "
+            f"best_streak={game.best_streak}")
+
+
+def run_batch(games: list, args, rules: RuleTables = None, policy=None) -> int:
+    # Plays Every Scripted Game Headless, One After the Other in this Process; a Policy
+    # (--bot) Finishes Games Whose Decisions Run Out. Returns the Number of Games Played
+    root_seed = args.seed
+    board = None
+    if args.scores:
+        from dungeon_scores import Leaderboard
+        board = Leaderboard(args.scores)
+    if root_seed is not None:
+        from dungeon_sim import game_seed
+    renderer = FrameRenderer()
+    try:
+        for number, (line, seed, actions) in enumerate(games, start=1):
+            if seed is None and root_seed is not None:
+                seed = game_seed(root_seed, number - 1)
+            game = DungeonDrawGame(seed=seed, profile=False, rules=rules, deck=args.deck)
+            game.record_events = False
+            for index, action in enumerate(actions, start=1):
+                if game.over:
+                    break
+                if action not in game.legal_actions():
+                    raise ValueError(f"line {line}: {action.upper()} isn't allowed at decision "
+                                     f"{index} (expected one of "
+                                     f"{'/'.join(game.legal_actions()).upper()})")
+                game.step(action)
+            while policy is not None and not game.over:
+                game.step(policy(game))
+
+            if args.summary and game.over:
+                game.renderer = renderer
+                game.display_summary()
+            else:
+                renderer.line(result_line(number, game))
+            if game.over:
+                if args.record:
+                    from dungeon_replay import append_replay
+                    append_replay(args.record, game)
+                if board is not None:
+                    board.record(game, args.player)
+        renderer.flush()
+    finally:
+        if board is not None:
+            board.close()
+    return len(games)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play Dungeon Draw in the terminal.")
+    parser.add_argument("--odds", action="store_true",
+                        help="show the odds of the next card in the HUD")
+    parser.add_argument("--diff-hud", action="store_true",
+                        help="pin the HUD to the top and only redraw fields that change")
+    parser.add_argument("--record", metavar="PATH",
+                        help="append a compact replay of every game to PATH")
+    parser.add_argument("--scores", metavar="PATH",
+                        help="add every finished game to the leaderboard at PATH")
+    parser.add_argument("--player", default=os.environ.get("USER", "player"),
+                        help="name to put on the leaderboard")
+    parser.add_argument("--rules", metavar="PATH",
+                        help="play with the balance numbers from a rules file")
+    parser.add_argument("--deck", metavar="SPEC", type=DeckSpec.parse,
+                        help="long dungeon deck, e.g. decks=4,jesters=8,Spades=2,ranks=5-A")
+    parser.add_argument("--bot", metavar="POLICY",
+                        help="let a policy play, e.g. midpoint, counting, random or solver:2")
+    parser.add_argument("--hint", action="store_true",
+                        help="suggest a guess at every prompt from Monte Carlo rollouts")
+    parser.add_argument("--hint-budget", type=float, default=50.0, metavar="MS",
+                        help="milliseconds each hint may take (default: 50)")
+    parser.add_argument("--hint-workers", type=int, default=None,
+                        help="rollout worker processes (default: all cores)")
+    parser.add_argument("--batch", metavar="FILE", nargs="?", const="-",
+                        help="play scripted games from FILE (or stdin): one game per line of "
+                             "H/L/Q decisions, optionally starting with seed=N; no prompts "
+                             "or narration, one result line per game")
+    parser.add_argument("--summary", action="store_true",
+                        help="with --batch, print the full run summary instead of one line")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="root seed: game N gets its own seed derived from it")
+    parser.add_argument("--profile", choices=("json", "prometheus"),
+                        help="time each phase and print the totals to stderr after every game")
+    args = parser.parse_args(argv)
+    if args.rules and (args.record or args.scores):
+        parser.error("--record and --scores only work with the default rules "
+                     "(replays and leaderboard entries don't carry a rule set)")
+    if args.record and args.deck is not None and args.deck.codes() != STANDARD_CODES:
+        parser.error("--record only works with the standard deck")
+
+    renderer = FrameRenderer(diff=args.diff_hud)
+    profiler = Profiler() if args.profile else None
+    rules = load_rules(args.rules) if args.rules else None
+    if args.bot:
+        from dungeon_policy import make_policy
+        policy = make_policy(args.bot)
+    if args.batch:
+        if args.batch == "-":
+            text = sys.stdin.read()
         else:
-            print("You turned back before uncovering all its secrets. Until next time...")
-        print("=" * 40)
-
-
-def main():
-    while True:
-        game = DungeonDrawGame()
-        game.play()
-        choice = input("Play Again? (y/n): ").strip().lower()
-        if choice != 'y':
-            print("Thanks For Playing Dungeon Draw!")
-            break
+            with open(args.batch) as handle:
+                text = handle.read()
+        try:
+            run_batch(parse_batch(text), args, rules, policy if args.bot else None)
+        except ValueError as error:
+            parser.exit(2, f"{parser.prog}: error: {error}\n")
+        return
+    hints = None
+    if args.hint:
+        from dungeon_hint import HintEngine
+        hints = HintEngine(args.hint_budget / 1000, args.hint_workers)
+    if args.seed is not None:
+        from dungeon_sim import game_seed
+    played = 0
+    try:
+        while True:
+            seed = None if args.seed is None else game_seed(args.seed, played)
+            played += 1
+            game = DungeonDrawGame(seed=seed, profile=False if profiler else None, rules=rules,
+                                   deck=args.deck)
+            if profiler:
+                game.enable_profiling(profiler)
+            game.show_odds = args.odds
+            game.renderer = renderer
+            if args.bot:
+                game.policy = policy
+            game.hints = hints
+            game.play()
+            if game.profiler:
+                report = game.profiler.to_prometheus() if args.profile == "prometheus" \
+                    else game.profiler.to_json()
+                print(report, file=sys.stderr)
+            if args.record:
+                from dungeon_replay import append_replay
+                append_replay(args.record, game)
+            if args.scores:
+                from dungeon_scores import Leaderboard
+                board = Leaderboard(args.scores)
+                board.record(game, args.player)
+                print(f"Leaderboard: rank #{board.rank(game.score)} of {len(board)}")
+                board.close()
+            choice = input("Play Again? (y/n): ").strip().lower()
+            if choice != 'y':
+                print("Thanks For Playing Dungeon Draw!")
+                break
+    finally:
+        renderer.close()
+        if hints is not None:
+            hints.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,219 @@
+import struct
+from bisect import insort
+
+
+# Stacking Policies: How a New Dose Combines with the Same Effect Already Running
+EXTEND = "extend"     # Add the Turns, Keep the Stronger Dose (Poison and Regen)
+REFRESH = "refresh"   # Keep the Longer of the Two Durations and the Stronger Dose
+REPLACE = "replace"   # The New Dose Overwrites the Old One
+ADD = "add"           # Doses Add Up, the Longer Duration Stays
+STACKING = (EXTEND, REFRESH, REPLACE, ADD)
+
+# Snapshot Layout: an Effect Count, Then per Effect its Name Length, Name (ASCII),
+# Strength and Turns Left, in Tick Order
+COUNT = struct.Struct("<B")
+ENTRY = struct.Struct("<HH")
+
+
+class EffectKind:
+    # A Timed Effect: Heals or Hurts `strength` HP at the Start of Every Turn for
+    # `turns` Turns. Lower Priorities Tick First, and Hurting Effects Always Tick
+    # Before Healing Ones (Which the Closed-Form Fast-Forward Relies On)
+    __slots__ = ("name", "heals", "priority", "stacking", "tick_event", "fade_event")
+
+    def __init__(self, name: str, heals: bool, priority: int, stacking: str = EXTEND,
+                 tick_event: str = None, fade_event: str = None):
+        if stacking not in STACKING:
+            raise ValueError(f"Unknown stacking policy {stacking!r}; expected one of "
+                             f"{', '.join(STACKING)}")
+        self.name = name
+        self.heals = heals
+        self.priority = priority + (1000 if heals else 0)
+        self.stacking = stacking
+        self.tick_event = tick_event or f"{name}_tick"
+        self.fade_event = fade_event or f"{name}_fade"
+
+    def __repr__(self) -> str:
+        return f"EffectKind({self.name!r}, {'heals' if self.heals else 'hurts'}, {self.stacking})"
+
+
+EFFECT_KINDS = {
+    "poison": EffectKind("poison", heals=False, priority=0),
+    "regen": EffectKind("regen", heals=True, priority=0),
+}
+
+
+def register_effect(kind: EffectKind) -> EffectKind:
+    EFFECT_KINDS[kind.name] = kind
+    return kind
+
+
+class Effect:
+    __slots__ = ("kind", "strength", "turns")
+
+    def __init__(self, kind: EffectKind, strength: int = 0, turns: int = 0):
+        self.kind = kind
+        self.strength = strength
+        self.turns = turns
+
+    def __lt__(self, other: "Effect") -> bool:
+        return self.kind.priority < other.kind.priority
+
+    def __repr__(self) -> str:
+        return f"Effect({self.kind.name!r}, strength={self.strength}, turns={self.turns})"
+
+
+class Timeline:
+    # The Effects Running on a Player, Kept in Tick Order. An Effect with No Strength
+    # Never Ticks (So Never Runs Out) Until a Stronger Dose Stacks onto it
+    __slots__ = ("active",)
+
+    def __init__(self):
+        self.active = []
+
+    def __bool__(self) -> bool:
+        return bool(self.active)
+
+    def __repr__(self) -> str:
+        return f"Timeline({self.active!r})"
+
+    def get(self, name: str) -> Effect:
+        for effect in self.active:
+            if effect.kind.name == name:
+                return effect
+        return None
+
+    def add(self, kind: EffectKind, strength: int = 0, turns: int = 0) -> Effect:
+        effect = Effect(kind, strength, turns)
+        insort(self.active, effect)
+        return effect
+
+    def drop(self, effect: Effect):
+        self.active.remove(effect)
+
+    def apply(self, name: str, strength: int, turns: int) -> Effect:
+        # A New Dose, Combined with a Running One by the Effect's Stacking Policy
+        kind = EFFECT_KINDS[name]
+        effect = self.get(name)
+        if effect is None or effect.turns == 0:
+            if effect is None:
+                effect = self.add(kind)
+            effect.strength, effect.turns = strength, turns
+        elif kind.stacking == EXTEND:
+            effect.turns += turns
+            effect.strength = max(effect.strength, strength)
+        elif kind.stacking == REFRESH:
+            effect.turns = max(effect.turns, turns)
+            effect.strength = max(effect.strength, strength)
+        elif kind.stacking == REPLACE:
+            effect.strength, effect.turns = strength, turns
+        else:
+            effect.strength += strength
+            effect.turns = max(effect.turns, turns)
+        return effect
+
+    def field(self, name: str, field: str) -> int:
+        effect = self.get(name)
+        return getattr(effect, field) if effect is not None else 0
+
+    def to_bytes(self) -> bytes:
+        parts = [COUNT.pack(len(self.active))]
+        for effect in self.active:
+            name = effect.kind.name.encode("ascii")
+            parts += [COUNT.pack(len(name)), name, ENTRY.pack(effect.strength, effect.turns)]
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, blob: bytes, offset: int = 0) -> tuple:
+        # Returns (Timeline, Offset Past it). Effects Go Back in Stored Order, so Ones
+        # Sharing a Priority Still Tick in the Order they Did
+        timeline = cls()
+        try:
+            (count,) = COUNT.unpack_from(blob, offset)
+            offset += COUNT.size
+            for _ in range(count):
+                (size,) = COUNT.unpack_from(blob, offset)
+                name = bytes(blob[offset + COUNT.size:offset + COUNT.size + size]).decode("ascii")
+                offset += COUNT.size + size
+                strength, turns = ENTRY.unpack_from(blob, offset)
+                offset += ENTRY.size
+                if name not in EFFECT_KINDS:
+                    raise ValueError(f"Snapshot holds unknown effect {name!r}")
+                timeline.active.append(Effect(EFFECT_KINDS[name], strength, turns))
+        except (struct.error, UnicodeDecodeError):
+            raise ValueError("Snapshot timeline is cut short or corrupt") from None
+        return timeline, offset
+
+    def set_field(self, name: str, field: str, value: int):
+        effect = self.get(name)
+        if effect is None:
+            if not value:
+                return
+            effect = self.add(EFFECT_KINDS[name])
+        setattr(effect, field, value)
+        if not effect.strength and not effect.turns:
+            self.drop(effect)
+
+    # Ticking
+
+    def tick(self, game):
+        # One Turn: Every Effect in Order, Each Only While the Player Still Stands
+        for effect in list(self.active):
+            if effect.turns <= 0 or effect.strength <= 0 or game.hp <= 0:
+                continue
+            kind = effect.kind
+            if kind.heals:
+                actual = game.heal(effect.strength, source=kind.name)
+                game.emit(kind.tick_event, amount=actual)
+            else:
+                game.emit(kind.tick_event, amount=effect.strength)
+                game.take_damage(effect.strength, source=kind.name)
+            effect.turns -= 1
+            if effect.turns == 0:
+                self.drop(effect)
+                game.emit(kind.fade_event)
+
+    def fast_forward(self, game, turns: int) -> tuple:
+        # Advances `turns` Turns Without Ticking Each One: While the Set of Running
+        # Effects Holds, a Turn is "Lose `hurt`, then Gain `heal` up to Max HP", so HP
+        # Moves in a Straight Line to the Cap or to the Turn it Would Drop to 0. Only
+        # that Turn (Where a Totem May Step In) is Ticked for Real. Returns the Net HP
+        # Change and the Turn the Player Died on (None if They Didn't). Events are Only
+        # Emitted for Turns that Get Ticked
+        start_hp = game.hp
+        done = 0
+        while done < turns and game.hp > 0:
+            live = [effect for effect in self.active if effect.turns > 0 and effect.strength > 0]
+            if not live:
+                break
+            span = min(turns - done, min(effect.turns for effect in live))
+            hurt = sum(effect.strength for effect in live if not effect.kind.heals)
+            heal = sum(effect.strength for effect in live if effect.kind.heals)
+            hp, max_hp = game.hp, game.max_hp
+
+            # First Turn of the Span on Which the Hurting Takes HP to 0
+            if hurt == 0:
+                lethal = None
+            elif hp <= hurt:
+                lethal = 1
+            elif heal >= hurt:
+                lethal = None
+            else:
+                lethal = -(-(hp - hurt) // (hurt - heal)) + 1
+            quiet = span if lethal is None or lethal > span else lethal - 1
+
+            if quiet:
+                # Rising HP Stops at the Cap; Falling HP Never Reaches it Again
+                game.hp = min(max_hp, hp + quiet * (heal - hurt))
+                for effect in live:
+                    effect.turns -= quiet
+                    if effect.turns == 0:
+                        self.drop(effect)
+                        game.emit(effect.kind.fade_event)
+                done += quiet
+            if quiet < span:
+                self.tick(game)
+                done += 1
+
+        death = done if game.hp <= 0 else None
+        return game.hp - start_hp, death
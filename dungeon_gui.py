@@ -0,0 +1,672 @@
+import argparse
+import os
+import sys
+import time
+from collections import deque
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+import pygame
+
+from dungeon_draw import (CARDS_BY_CODE, EVENT_TEXT, JESTER_FACE, JESTER_RESULT_TEXT,
+                          JESTER_SUIT, RESULT_TEXT, ROOM_INTROS, DeckSpec, DungeonDrawGame)
+
+
+# Layout (Pixels)
+WIDTH, HEIGHT = 640, 480
+CARD_W, CARD_H = 120, 170
+MARGIN = 12
+LINE = 20
+LOG_LINES = 6
+DEFAULT_FPS = 60
+REVEAL_MS = 450
+
+# Colours
+BACKGROUND = (24, 26, 34)
+PANEL = (34, 37, 48)
+TEXT = (226, 228, 235)
+DIM = (140, 145, 160)
+ACCENT = (240, 196, 92)
+RED = (200, 40, 48)
+BLACK = (28, 28, 32)
+JESTER_PURPLE = (120, 60, 170)
+CARD_FACE = (246, 244, 236)
+
+# Atlas Keys Beyond the Card Codes
+FACE = -1
+BACK = -2
+
+GUESS_NAMES = {'h': "Higher", 'l': "Lower", 'q': "Quit"}
+
+
+# Card Art
+
+def draw_suit(surface, suit: str, center: tuple, size: float, color: tuple):
+    # Suits are Drawn as Shapes: the Default Font has No Suit Glyphs
+    cx, cy = center
+    s = size
+
+    def point(dx: float, dy: float) -> tuple:
+        return round(cx + dx * s), round(cy + dy * s)
+
+    radius = max(1, round(s * 0.5))
+    if suit == "Diamonds":
+        pygame.draw.polygon(surface, color, [point(0, -1), point(0.7, 0), point(0, 1), point(-0.7, 0)])
+    elif suit == "Hearts":
+        pygame.draw.circle(surface, color, point(-0.48, -0.3), radius)
+        pygame.draw.circle(surface, color, point(0.48, -0.3), radius)
+        pygame.draw.polygon(surface, color, [point(-0.97, -0.12), point(0.97, -0.12), point(0, 1)])
+    elif suit == "Spades":
+        pygame.draw.circle(surface, color, point(-0.48, 0.2), radius)
+        pygame.draw.circle(surface, color, point(0.48, 0.2), radius)
+        pygame.draw.polygon(surface, color, [point(-0.97, 0.05), point(0.97, 0.05), point(0, -1)])
+        pygame.draw.polygon(surface, color, [point(0, 0.3), point(-0.35, 1), point(0.35, 1)])
+    elif suit == "Clubs":
+        small = max(1, round(s * 0.42))
+        pygame.draw.circle(surface, color, point(0, -0.5), small)
+        pygame.draw.circle(surface, color, point(-0.5, 0.12), small)
+        pygame.draw.circle(surface, color, point(0.5, 0.12), small)
+        pygame.draw.polygon(surface, color, [point(0, 0), point(-0.35, 1), point(0.35, 1)])
+
+
+def suit_color(suit: str) -> tuple:
+    if suit == JESTER_SUIT:
+        return JESTER_PURPLE
+    return RED if suit in ("Hearts", "Diamonds") else BLACK
+
+
+# Strokes for the Characters the Jester's Face Uses, in a Unit Cell (Glyphs from the
+# Default Font Wash Out at this Size; Lines Stay Crisp)
+STROKES = {
+    "/": [((1, 0), (0, 1))],
+    "\\": [((0, 0), (1, 1))],
+    "_": [((0, 1), (1, 1))],
+    "-": [((0.1, 0.5), (0.9, 0.5))],
+    "|": [((0.5, 0), (0.5, 1))],
+    "^": [((0.1, 0.7), (0.5, 0.2)), ((0.5, 0.2), (0.9, 0.7))],
+    "<": [((0.9, 0.2), (0.1, 0.5)), ((0.1, 0.5), (0.9, 0.8))],
+    ">": [((0.1, 0.2), (0.9, 0.5)), ((0.9, 0.5), (0.1, 0.8))],
+}
+
+
+def draw_ascii(lines, cell: tuple, color: tuple, width: int = 2) -> "pygame.Surface":
+    # One Character per Grid Cell, Drawn as Strokes (an "O" is a Ring)
+    cell_w, cell_h = cell
+    columns = max(len(line) for line in lines)
+    surface = pygame.Surface((columns * cell_w, len(lines) * cell_h), pygame.SRCALPHA)
+    for row, line in enumerate(lines):
+        for column, char in enumerate(line):
+            x, y = column * cell_w, row * cell_h
+            if char == "O":
+                radius = min(cell_w, cell_h) // 2
+                pygame.draw.circle(surface, color, (x + cell_w // 2, y + cell_h // 2), radius, width)
+            for (x1, y1), (x2, y2) in STROKES.get(char, ()):
+                pygame.draw.line(surface, color, (x + x1 * cell_w, y + y1 * cell_h),
+                                 (x + x2 * cell_w, y + y2 * cell_h), width)
+    return surface
+
+
+class CardAtlas:
+    # Every Card Face, the Jester's Face and a Card Back, Drawn Once at Startup into
+    # One Surface; Putting a Card on Screen is Then a Single Rectangle Copy
+    def __init__(self, size: tuple = (CARD_W, CARD_H)):
+        self.size = width, height = size
+        keys = [card.code for card in CARDS_BY_CODE if card is not None] + [FACE, BACK]
+        columns = 13
+        rows = -(-len(keys) // columns)
+        self.surface = pygame.Surface((columns * width, rows * height), pygame.SRCALPHA)
+        self.rects = {}
+        self.rank_font = pygame.font.Font(None, round(height * 0.2))
+        self.small_font = pygame.font.Font(None, round(height * 0.12))
+        for index, key in enumerate(keys):
+            rect = pygame.Rect((index % columns) * width, (index // columns) * height, width, height)
+            self.rects[key] = rect
+            tile = self.surface.subsurface(rect)
+            if key == FACE:
+                self.draw_face(tile)
+            elif key == BACK:
+                self.draw_back(tile)
+            else:
+                self.draw_card(tile, CARDS_BY_CODE[key])
+
+    def convert(self):
+        # Match the Screen's Pixel Format Once the Display Exists (Faster Blits)
+        self.surface = self.surface.convert_alpha()
+
+    def outline(self, tile, fill: tuple, border: tuple):
+        rect = tile.get_rect().inflate(-2, -2)
+        radius = max(4, self.size[0] // 12)
+        pygame.draw.rect(tile, fill, rect, border_radius=radius)
+        pygame.draw.rect(tile, border, rect, width=2, border_radius=radius)
+
+    def draw_card(self, tile, card):
+        width, height = self.size
+        color = suit_color(card.suit)
+        self.outline(tile, CARD_FACE, color)
+        rank = self.rank_font.render(card.rank, True, color)
+        tile.blit(rank, (8, 6))
+        tile.blit(pygame.transform.rotate(rank, 180),
+                  (width - 8 - rank.get_width(), height - 6 - rank.get_height()))
+        if card.suit == JESTER_SUIT:
+            label = self.small_font.render("JESTER", True, color)
+            tile.blit(label, label.get_rect(center=(width // 2, height // 2)))
+            pygame.draw.circle(tile, color, (width // 2, height // 2 - height // 6), width // 10, 2)
+            return
+        draw_suit(tile, card.suit, (14 + rank.get_width() // 2, 14 + rank.get_height()),
+                  width * 0.07, color)
+        draw_suit(tile, card.suit, (width // 2, height // 2), width * 0.22, color)
+
+    def draw_face(self, tile):
+        width, height = self.size
+        self.outline(tile, (44, 22, 60), JESTER_PURPLE)
+        art = draw_ascii(JESTER_FACE, (12, 18), ACCENT, 3)
+        scale = min((width - 16) / art.get_width(), (height - 40) / art.get_height())
+        art = pygame.transform.smoothscale(
+            art, (round(art.get_width() * scale), round(art.get_height() * scale)))
+        tile.blit(art, art.get_rect(center=(width // 2, height // 2 - 8)))
+        label = self.small_font.render("THE JESTER", True, ACCENT)
+        tile.blit(label, label.get_rect(center=(width // 2, height - 16)))
+
+    def draw_back(self, tile):
+        width, height = self.size
+        self.outline(tile, (110, 30, 36), (200, 170, 120))
+        for offset in range(-height, width, 12):
+            pygame.draw.line(tile, (140, 46, 52), (offset, 8), (offset + height, height - 8))
+        inner = tile.get_rect().inflate(-16, -16)
+        pygame.draw.rect(tile, (200, 170, 120), inner, width=1, border_radius=4)
+
+    def blit(self, target, key: int, position: tuple) -> "pygame.Rect":
+        return target.blit(self.surface, position, self.rects[key])
+
+
+# Narration
+
+def wrap(text: str, font, width: int) -> list:
+    lines, line = [], ""
+    for word in text.split():
+        candidate = f"{line} {word}".strip()
+        if line and font.size(candidate)[0] > width:
+            lines.append(line)
+            line = word
+        else:
+            line = candidate
+    if line:
+        lines.append(line)
+    return lines
+
+
+def card_name(card) -> str:
+    return "a Jester" if card.suit == JESTER_SUIT else f"{card.rank} of {card.suit}"
+
+
+def narrate(event, game: DungeonDrawGame) -> list:
+    # Short Text for the Message Log (the Cards Themselves are Shown in the Slots)
+    kind, data = event.kind, event.data
+    if kind in EVENT_TEXT:
+        text = EVENT_TEXT[kind].format(**data)
+    elif kind == "room":
+        text = ROOM_INTROS.get(data["variant"], "")
+    elif kind == "room_result":
+        text = RESULT_TEXT[data["result"]]
+    elif kind == "reveal":
+        text = f"You guessed {GUESS_NAMES[data['guess']]}; the next room is {card_name(data['card'])}."
+    elif kind == "rope":
+        text = f"Your Escape Rope activates! You skip the {card_name(data['card'])} unscathed."
+    elif kind == "trap":
+        text = (f"Equipment Room (Trap): you take {data['damage']} damage"
+                + (" and lose 1 armor." if data["armor_lost"] else "."))
+    elif kind == "jester_start":
+        text = (f"THE JESTER APPEARS! Call at least {game.rules.jester_wins_needed} of his "
+                f"next {game.rules.jester_rounds} draws.")
+    elif kind == "jester_round":
+        text = f"The Jester draws {card_name(data['card'])}. {JESTER_RESULT_TEXT[data['result']]}"
+    elif kind == "jester_end":
+        text = f"The Jester's game ends: {data['correct']}/{game.rules.jester_rounds} correct."
+    elif kind == "jester_won":
+        text = (f"You outplay the Jester! +{data['gold']} gold, +{data['score']} score, "
+                f"{data['healed']} HP healed.")
+    elif kind == "jester_lost":
+        text = f"The Jester steals {data['gold']} gold and rips away {data['hp']} HP!"
+    elif kind == "game_over":
+        text = {"cleared": "You've conquered the dungeon deck! Well done adventurer!",
+                "dead": "Your journey ends here... but the dungeon awaits your return.",
+                "quit": "You turned back before uncovering all its secrets."}[data["outcome"]]
+    else:
+        return []
+    return [line.strip() for line in text.split("\n") if line.strip()]
+
+
+# Frame Timing
+
+class FrameStats:
+    # Frame Work Time (Not Counting the Sleep to the Next Frame), How Much of the
+    # Screen Each Frame Sent to the Display, and Input-to-Screen Latency
+    def __init__(self, budget: float, window: int = 10_000):
+        self.budget = budget
+        self.started = time.perf_counter()
+        self.frames = 0
+        self.drawn = 0
+        self.over_budget = 0
+        self.pixels = 0
+        self.times = deque(maxlen=window)
+        self.latencies = deque(maxlen=window)
+
+    def frame(self, seconds: float, pixels: int):
+        self.frames += 1
+        self.times.append(seconds)
+        if pixels:
+            self.drawn += 1
+            self.pixels += pixels
+        if self.budget and seconds > self.budget:
+            self.over_budget += 1
+
+    def latency(self, seconds: float):
+        self.latencies.append(seconds)
+
+    def fps(self) -> float:
+        elapsed = time.perf_counter() - self.started
+        return self.frames / elapsed if elapsed else 0.0
+
+    @staticmethod
+    def percentile(samples, p: float) -> float:
+        if not samples:
+            return 0.0
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+    def summary(self, screen_pixels: int) -> dict:
+        return {
+            "frames": self.frames,
+            "fps": self.fps(),
+            "frame_p50_ms": self.percentile(self.times, 50) * 1000,
+            "frame_p99_ms": self.percentile(self.times, 99) * 1000,
+            "over_budget": self.over_budget,
+            "latency_p50_ms": self.percentile(self.latencies, 50) * 1000,
+            "latency_p99_ms": self.percentile(self.latencies, 99) * 1000,
+            "drawn_frames": self.drawn,
+            "redrawn_share": self.pixels / (self.drawn * screen_pixels) if self.drawn else 0.0,
+        }
+
+
+# The Screen
+
+class GameView:
+    # Remembers What Every Region Shows and Repaints a Region Only When that Changes;
+    # present() Sends Just Those Rectangles to the Display
+    def __init__(self, screen, atlas: CardAtlas, show_odds: bool = False,
+                 full_redraw: bool = False):
+        self.screen = screen
+        self.atlas = atlas
+        self.show_odds = show_odds
+        self.full_redraw = full_redraw
+        self.font = pygame.font.Font(None, 22)
+        self.small = pygame.font.Font(None, 18)
+        self.text_cache = {}
+        self.dirty = []
+
+        width, height = screen.get_size()
+        rows = 3 if show_odds else 2
+        self.hud_rect = pygame.Rect(0, 0, width, MARGIN + rows * LINE + 4)
+        names = [["hp", "gold", "streak", "best"], ["armor", "left", "totem", "rope"]]
+        if show_odds:
+            names.append(["higher", "lower", "same", "jester"])
+        column = (width - 2 * MARGIN) // 4
+        self.field_rects = {name: pygame.Rect(MARGIN + col * column, MARGIN // 2 + row * LINE,
+                                              column - 4, LINE)
+                            for row, line in enumerate(names) for col, name in enumerate(line)}
+
+        top = self.hud_rect.bottom + 10
+        gap = 40
+        left_x = width // 2 - gap // 2 - atlas.size[0]
+        right_x = width // 2 + gap // 2
+        self.title_rects = {"left": pygame.Rect(left_x - 20, top, atlas.size[0] + 40, LINE),
+                            "right": pygame.Rect(right_x - 20, top, atlas.size[0] + 40, LINE)}
+        self.slot_rects = {"left": pygame.Rect(left_x, top + LINE + 4, *atlas.size),
+                           "right": pygame.Rect(right_x, top + LINE + 4, *atlas.size)}
+        log_top = self.slot_rects["left"].bottom + 12
+        self.prompt_rect = pygame.Rect(0, height - LINE - 8, width, LINE + 8)
+        self.log_rect = pygame.Rect(MARGIN, log_top, width - 2 * MARGIN,
+                                    min(LOG_LINES * LINE, self.prompt_rect.top - log_top - 4))
+        self.stats_rect = pygame.Rect(width - 190, height - LINE - 4, 186, LINE)
+
+        self.log = deque(maxlen=max(1, self.log_rect.height // LINE))
+        self.stats_line = None
+        self.reset()
+
+    def reset(self):
+        # Forget What's on Screen, so the Next Frame Paints Everything
+        self.fields = {}
+        self.slots = {}
+        self.titles = {}
+        self.prompt = None
+        self.stats_text = None
+        self.log_changed = True
+        self.screen.fill(BACKGROUND)
+        pygame.draw.rect(self.screen, PANEL, self.hud_rect)
+        self.dirty = [self.screen.get_rect()]
+
+    def text(self, text: str, font, color: tuple) -> "pygame.Surface":
+        key = (text, id(font), color)
+        surface = self.text_cache.get(key)
+        if surface is None:
+            if len(self.text_cache) > 2048:
+                self.text_cache.clear()
+            surface = self.text_cache[key] = font.render(text, True, color)
+        return surface
+
+    def set_field(self, name: str, label: str, value: str):
+        text = f"{label} {value}"
+        if self.fields.get(name) == text:
+            return
+        self.fields[name] = text
+        rect = self.field_rects[name]
+        self.screen.fill(PANEL, rect)
+        self.screen.blit(self.text(label, self.font, DIM), rect.topleft)
+        self.screen.blit(self.text(value, self.font, TEXT),
+                         (rect.x + self.font.size(label + " ")[0], rect.y))
+        self.dirty.append(rect)
+
+    def set_slot(self, slot: str, key: int, title: str):
+        if self.titles.get(slot) != title:
+            self.titles[slot] = title
+            rect = self.title_rects[slot]
+            self.screen.fill(BACKGROUND, rect)
+            label = self.text(title, self.font, ACCENT)
+            self.screen.blit(label, label.get_rect(midtop=rect.midtop))
+            self.dirty.append(rect)
+        if self.slots.get(slot) != key:
+            self.slots[slot] = key
+            rect = self.slot_rects[slot]
+            self.screen.fill(BACKGROUND, rect)
+            self.atlas.blit(self.screen, key, rect.topleft)
+            self.dirty.append(rect)
+
+    def add_lines(self, lines):
+        for line in lines:
+            self.log.extend(wrap(line, self.font, self.log_rect.width))
+        self.log_changed = self.log_changed or bool(lines)
+
+    def clear_log(self):
+        self.log.clear()
+        self.log_changed = True
+
+    def set_prompt(self, text: str):
+        if self.prompt == text:
+            return
+        self.prompt = text
+        self.screen.fill(PANEL, self.prompt_rect)
+        label = self.text(text, self.font, TEXT)
+        self.screen.blit(label, (MARGIN, self.prompt_rect.y + 4))
+        self.dirty.append(self.prompt_rect)
+        # The Counters Sit on Top of the Prompt Bar, so they Go Back On
+        self.stats_text = None
+        if self.stats_line is not None:
+            self.set_stats(self.stats_line)
+
+    def set_stats(self, text: str):
+        self.stats_line = text
+        if self.stats_text == text:
+            return
+        self.stats_text = text
+        self.screen.fill(PANEL, self.stats_rect)
+        label = self.text(text, self.small, DIM)
+        self.screen.blit(label, label.get_rect(midright=self.stats_rect.midright))
+        self.dirty.append(self.stats_rect)
+
+    def draw_log(self):
+        if not self.log_changed:
+            return
+        self.log_changed = False
+        self.screen.fill(BACKGROUND, self.log_rect)
+        for index, line in enumerate(self.log):
+            color = TEXT if index == len(self.log) - 1 else DIM
+            self.screen.blit(self.text(line, self.font, color),
+                             (self.log_rect.x, self.log_rect.y + index * LINE))
+        self.dirty.append(self.log_rect)
+
+    def show(self, game: DungeonDrawGame, left: int, right: int, titles: tuple):
+        self.set_field("hp", "HP", f"{game.hp}/{game.max_hp}")
+        self.set_field("gold", "Gold", str(game.gold))
+        self.set_field("streak", "Streak", str(game.streak))
+        self.set_field("best", "Best", str(game.best_streak))
+        self.set_field("armor", "Armor", str(game.armor))
+        self.set_field("left", "Cards", str(game.deck.remaining()))
+        self.set_field("totem", "Totem", str(game.totem_charges))
+        self.set_field("rope", "Rope", str(game.escape_rope_charges))
+        if self.show_odds and game.current_card is not None:
+            deck, value = game.deck, game.current_card.value
+            self.set_field("higher", "Higher", f"{deck.p_higher(value):.0%}")
+            self.set_field("lower", "Lower", f"{deck.p_lower(value):.0%}")
+            self.set_field("same", "Same", f"{deck.p_equal(value):.0%}")
+            self.set_field("jester", "Jester", f"{deck.p_jester():.0%}")
+        self.set_slot("left", left, titles[0])
+        self.set_slot("right", right, titles[1])
+        self.draw_log()
+
+    def begin_frame(self):
+        if self.full_redraw:
+            # The Naive Baseline: Forget Everything, so the Frame Repaints the Whole Screen
+            self.reset()
+
+    def present(self) -> int:
+        # Returns How Many Pixels Went to the Display
+        if self.full_redraw:
+            pygame.display.flip()
+            self.dirty = []
+            return self.screen.get_width() * self.screen.get_height()
+        if not self.dirty:
+            return 0
+        pygame.display.update(self.dirty)
+        pixels = sum(rect.width * rect.height for rect in self.dirty)
+        self.dirty = []
+        return pixels
+
+
+# The Game Loop
+
+class DungeonApp:
+    def __init__(self, view: GameView, games: int = None, seed: int = None, policy=None,
+                 fps: int = DEFAULT_FPS, reveal_ms: int = REVEAL_MS, rules=None, deck=None):
+        self.view = view
+        self.games = games
+        self.seed = seed
+        self.policy = policy
+        self.fps = fps
+        self.reveal = reveal_ms / 1000
+        self.rules = rules
+        self.deck = deck
+        self.clock = pygame.time.Clock()
+        self.stats = FrameStats(1 / fps if fps else 0.0)
+        self.played = 0
+        self.results = {"cleared": 0, "dead": 0, "quit": 0}
+        self.running = True
+        self.new_game()
+
+    def new_game(self):
+        seed = None
+        if self.seed is not None:
+            from dungeon_sim import game_seed
+            seed = game_seed(self.seed, self.played)
+        self.game = DungeonDrawGame(seed=seed, profile=False, rules=self.rules, deck=self.deck)
+        self.revealed = None
+        self.shown = None
+        self.reveal_until = 0.0
+        self.view.clear_log()
+        self.view.add_lines(["You descend into the dungeon. Will the next room be Higher or Lower?"])
+
+    def layout(self) -> tuple:
+        # (Left Key, Right Key, Titles) for What the Player Should See Right Now
+        game = self.game
+        if self.revealed is not None:
+            previous, card, title = self.revealed
+            return previous.code, card.code, ("Last room:", title)
+        current = game.current_card.code if game.current_card is not None else BACK
+        if game.in_jester_fight:
+            return current, FACE, ("Jester's current card:", "Jester's draw:")
+        return current, BACK, ("Current room:", "Next room:")
+
+    def act(self, action: str):
+        game = self.game
+        previous = game.current_card
+        events = game.step(action)
+        lines = []
+        self.revealed = None
+        for event in events:
+            if event.kind in ("reveal", "jester_round", "rope", "jester_start"):
+                title = {"reveal": "Next room:", "jester_round": "Jester's draw:",
+                         "rope": "Skipped room:", "jester_start": "A strange card..."}[event.kind]
+                self.revealed = (previous, event["card"], title)
+            lines.extend(narrate(event, game))
+        self.view.add_lines(lines)
+        self.reveal_until = time.perf_counter() + self.reveal
+        if game.over:
+            self.played += 1
+            self.results[game.outcome] += 1
+            self.view.add_lines([f"Final score {game.score}, gold {game.gold}, "
+                                 f"best streak {game.best_streak}."])
+
+    def prompt(self) -> str:
+        game = self.game
+        if game.over:
+            return "N: new game    Esc: leave"
+        if self.policy is not None:
+            return f"{self.policy.name} is playing..."
+        if game.in_jester_fight:
+            return "Jester draw: H = Higher   L = Lower"
+        return "H = Higher   L = Lower   Q = Quit"
+
+    def handle_key(self, key: int) -> bool:
+        # Returns True When the Key Made a Move
+        if key == pygame.K_ESCAPE:
+            self.running = False
+            return False
+        game = self.game
+        if game.over:
+            if key in (pygame.K_n, pygame.K_RETURN, pygame.K_SPACE):
+                self.new_game()
+            return False
+        action = {pygame.K_h: 'h', pygame.K_l: 'l', pygame.K_q: 'q'}.get(key)
+        if action is None or action not in game.legal_actions() or self.policy is not None:
+            # Any Other Key Just Skips the Reveal
+            self.reveal_until = 0.0
+            return False
+        self.act(action)
+        return True
+
+    def finished(self) -> bool:
+        return self.games is not None and self.played >= self.games
+
+    def frame(self) -> bool:
+        start = time.perf_counter()
+        moved = False
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                self.running = False
+            elif event.type == pygame.KEYDOWN:
+                moved = self.handle_key(event.key) or moved
+
+        if self.policy is not None and start >= self.reveal_until:
+            if self.game.over:
+                if not self.finished():
+                    self.new_game()
+            else:
+                self.act(self.policy(self.game))
+                moved = True
+        if start >= self.reveal_until:
+            self.revealed = None
+
+        left, right, titles = self.layout()
+        self.view.begin_frame()
+        self.view.show(self.game, left, right, titles)
+        self.view.set_prompt(self.prompt())
+        if self.stats.frames % 30 == 0:
+            self.view.set_stats(f"{self.stats.fps():.0f} fps  "
+                                f"{FrameStats.percentile(self.stats.times, 99) * 1000:.1f} ms p99")
+        pixels = self.view.present()
+
+        work = time.perf_counter() - start
+        self.stats.frame(work, pixels)
+        if moved:
+            self.stats.latency(work)
+        return self.running and not self.finished()
+
+    def run(self) -> dict:
+        while self.frame():
+            if self.fps:
+                # Sleeps Off Whatever is Left of the Frame Budget
+                self.clock.tick(self.fps)
+        screen = self.view.screen
+        return self.stats.summary(screen.get_width() * screen.get_height())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play Dungeon Draw in a Pygame window.")
+    parser.add_argument("--headless", action="store_true",
+                        help="render off-screen with SDL's dummy video driver (needs --bot)")
+    parser.add_argument("--bot", metavar="POLICY",
+                        help="let a policy play, e.g. midpoint, counting, random or solver:2")
+    parser.add_argument("--games", type=int, default=None,
+                        help="stop after this many games (default: play until Esc)")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="root seed: game N gets its own seed derived from it")
+    parser.add_argument("--fps", type=int, default=DEFAULT_FPS,
+                        help="frame cap and budget (0: uncapped, for benchmarks)")
+    parser.add_argument("--reveal-ms", type=int, default=REVEAL_MS,
+                        help="how long a drawn card stays face up")
+    parser.add_argument("--size", default=f"{WIDTH}x{HEIGHT}", help="window size, WxH")
+    parser.add_argument("--odds", action="store_true", help="show the live odds in the HUD")
+    parser.add_argument("--full-redraw", action="store_true",
+                        help="repaint the whole screen every frame (baseline for comparison)")
+    parser.add_argument("--rules", metavar="PATH", help="play with the balance numbers from a rules file")
+    parser.add_argument("--deck", metavar="SPEC", type=DeckSpec.parse,
+                        help="long dungeon deck, e.g. decks=4,jesters=8,Spades=2,ranks=5-A")
+    args = parser.parse_args()
+
+    if args.headless:
+        if not args.bot:
+            parser.error("--headless needs --bot to make the moves")
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+    policy = None
+    if args.bot:
+        from dungeon_policy import make_policy
+        policy = make_policy(args.bot)
+    rules = None
+    if args.rules:
+        from dungeon_rules import load_rules
+        rules = load_rules(args.rules)
+    width, height = (int(part) for part in args.size.lower().split("x"))
+
+    # Only Video and Fonts: No Audio Device is Needed
+    pygame.display.init()
+    pygame.font.init()
+    try:
+        screen = pygame.display.set_mode((width, height))
+        pygame.display.set_caption("Dungeon Draw")
+        start = time.perf_counter()
+        atlas = CardAtlas()
+        atlas.convert()
+        atlas_ms = (time.perf_counter() - start) * 1000
+        view = GameView(screen, atlas, args.odds, args.full_redraw)
+        app = DungeonApp(view, args.games, args.seed, policy, args.fps, args.reveal_ms, rules,
+                         args.deck)
+        stats = app.run()
+    finally:
+        pygame.quit()
+
+    if args.headless or args.games:
+        games = max(1, app.played)
+        print(f"{app.played} games ({app.results['cleared'] / games:.1%} cleared), "
+              f"atlas built in {atlas_ms:.1f} ms")
+        print(f"{stats['frames']} frames at {stats['fps']:.0f} fps; frame time p50 "
+              f"{stats['frame_p50_ms']:.2f} ms, p99 {stats['frame_p99_ms']:.2f} ms, "
+              f"{stats['over_budget']} over budget")
+        print(f"Move-to-screen latency p50 {stats['latency_p50_ms']:.2f} ms, "
+              f"p99 {stats['latency_p99_ms']:.2f} ms")
+        print(f"{stats['drawn_frames']} frames drew anything, redrawing "
+              f"{stats['redrawn_share']:.1%} of the screen on average")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        sys.exit(0)
@@ -0,0 +1,257 @@
+import argparse
+import math
+import os
+import statistics
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, wait
+
+from dungeon_draw import ROLL_STREAM, SHUFFLE_STREAM, CounterRNG, DungeonDrawGame
+from dungeon_policy import make_policy
+from dungeon_rules import DEFAULT_TABLES
+from dungeon_sim import game_seed, play_headless
+from dungeon_solver import deck_key, game_stats
+
+DEFAULT_BUDGET = 0.05
+# Workers Stop a Little Short of the Budget so their Results Land Inside it
+WORK_SHARE = 0.8
+ACTION_NAMES = {'h': "Higher", 'l': "Lower", 'q': "Quit"}
+
+
+# Rollouts (Run Inside the Worker Processes)
+
+_policies = {}
+
+
+def rollout_policy(spec: str):
+    policy = _policies.get(spec)
+    if policy is None:
+        policy = _policies[spec] = make_policy(spec)
+    return policy
+
+
+def sample_world(snapshot: bytes, rules, seed: int) -> DungeonDrawGame:
+    # One Guess at What the Player Can't See: the Unseen Cards Reshuffled and the
+    # Room Rolls Redrawn, so Hints Never Peek at the Real Deck Order
+    game = DungeonDrawGame.from_bytes(snapshot, rules)
+    game.record_events = False
+    game.deck.rng = CounterRNG(seed, SHUFFLE_STREAM)
+    game.deck.shuffle()
+    game.rng = CounterRNG(seed, ROLL_STREAM)
+    return game
+
+
+def rollouts(snapshot: bytes, rules, actions: tuple, policy_spec: str, root_seed: int,
+             first: int, stride: int, seconds: float) -> list:
+    # Anytime: Samples Until the Time is Up (At Least One). Each Sample Plays Every
+    # Action Out on the Same Sampled World, so the Actions are Compared Pairwise
+    policy = rollout_policy(policy_spec)
+    deadline = time.perf_counter() + seconds
+    samples = []
+    index = first
+    while True:
+        seed = game_seed(root_seed, index)
+        row = []
+        for action in actions:
+            game = sample_world(snapshot, rules, seed)
+            game.step(action)
+            play_headless(game, policy)
+            row.append((game.score, game.outcome == "cleared"))
+        samples.append(row)
+        index += stride
+        if time.perf_counter() >= deadline:
+            return samples
+
+
+def _warm(spec: str):
+    # Gives Every Worker Time to Start, and its Rollout Policy
+    rollout_policy(spec)
+    time.sleep(0.05)
+
+
+# Hints
+
+class Hint:
+    def __init__(self, action: str, confidence: float, values: dict, win_rates: dict,
+                 rollouts: int, elapsed: float):
+        self.action = action
+        self.confidence = confidence
+        self.values = values
+        self.win_rates = win_rates
+        self.rollouts = rollouts
+        self.elapsed = elapsed
+
+    def __repr__(self) -> str:
+        return (f"Hint({self.action!r}, confidence={self.confidence:.2f}, "
+                f"rollouts={self.rollouts}, {self.elapsed * 1000:.1f} ms)")
+
+    def describe(self) -> str:
+        values = "  ".join(f"{action.upper()} {value:.0f}" for action, value in self.values.items())
+        return (f"Hint: {ACTION_NAMES[self.action]} ({self.confidence:.0%} sure; "
+                f"expected score {values}; {self.rollouts} rollouts)")
+
+
+def summarize(actions: tuple, samples: list, elapsed: float) -> Hint:
+    count = len(samples)
+    values = {action: sum(row[i][0] for row in samples) / count
+              for i, action in enumerate(actions)}
+    win_rates = {action: sum(row[i][1] for row in samples) / count
+                 for i, action in enumerate(actions)}
+    ranked = sorted(range(len(actions)), key=lambda i: values[actions[i]], reverse=True)
+    best = ranked[0]
+
+    # Confidence: Chance the Best Action Really Beats the Runner-Up, from the Paired
+    # Score Differences (Normal Approximation)
+    confidence = 1.0
+    if len(ranked) > 1:
+        diffs = [row[best][0] - row[ranked[1]][0] for row in samples]
+        mean = sum(diffs) / count
+        spread = statistics.stdev(diffs) if count > 1 else 0.0
+        if spread:
+            z = mean / (spread / math.sqrt(count))
+            confidence = 0.5 * (1 + math.erf(z / math.sqrt(2)))
+        else:
+            confidence = 1.0 if mean > 0 and count > 1 else 0.5
+    return Hint(actions[best], confidence, values, win_rates, count * len(actions), elapsed)
+
+
+class HintEngine:
+    # Monte Carlo Hints: Plays the Rest of the Dungeon Out from Copies of the Current
+    # State Over a Process Pool, and Answers with Whatever it Has When the Budget Ends.
+    # Answers are Cached by What the Player Can See, so Repeated Positions are Free
+    def __init__(self, budget: float = DEFAULT_BUDGET, workers: int = None,
+                 policy: str = "counting", seed: int = 0, cache_size: int = 10_000):
+        make_policy(policy)   # Fail Fast on a Bad Name
+        self.budget = budget
+        self.policy = policy
+        self.seed = seed
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = None
+        if self.workers > 1:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers)
+            # Start the Workers Now, so the First Hint Doesn't Wait on Process Startup
+            list(self.pool.map(_warm, [policy] * self.workers))
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def state_key(self, game: DungeonDrawGame) -> tuple:
+        # The Stats, the Current Card and What's Left in the Deck, But Not its Order
+        counts, jesters = deck_key(game.deck)
+        return (game_stats(game), game.in_jester_fight, game.score, game.streak, game.gold,
+                game.current_card.code, counts, jesters, game.rules)
+
+    def lookup(self, key):
+        with self.lock:
+            cached = self.cache.get(key)
+            if cached is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return cached
+
+    def remember(self, key, hint: Hint):
+        with self.lock:
+            self.cache[key] = hint
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+    def hint(self, game: DungeonDrawGame, budget: float = None) -> Hint:
+        start = time.perf_counter()
+        key = self.state_key(game)
+        cached = self.lookup(key)
+        if cached is not None:
+            return cached
+
+        budget = self.budget if budget is None else budget
+        actions = game.legal_actions()
+        snapshot = game.to_bytes()
+        rules = None if game.rules is DEFAULT_TABLES else game.rules
+        jobs = [(snapshot, rules, actions, self.policy, self.seed, first, self.workers,
+                 budget * WORK_SHARE) for first in range(self.workers)]
+        if self.pool is None:
+            samples = rollouts(*jobs[0])
+        else:
+            # Late Workers are Left Behind; They Stop on their Own Clock Soon After
+            futures = [self.pool.submit(rollouts, *job) for job in jobs]
+            done, _ = wait(futures, timeout=max(0.0, start + budget - time.perf_counter()))
+            samples = [row for future in done for row in future.result()]
+
+        elapsed = time.perf_counter() - start
+        if not samples:
+            # Nothing Came Back in Time: Fall Back on the Rollout Policy, Uncached
+            return Hint(rollout_policy(self.policy)(game), 0.0, {}, {}, 0, elapsed)
+        hint = summarize(actions, samples, elapsed)
+        self.remember(key, hint)
+        return hint
+
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+def benchmark(engine: HintEngine, games: int = 10, seed: int = 0) -> dict:
+    # Follow Every Hint for Whole Games, Timing Each One
+    timings = []
+    scores = []
+    wins = 0
+    for index in range(games):
+        game = DungeonDrawGame(seed=game_seed(seed, index))
+        game.record_events = False
+        while not game.over:
+            begin = time.perf_counter()
+            action = engine.hint(game).action
+            timings.append(time.perf_counter() - begin)
+            game.step(action)
+        scores.append(game.score)
+        wins += game.outcome == "cleared"
+
+    timings.sort()
+    return {
+        "hints": len(timings),
+        "p50_ms": timings[len(timings) // 2] * 1000,
+        "p99_ms": timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1000,
+        "max_ms": timings[-1] * 1000,
+        "cache_hit_rate": engine.hit_rate(),
+        "win_rate": wins / games,
+        "mean_score": statistics.mean(scores),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play games by following rollout hints.")
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET * 1000,
+                        help="milliseconds per hint")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: all cores)")
+    parser.add_argument("--policy", default="counting", help="policy the rollouts play")
+    args = parser.parse_args()
+
+    with HintEngine(args.budget / 1000, args.workers, args.policy) as engine:
+        stats = benchmark(engine, args.games, args.seed)
+    print(f"{stats['hints']} hints over {args.games} games "
+          f"({args.budget:.0f} ms budget, {engine.workers} workers)")
+    print(f"Hint time: p50 {stats['p50_ms']:.1f} ms, p99 {stats['p99_ms']:.1f} ms, "
+          f"max {stats['max_ms']:.1f} ms, {stats['cache_hit_rate']:.1%} cached")
+    print(f"Win rate: {stats['win_rate']:.1%}   Mean score: {stats['mean_score']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import random
+
+
+# Policies: Whatever Makes the H/L Calls in Place of the Player. The Game Calls
+# policy(game) Whenever it Needs a Guess, Jester Draws Included, and Expects One of
+# game.legal_actions() Back. Any Callable Works (dungeon_sim.midpoint_policy Does)
+class Policy:
+    name = "policy"
+
+    def guess(self, game) -> str:
+        raise NotImplementedError
+
+    def __call__(self, game) -> str:
+        return self.guess(game)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.name!r})"
+
+
+class MidpointPolicy(Policy):
+    # Higher on Low Cards, Lower on High Ones
+    name = "midpoint"
+
+    def __init__(self, threshold: int = 8):
+        self.threshold = threshold
+
+    def guess(self, game) -> str:
+        return 'h' if game.current_card.value <= self.threshold else 'l'
+
+
+class CountingPolicy(Policy):
+    # Card Counting: Picks the Likelier Side from the Deck's Live Odds
+    name = "counting"
+
+    def guess(self, game) -> str:
+        value = game.current_card.value
+        return 'h' if game.deck.p_higher(value) >= game.deck.p_lower(value) else 'l'
+
+
+class RandomPolicy(Policy):
+    # Coin Flips, Seeded from the Game so a Run Replays the Same Whatever Ran Before it
+    name = "random"
+
+    def __init__(self, seed: int = 0):
+        self.seed = seed
+        self.game = None
+        self.rng = None
+
+    def guess(self, game) -> str:
+        if game is not self.game:
+            self.game = game
+            self.rng = random.Random(f"{self.seed}:{game.seed}")
+        return self.rng.choice('hl')
+
+
+class SolverPolicy(Policy):
+    # The Lookahead Solver from dungeon_solver.py (Slow: Milliseconds per Call)
+    name = "solver"
+
+    def __init__(self, depth: int = 1):
+        from dungeon_solver import Solver
+        self.solver = Solver(depth=depth)
+
+    def guess(self, game) -> str:
+        return self.solver.policy(game)
+
+
+POLICIES = {
+    "midpoint": MidpointPolicy,
+    "counting": CountingPolicy,
+    "random": RandomPolicy,
+    "solver": SolverPolicy,
+}
+
+
+def make_policy(spec: str) -> Policy:
+    # "name" or "name:arg", e.g. "midpoint:7" or "solver:2"
+    name, _, arg = spec.partition(":")
+    if name not in POLICIES:
+        raise ValueError(f"Unknown policy {name!r}; expected one of {', '.join(POLICIES)}")
+    policy = POLICIES[name](int(arg)) if arg else POLICIES[name]()
+    policy.name = spec
+    return policy
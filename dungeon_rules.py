@@ -0,0 +1,194 @@
+import argparse
+import json
+
+
+# Room Rules as Data
+# Every room is a suit, a variant and whether the guess was correct. Each
+# outcome lists its effects as terms of the card value (2-14):
+#   {"mul": m, "div": d, "add": a, "min": lo} -> max(lo, value * m // d + a)
+# A bare number is a constant. Damage terms can also scale with the player:
+#   "hp_div": n adds hp // n and "armor": true subtracts armour, both before the floor.
+# A suit's variants are rolled evenly (in the order listed) among the ones
+# that have an entry for the guess result.
+RULES = {
+    "player": {"max_hp": 20, "totem_revive_div": 2},
+    "score": {"correct": {"add": 10, "div": 2}, "incorrect": 5, "equal": 1},
+    "jester": {
+        "rounds": 5, "wins_needed": 3,
+        "win_gold": 30, "win_score": 20, "win_heal": 5,
+        "loss_hp": 15, "loss_gold": 20,
+    },
+    "rooms": {
+        "Hearts": {
+            "pure": {
+                "correct": {"heal": {}},
+                "incorrect": {"heal": {"div": 3, "min": 1}},
+            },
+            "regen": {
+                "correct": {"regen": {"div": 4, "min": 1}, "regen_turns": 3},
+                "incorrect": {"regen": {"div": 6, "min": 1}, "regen_turns": 2},
+            },
+            "blessing": {
+                # chance: odds of the heal instead of the max HP boost
+                "correct": {"heal": {"mul": 2}, "boost": 3, "chance": 0.5},
+                "incorrect": {"heal": {}, "boost": 1, "chance": 0.5},
+            },
+        },
+        "Diamonds": {
+            "treasure": {
+                "correct": {"gold": {"mul": 2}},
+                "incorrect": {"damage": {"div": 2, "min": 1}, "gold": {"div": 2}},
+            },
+        },
+        "Clubs": {
+            # A second totem turns into armour instead
+            "totem": {"correct": {"totem": 1, "armor": 1}},
+            "escape": {"correct": {"rope": 1}},
+            "stone": {"correct": {"armor": 1}},
+            # chance: odds of losing a point of armour
+            "trap": {"incorrect": {"damage": {"div": 2, "min": 1}, "chance": 0.5}},
+        },
+        "Spades": {
+            "goblin": {
+                "correct": {"damage": {"div": 3, "armor": True}, "gold": {"div": 2}},
+                "incorrect": {"damage": {"min": 1, "armor": True}},
+            },
+            "slime": {
+                "correct": {"damage": {"div": 4, "armor": True},
+                            "poison": {"div": 6, "min": 1}, "poison_turns": 2},
+                "incorrect": {"damage": {"div": 3, "min": 1, "armor": True},
+                              "poison": {"div": 4, "min": 1}, "poison_turns": 3},
+            },
+            "warlock": {
+                "correct": {"damage": {"div": 2, "min": 3, "hp_div": 20, "armor": True}},
+                "incorrect": {"damage": {"min": 5, "hp_div": 10, "armor": True}},
+            },
+        },
+    },
+}
+
+# Effects Baked into Per-Value Tables at Compile Time
+VALUE_FIELDS = ("gold", "heal", "poison", "poison_turns", "regen", "regen_turns",
+                "boost", "totem", "rope", "armor")
+RESULTS = ("incorrect", "correct")
+VALUES = 16
+
+
+def term_values(term, floor: bool = True) -> list:
+    if isinstance(term, (int, float)):
+        return [int(term)] * VALUES
+    mul, div, add = term.get("mul", 1), term.get("div", 1), term.get("add", 0)
+    low = term.get("min", 0) if floor else None
+    values = [value * mul // div + add for value in range(VALUES)]
+    return values if low is None else [max(low, v) for v in values]
+
+
+class RuleTables:
+    # Compiled Rules: Flat Arrays Indexed by slot * 16 + value, where
+    # slot = (suit * variants_per_suit + variant) * 2 + correct
+    def __init__(self, spec: dict):
+        self.spec = spec
+        rooms = spec["rooms"]
+        self.suits = tuple(rooms)
+        self.variants = {suit: tuple(rooms[suit]) for suit in self.suits}
+        self.width = max(len(variants) for variants in self.variants.values())
+        slots = len(self.suits) * self.width * 2
+
+        self.damage = [0] * (slots * VALUES)
+        self.damage_floor = [0] * slots
+        self.damage_hp_div = [0] * slots
+        self.damage_armor = [0] * slots
+        self.chance = [0.0] * slots
+        for field in VALUE_FIELDS:
+            setattr(self, field, [0] * (slots * VALUES))
+
+        # (suit, correct) -> the (variant, slot) pairs a room rolls between
+        self.choices = {}
+        for suit_index, suit in enumerate(self.suits):
+            for correct, result in enumerate(RESULTS):
+                options = []
+                for variant_index, variant in enumerate(self.variants[suit]):
+                    outcome = rooms[suit][variant].get(result)
+                    if outcome is None:
+                        continue
+                    slot = (suit_index * self.width + variant_index) * 2 + correct
+                    options.append((variant, slot))
+                    self.compile_outcome(slot, outcome)
+                if not options:
+                    raise ValueError(f"{suit} has no room for a {result} guess")
+                self.choices[suit, bool(correct)] = tuple(options)
+
+        player, score, jester = spec["player"], spec["score"], spec["jester"]
+        self.max_hp = player["max_hp"]
+        self.totem_revive_div = player["totem_revive_div"]
+        self.score_correct = term_values(score["correct"])
+        self.score_incorrect = score["incorrect"]
+        self.score_equal = score["equal"]
+        self.jester_rounds = jester["rounds"]
+        self.jester_wins_needed = jester["wins_needed"]
+        self.jester_win_gold = jester["win_gold"]
+        self.jester_win_score = jester["win_score"]
+        self.jester_win_heal = jester["win_heal"]
+        self.jester_loss_hp = jester["loss_hp"]
+        self.jester_loss_gold = jester["loss_gold"]
+
+    def compile_outcome(self, slot: int, outcome: dict):
+        start = slot * VALUES
+        for field, term in outcome.items():
+            if field == "chance":
+                self.chance[slot] = float(term)
+            elif field == "damage":
+                # The Floor Waits Until HP and Armour are Known
+                scaled = isinstance(term, dict)
+                self.damage[start:start + VALUES] = term_values(term, floor=not scaled)
+                if scaled:
+                    self.damage_floor[slot] = term.get("min", 0)
+                    self.damage_hp_div[slot] = term.get("hp_div", 0)
+                    self.damage_armor[slot] = int(bool(term.get("armor", False)))
+            elif field in VALUE_FIELDS:
+                getattr(self, field)[start:start + VALUES] = term_values(term)
+            else:
+                raise ValueError(f"Unknown room effect {field!r}")
+
+    def roll(self, rng, suit: str, correct: bool) -> tuple:
+        # Returns (variant, slot); Only Rolls When There's a Choice to Make
+        options = self.choices[suit, correct]
+        return options[0] if len(options) == 1 else rng.choice(options)
+
+    def damage_for(self, slot: int, value: int, hp: int, armor: int) -> int:
+        damage = self.damage[slot * VALUES + value]
+        if self.damage_hp_div[slot]:
+            damage += hp // self.damage_hp_div[slot]
+        if self.damage_armor[slot]:
+            damage -= armor
+        return max(self.damage_floor[slot], damage)
+
+
+def compile_rules(spec: dict = RULES) -> RuleTables:
+    return RuleTables(spec)
+
+
+def load_rules(path: str) -> RuleTables:
+    with open(path) as handle:
+        return compile_rules(json.load(handle))
+
+
+DEFAULT_TABLES = compile_rules(RULES)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check or export Dungeon Draw rule tables.")
+    parser.add_argument("path", nargs="?", help="rules file to check (default: print the built-in rules)")
+    args = parser.parse_args()
+
+    if args.path is None:
+        print(json.dumps(RULES, indent=2))
+        return
+    tables = load_rules(args.path)
+    for (suit, correct), options in tables.choices.items():
+        result = "correct" if correct else "incorrect"
+        print(f"{suit:9} {result:9} " + ", ".join(variant for variant, _ in options))
+
+
+if __name__ == "__main__":
+    main()
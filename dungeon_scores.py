@@ -0,0 +1,393 @@
+import argparse
+import bisect
+import fcntl
+import heapq
+import mmap
+import os
+import random
+import struct
+import time
+from array import array
+from contextlib import contextmanager
+
+from dungeon_draw import DungeonDrawGame
+from dungeon_replay import OUTCOMES
+from dungeon_rules import DEFAULT_TABLES
+
+
+# Record File (Little Endian): a Header, Then Fixed-Size Entries in the Order Games Finished
+# header: magic, format version, generation (bumped by every compaction)
+# entry: player (UTF-8, zero padded), score, gold, best streak, final hp, outcome, seed, timestamp
+MAGIC = b"DDHS"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sB3xQ")
+ENTRY = struct.Struct("<16sIIHhB3xQd")
+NAME_BYTES = 16
+
+# Index File (Rebuilt by reindex() and compact(), Swapped in Whole with os.replace)
+# header: magic, format version, generation of the records it indexes, entries covered, players
+# by score: one key per covered entry, best first (see score_key)
+# by player: each player's name and the key of their best entry, sorted by name
+INDEX_MAGIC = b"DDHI"
+INDEX_HEADER = struct.Struct("<4sB3xQQQ")
+KEY = struct.Struct("<Q")
+PLAYER = struct.Struct("<16sQ")
+
+# Keys Sort Higher Scores First, Then Earlier Entries; the Entry Number is the Low Half
+TOP_SCORE = 0xFFFFFFFF
+
+
+def score_key(score: int, number: int) -> int:
+    return (TOP_SCORE - score) << 32 | number
+
+
+def key_score(key: int) -> int:
+    return TOP_SCORE - (key >> 32)
+
+
+def key_number(key: int) -> int:
+    return key & 0xFFFFFFFF
+
+
+def encode_name(player: str) -> bytes:
+    # Padded as Stored; Truncates on a Character Boundary so Names Always Decode
+    name = player.encode()[:NAME_BYTES].decode(errors="ignore").encode()
+    return name.ljust(NAME_BYTES, b"\0")
+
+
+class Entry:
+    __slots__ = ("player", "score", "gold", "best_streak", "hp", "outcome", "seed", "timestamp",
+                 "number")
+
+    def __init__(self, player: str, score: int, gold: int, best_streak: int, hp: int,
+                 outcome: str, seed: int, timestamp: float = None, number: int = None):
+        self.player = player
+        self.score = score
+        self.gold = gold
+        self.best_streak = best_streak
+        self.hp = hp
+        self.outcome = outcome
+        self.seed = seed
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.number = number
+
+    @classmethod
+    def from_game(cls, game: DungeonDrawGame, player: str) -> "Entry":
+        if not game.over:
+            raise ValueError("Only finished games go on the leaderboard")
+        return cls(player, game.score, game.gold, game.best_streak, game.hp, game.outcome,
+                   game.seed)
+
+    def pack(self) -> bytes:
+        return ENTRY.pack(encode_name(self.player), self.score, self.gold, self.best_streak,
+                          self.hp, OUTCOMES.index(self.outcome), self.seed, self.timestamp)
+
+    @classmethod
+    def unpack_from(cls, buffer, number: int) -> "Entry":
+        name, score, gold, best_streak, hp, outcome, seed, timestamp = ENTRY.unpack_from(
+            buffer, HEADER.size + number * ENTRY.size)
+        return cls(name.rstrip(b"\0").decode(), score, gold, best_streak, hp, OUTCOMES[outcome],
+                   seed, timestamp, number)
+
+    def __repr__(self) -> str:
+        return (f"Entry(#{self.number} {self.player!r} score={self.score} gold={self.gold} "
+                f"outcome={self.outcome})")
+
+
+class Column:
+    # Read-Only Sequence Over One Field of Fixed-Size Rows in a Buffer, for bisect
+    def __init__(self, buffer, offset: int, count: int, row: struct.Struct, field: int = 0):
+        self.buffer = buffer
+        self.offset = offset
+        self.count = count
+        self.row = row
+        self.field = field
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index: int):
+        return self.row.unpack_from(self.buffer, self.offset + index * self.row.size)[self.field]
+
+
+def map_file(handle):
+    # mmap Refuses Empty Files
+    size = os.fstat(handle.fileno()).st_size
+    return mmap.mmap(handle.fileno(), size, access=mmap.ACCESS_READ) if size else b""
+
+
+class Leaderboard:
+    # Appends Go Straight to the Record File Under an Exclusive flock. Queries Read the
+    # Index Through mmap and Merge in the Short Tail of Entries Appended Since it was
+    # Built, so Nothing is Loaded Whole and Results are Always Current
+    def __init__(self, path: str):
+        self.path = path
+        self.index_path = path + ".idx"
+        self.handle = self.records = None
+        self.index_handle = self.index = None
+        with self.locked():
+            pass   # Creates the File (and its Header) if Needed
+        self.open()
+
+    # Writing
+
+    @contextmanager
+    def locked(self):
+        # Compaction Swaps the Record File, so Re-Check it's Still the Live One Once Locked
+        while True:
+            fd = os.open(self.path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            if os.fstat(fd).st_ino == os.stat(self.path).st_ino:
+                break
+            os.close(fd)
+        try:
+            size = os.fstat(fd).st_size
+            if size == 0:
+                os.write(fd, HEADER.pack(MAGIC, FORMAT_VERSION, 0))
+            elif os.pread(fd, len(MAGIC), 0) != MAGIC:
+                raise ValueError(f"{self.path} is not a Dungeon Draw score file")
+            elif (size - HEADER.size) % ENTRY.size:
+                # A Writer Died Mid-Entry: Drop the Torn Bytes so Entries Stay Aligned
+                os.ftruncate(fd, size - (size - HEADER.size) % ENTRY.size)
+            yield fd
+        finally:
+            os.close(fd)
+
+    def append(self, entry: Entry) -> int:
+        # One write() of One Entry Under the Lock: Concurrent Appends Never Interleave
+        with self.locked() as fd:
+            size = os.fstat(fd).st_size
+            os.write(fd, entry.pack())
+        entry.number = (size - HEADER.size) // ENTRY.size
+        return entry.number
+
+    def record(self, game: DungeonDrawGame, player: str) -> Entry:
+        # Entries Don't Carry a Rule Set, so Scores from Tuned Rules Would Rank Unfairly
+        if game.rules is not DEFAULT_TABLES:
+            raise ValueError("The leaderboard only ranks games played under the default rules")
+        entry = Entry.from_game(game, player)
+        self.append(entry)
+        return entry
+
+    # Reading
+
+    def open(self):
+        self.close()
+        self.handle = open(self.path, "rb")
+        magic, version, self.generation = HEADER.unpack(self.handle.read(HEADER.size))
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{self.path} is not a Dungeon Draw score file")
+        self.records = map_file(self.handle)
+        self.open_index()
+
+    def open_index(self):
+        if self.index:
+            self.index.close()
+        if self.index_handle:
+            self.index_handle.close()
+        self.index_handle = self.index = None
+        self.covered = self.player_count = 0
+        try:
+            self.index_handle = open(self.index_path, "rb")
+        except FileNotFoundError:
+            pass
+        else:
+            self.index = map_file(self.index_handle)
+            magic, version, generation, covered, players = INDEX_HEADER.unpack_from(self.index)
+            # An Index from Before a Compaction Describes Other Entries: Scan Instead
+            if magic == INDEX_MAGIC and version == FORMAT_VERSION and generation == self.generation:
+                self.covered, self.player_count = covered, players
+        self.keys = Column(self.index, INDEX_HEADER.size, self.covered, KEY)
+        players_at = INDEX_HEADER.size + self.covered * KEY.size
+        self.names = Column(self.index, players_at, self.player_count, PLAYER, 0)
+        self.bests = Column(self.index, players_at, self.player_count, PLAYER, 1)
+        self.tail_keys = []
+        self.tail_bests = {}
+        self.seen = self.covered
+
+    def close(self):
+        for resource in (self.records, self.handle, self.index, self.index_handle):
+            if resource:
+                resource.close()
+        self.handle = self.records = None
+        self.index_handle = self.index = None
+
+    def sync(self):
+        # A Few stat() Calls: Picks Up Compactions, New Indexes and New Appends
+        if os.stat(self.path).st_ino != os.fstat(self.handle.fileno()).st_ino:
+            self.open()
+        try:
+            index_inode = os.stat(self.index_path).st_ino
+        except FileNotFoundError:
+            index_inode = None
+        if index_inode != (self.index_handle and os.fstat(self.index_handle.fileno()).st_ino):
+            self.open_index()
+        count = len(self)
+        if count > self.seen:
+            if HEADER.size + count * ENTRY.size > len(self.records):
+                if self.records:
+                    self.records.close()
+                self.records = map_file(self.handle)
+            start, end = (HEADER.size + number * ENTRY.size for number in (self.seen, count))
+            new = ENTRY.iter_unpack(self.records[start:end])
+            for number, (name, score, *_) in enumerate(new, start=self.seen):
+                key = score_key(score, number)
+                self.tail_keys.append(key)
+                if key < self.tail_bests.get(name, key + 1):
+                    self.tail_bests[name] = key
+            # Timsort Keeps the Already-Sorted Run, so Only the New Keys Cost Anything
+            self.tail_keys.sort()
+            self.seen = count
+
+    def __len__(self) -> int:
+        return (os.fstat(self.handle.fileno()).st_size - HEADER.size) // ENTRY.size
+
+    def entry(self, number: int) -> Entry:
+        return Entry.unpack_from(self.records, number)
+
+    def top(self, k: int = 100) -> list:
+        self.sync()
+        head = (self.keys[index] for index in range(min(k, len(self.keys))))
+        merged = heapq.merge(head, self.tail_keys[:k])
+        return [self.entry(key_number(key)) for key, _ in zip(merged, range(k))]
+
+    def rank(self, score: int) -> int:
+        # 1 + Entries with a Strictly Higher Score (Ties Share a Rank)
+        self.sync()
+        key = score_key(score, 0)
+        return 1 + bisect.bisect_left(self.keys, key) + bisect.bisect_left(self.tail_keys, key)
+
+    def best_key(self, player: str):
+        name = encode_name(player)
+        best = self.tail_bests.get(name)
+        index = bisect.bisect_left(self.names, name)
+        if index < len(self.names) and self.names[index] == name:
+            indexed = self.bests[index]
+            best = indexed if best is None else min(best, indexed)
+        return best
+
+    def best(self, player: str):
+        self.sync()
+        key = self.best_key(player)
+        return None if key is None else self.entry(key_number(key))
+
+    # Maintenance
+
+    def write_index(self, generation: int, keys: array, bests: dict):
+        # Written Aside and Swapped in, so Readers See the Old Index or the New One
+        names = sorted(bests)
+        temp = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(temp, "wb") as handle:
+            handle.write(INDEX_HEADER.pack(INDEX_MAGIC, FORMAT_VERSION, generation, len(keys),
+                                           len(names)))
+            handle.write(keys.tobytes())
+            for name in names:
+                handle.write(PLAYER.pack(name, bests[name]))
+        os.replace(temp, self.index_path)
+
+    def reindex(self):
+        # Folds the Tail into the Index: a Merge of Two Sorted Runs, Without the Lock
+        self.sync()
+        keys = array("Q", heapq.merge((self.keys[index] for index in range(len(self.keys))),
+                                      self.tail_keys))
+        bests = {self.names[index]: self.bests[index] for index in range(len(self.names))}
+        for name, key in self.tail_bests.items():
+            bests[name] = min(key, bests.get(name, key))
+        self.write_index(self.generation, keys, bests)
+        self.sync()
+
+    def compact(self, keep: int = None):
+        # Rewrites the Records Best First, Keeping the Top `keep` and Every Player's Best;
+        # Holds the Lock Throughout so No Append Lands in the Old File
+        with self.locked():
+            self.sync()
+            keys = heapq.merge((self.keys[index] for index in range(len(self.keys))),
+                               self.tail_keys)
+            bests = {self.names[index]: self.bests[index] for index in range(len(self.names))}
+            for name, key in self.tail_bests.items():
+                bests[name] = min(key, bests.get(name, key))
+            kept = set(bests.values())
+            generation = self.generation + 1
+            new_keys, new_bests = array("Q"), {}
+            temp = f"{self.path}.{os.getpid()}.tmp"
+            with open(temp, "wb") as handle:
+                handle.write(HEADER.pack(MAGIC, FORMAT_VERSION, generation))
+                for rank, key in enumerate(keys):
+                    if keep is not None and rank >= keep and key not in kept:
+                        continue
+                    number = len(new_keys)
+                    start = HEADER.size + key_number(key) * ENTRY.size
+                    handle.write(self.records[start:start + ENTRY.size])
+                    new_keys.append(score_key(key_score(key), number))
+                    name = self.records[start:start + NAME_BYTES]
+                    if key == bests.get(name):
+                        new_bests[name] = new_keys[-1]
+            self.write_index(generation, new_keys, new_bests)
+            os.replace(temp, self.path)
+        self.open()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query and maintain a Dungeon Draw leaderboard.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    top_cmd = commands.add_parser("top", help="show the best runs")
+    top_cmd.add_argument("path")
+    top_cmd.add_argument("-k", type=int, default=10)
+
+    rank_cmd = commands.add_parser("rank", help="rank a score against every run")
+    rank_cmd.add_argument("path")
+    rank_cmd.add_argument("score", type=int)
+
+    best_cmd = commands.add_parser("best", help="show a player's best run")
+    best_cmd.add_argument("path")
+    best_cmd.add_argument("player")
+
+    reindex_cmd = commands.add_parser("reindex", help="fold new runs into the index")
+    reindex_cmd.add_argument("path")
+
+    compact_cmd = commands.add_parser("compact", help="rewrite the records best first")
+    compact_cmd.add_argument("path")
+    compact_cmd.add_argument("--keep", type=int, default=None,
+                             help="drop runs past this rank that aren't a player's best")
+
+    fill_cmd = commands.add_parser("fill", help="record bot games under random player names")
+    fill_cmd.add_argument("path")
+    fill_cmd.add_argument("--games", type=int, default=1000)
+    fill_cmd.add_argument("--players", type=int, default=100)
+    fill_cmd.add_argument("--seed", type=int, default=0)
+
+    args = parser.parse_args()
+    board = Leaderboard(args.path)
+
+    if args.command == "top":
+        for rank, entry in enumerate(board.top(args.k), start=1):
+            print(f"{rank:>4}. {entry.player:<16} {entry.score:>6}  gold {entry.gold:>4}  "
+                  f"streak {entry.best_streak:>2}  {entry.outcome}")
+    elif args.command == "rank":
+        print(f"Score {args.score} ranks #{board.rank(args.score)} of {len(board)}")
+    elif args.command == "best":
+        entry = board.best(args.player)
+        print(entry if entry else f"No runs for {args.player}")
+    elif args.command == "reindex":
+        start = time.perf_counter()
+        board.reindex()
+        print(f"Indexed {len(board)} runs in {time.perf_counter() - start:.2f}s")
+    elif args.command == "compact":
+        before = len(board)
+        start = time.perf_counter()
+        board.compact(args.keep)
+        print(f"Compacted {before} runs to {len(board)} in {time.perf_counter() - start:.2f}s")
+    else:
+        from dungeon_sim import game_seed, midpoint_policy, play_headless
+        rng = random.Random(args.seed)
+        for index in range(args.games):
+            game = DungeonDrawGame(seed=game_seed(args.seed, index))
+            game.record_events = False
+            board.record(play_headless(game, midpoint_policy),
+                         f"player{rng.randrange(args.players)}")
+        print(f"Recorded {args.games} runs to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+import argparse
+import asyncio
+import os
+import resource
+import sys
+import tempfile
+import time
+
+from dungeon_draw import RULES_VERSION, Card, DungeonDrawGame
+from dungeon_sim import game_seed
+
+
+# Line Protocol (One UTF-8 Line per Message)
+# server: HELLO rules=<v> seed=<seed>
+#         STATE hp=.. max_hp=.. gold=.. score=.. streak=.. armor=.. card=.. left=.. jester=.. legal=..
+#         EVENT <kind> key=value ...
+#         OVER outcome=.. hp=.. gold=.. score=.. best_streak=.. turns=..
+#         HINT action=.. confidence=.. rollouts=.. ms=.. <action>=<expected score> ...
+#         ERROR <message> | BYE <reason>
+# client: h / l / q to play, "hint" for a suggestion (when the server has hints on),
+#         "new" for another game after OVER, "bye" to leave
+DEFAULT_PORT = 7777
+IDLE_TIMEOUT = 300.0
+
+
+def wire_value(value) -> str:
+    if isinstance(value, Card):
+        return value.rank + value.suit[0]
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    return str(value)
+
+
+def state_line(game: DungeonDrawGame) -> str:
+    return (f"STATE hp={game.hp} max_hp={game.max_hp} gold={game.gold} score={game.score} "
+            f"streak={game.streak} armor={game.armor} card={wire_value(game.current_card)} "
+            f"left={game.deck.remaining()} jester={game.jester_turns_left if game.in_jester_fight else 0} "
+            f"legal={''.join(game.legal_actions())}")
+
+
+def event_line(event) -> str:
+    fields = "".join(f" {key}={wire_value(value)}" for key, value in event.data.items())
+    return f"EVENT {event.kind}{fields}"
+
+
+def over_line(game: DungeonDrawGame) -> str:
+    return (f"OVER outcome={game.outcome} hp={game.hp} gold={game.gold} score={game.score} "
+            f"best_streak={game.best_streak} turns={game.turns}")
+
+
+def hint_line(hint) -> str:
+    values = "".join(f" {action}={value:.1f}" for action, value in hint.values.items())
+    return (f"HINT action={hint.action} confidence={hint.confidence:.3f} "
+            f"rollouts={hint.rollouts} ms={hint.elapsed * 1000:.1f}{values}")
+
+
+def parse_fields(line: str) -> dict:
+    return dict(part.split("=", 1) for part in line.split()[1:] if "=" in part)
+
+
+# Server
+
+class Session:
+    # Per-Connection State: Just the Stream and the Game it's Playing
+    __slots__ = ("writer", "game")
+
+    def __init__(self, writer, game: DungeonDrawGame):
+        self.writer = writer
+        self.game = game
+
+    def send(self, lines):
+        self.writer.write(("\n".join(lines) + "\n").encode())
+
+
+class DungeonServer:
+    def __init__(self, idle_timeout: float = IDLE_TIMEOUT, max_sessions: int = 10_000,
+                 seed: int = None, hints=None):
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.seed = seed
+        # A HintEngine (See dungeon_hint.py), Shared so Every Session Uses One Cache
+        self.hints = hints
+        self.active = 0
+        self.peak = 0
+        self.games_started = 0
+        self.games_finished = 0
+        self.timeouts = 0
+
+    def new_game(self) -> DungeonDrawGame:
+        # A Root Seed Makes Every Session Reproducible from its Game Number
+        seed = None if self.seed is None else game_seed(self.seed, self.games_started)
+        self.games_started += 1
+        return DungeonDrawGame(seed=seed)
+
+    def opening(self, game: DungeonDrawGame) -> list:
+        return [f"HELLO rules={RULES_VERSION} seed={game.seed}", state_line(game)]
+
+    async def hint(self, game: DungeonDrawGame) -> str:
+        if self.hints is None:
+            return "ERROR hints are off"
+        if game.over:
+            return "ERROR game over; send new or bye"
+        # Rollouts Wait on the Worker Pool from a Thread, Never on the Event Loop
+        hint = await asyncio.get_running_loop().run_in_executor(None, self.hints.hint, game)
+        return hint_line(hint)
+
+    def handle_line(self, session: Session, line: str) -> bool:
+        # Returns False Once the Client is Done
+        game = session.game
+        if line == "bye":
+            session.send(["BYE goodbye"])
+            return False
+        if game.over:
+            if line == "new":
+                session.game = self.new_game()
+                session.send(self.opening(session.game))
+            else:
+                session.send(["ERROR game over; send new or bye"])
+            return True
+        if line not in game.legal_actions():
+            session.send([f"ERROR expected one of {''.join(game.legal_actions())}"])
+            return True
+
+        lines = [event_line(event) for event in game.step(line)]
+        if game.over:
+            self.games_finished += 1
+            lines.append(over_line(game))
+        else:
+            lines.append(state_line(game))
+        session.send(lines)
+        return True
+
+    async def handle(self, reader, writer):
+        if self.active >= self.max_sessions:
+            writer.write(b"BYE server full\n")
+            writer.close()
+            return
+
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        session = Session(writer, self.new_game())
+        try:
+            session.send(self.opening(session.game))
+            while True:
+                await writer.drain()
+                try:
+                    raw = await asyncio.wait_for(reader.readline(), self.idle_timeout)
+                except asyncio.TimeoutError:
+                    self.timeouts += 1
+                    session.send(["BYE idle"])
+                    break
+                if not raw:
+                    break
+                line = raw.decode(errors="replace").strip().lower()
+                if line == "hint":
+                    session.send([await self.hint(session.game)])
+                    continue
+                if not self.handle_line(session, line):
+                    break
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.active -= 1
+            writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT, unix: str = None):
+        # A Deep Backlog Lets Thousands of Players Connect at Once
+        backlog = min(self.max_sessions, 4096)
+        if unix:
+            return await asyncio.start_unix_server(self.handle, path=unix, backlog=backlog)
+        return await asyncio.start_server(self.handle, host, port, backlog=backlog)
+
+
+async def serve(args, hints=None):
+    server = DungeonServer(args.idle_timeout, args.max_sessions, args.seed, hints)
+    listener = await server.start(args.host, args.port, args.unix)
+    where = args.unix or f"{args.host}:{args.port}"
+    print(f"Dungeon Draw server listening on {where}", flush=True)
+    async with listener:
+        await listener.serve_forever()
+
+
+# Load Generator
+
+def percentile(samples, p: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+async def bot_session(connect, latencies: list, results: list):
+    reader, writer = await connect()
+    try:
+        while True:
+            line = (await reader.readline()).decode().strip()
+            if not line or line.startswith("BYE"):
+                return
+            if line.startswith("STATE"):
+                break
+        while True:
+            state = parse_fields(line)
+            rank = state["card"][:-1]
+            guess = 'h' if rank in ('2', '3', '4', '5', '6', '7', '8') else 'l'
+            start = time.perf_counter()
+            writer.write(guess.encode() + b"\n")
+            while True:
+                line = (await reader.readline()).decode().strip()
+                if not line or line.startswith(("STATE", "OVER", "BYE", "ERROR")):
+                    break
+            latencies.append(time.perf_counter() - start)
+            if not line.startswith("STATE"):
+                break
+        if line.startswith("OVER"):
+            results.append(parse_fields(line)["outcome"])
+        writer.write(b"bye\n")
+        await writer.drain()
+    finally:
+        writer.close()
+
+
+async def load(args):
+    server_process = None
+    unix = args.unix
+    if args.port is None and unix is None:
+        # No Target Given: Start a Local Server in its Own Process so it Gets a Core to Itself
+        unix = os.path.join(tempfile.mkdtemp(), "dungeon.sock")
+        server_process = await asyncio.create_subprocess_exec(
+            sys.executable, os.path.abspath(__file__), "serve", "--unix", unix,
+            "--max-sessions", str(args.sessions + 1), "--seed", str(args.seed),
+            stdout=asyncio.subprocess.DEVNULL,
+        )
+        while not os.path.exists(unix):
+            await asyncio.sleep(0.01)
+
+    if unix:
+        connect = lambda: asyncio.open_unix_connection(unix)
+    else:
+        connect = lambda: asyncio.open_connection(args.host, args.port)
+
+    latencies, results = [], []
+    gate = asyncio.Semaphore(args.concurrency)
+
+    async def run_one():
+        async with gate:
+            await bot_session(connect, latencies, results)
+
+    server_cpu = None
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(*(run_one() for _ in range(args.sessions)))
+        elapsed = time.perf_counter() - start
+    finally:
+        if server_process is not None:
+            server_process.terminate()
+            await server_process.wait()
+            usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+            server_cpu = usage.ru_utime + usage.ru_stime
+
+    print(f"Played {len(results)} sessions ({args.concurrency} at a time) "
+          f"and {len(latencies)} turns in {elapsed:.2f}s")
+    print(f"Turn latency: p50 {percentile(latencies, 50) * 1000:.2f} ms, "
+          f"p99 {percentile(latencies, 99) * 1000:.2f} ms")
+    if server_cpu:
+        print(f"Server CPU {server_cpu:.2f}s: {len(results) / server_cpu:.0f} sessions per core-second, "
+              f"{len(latencies) / server_cpu:.0f} turns per core-second")
+    else:
+        # The Server Runs One Event Loop, so Wall Time is Time on One Core
+        print(f"{len(results) / elapsed:.0f} sessions/s on one server core")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Host many Dungeon Draw games over a line protocol.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    for name in ("serve", "load"):
+        command = commands.add_parser(name)
+        command.add_argument("--host", default="127.0.0.1")
+        command.add_argument("--unix", metavar="PATH", help="use a Unix socket instead of TCP")
+        command.add_argument("--seed", type=int, default=None,
+                             help="root seed for reproducible sessions")
+        if name == "serve":
+            command.add_argument("--port", type=int, default=DEFAULT_PORT)
+            command.add_argument("--idle-timeout", type=float, default=IDLE_TIMEOUT,
+                                 help="seconds before an idle session is dropped")
+            command.add_argument("--max-sessions", type=int, default=10_000)
+            command.add_argument("--hints", action="store_true",
+                                 help="answer \"hint\" with Monte Carlo rollout suggestions")
+            command.add_argument("--hint-budget", type=float, default=50.0, metavar="MS",
+                                 help="milliseconds each hint may take (default: 50)")
+            command.add_argument("--hint-workers", type=int, default=None,
+                                 help="rollout worker processes (default: all cores)")
+        else:
+            command.add_argument("--port", type=int, default=None,
+                                 help="server port (default: start a local server)")
+            command.add_argument("--sessions", type=int, default=2000)
+            command.add_argument("--concurrency", type=int, default=1000,
+                                 help="bot sessions connected at once")
+
+    args = parser.parse_args()
+    if args.command == "load" and args.seed is None:
+        args.seed = 0
+    hints = None
+    if args.command == "serve" and args.hints:
+        # Workers Start Before the Event Loop Does
+        from dungeon_hint import HintEngine
+        hints = HintEngine(args.hint_budget / 1000, args.hint_workers)
+    try:
+        asyncio.run(serve(args, hints) if args.command == "serve" else load(args))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if hints is not None:
+            hints.close()
+
+
+if __name__ == "__main__":
+    main()
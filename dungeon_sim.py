@@ -0,0 +1,184 @@
+import argparse
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from dungeon_draw import DungeonDrawGame
+
+
+# Seed Streams: Every Run Index Gets its Own Seed Derived from the Root Seed
+def game_seed(root_seed: int, index: int) -> int:
+    digest = hashlib.blake2b(
+        f"{root_seed}:{index}".encode(), digest_size=8, person=b"dungeon-draw"
+    ).digest()
+    return int.from_bytes(digest, "little")
+
+
+# Default Bot: Guess Higher on Low Cards and Lower on High Ones
+def midpoint_policy(game: DungeonDrawGame) -> str:
+    return 'h' if game.current_card.value <= 8 else 'l'
+
+
+def play_headless(game: DungeonDrawGame, policy=midpoint_policy) -> DungeonDrawGame:
+    while not game.over:
+        game.step(policy(game))
+    return game
+
+
+def run_game(root_seed: int, index: int, policy=midpoint_policy, corpus=None) -> DungeonDrawGame:
+    # Re-run Any Single Game of a Batch Straight from its Index; a Deck Corpus (See
+    # dungeon_corpus.py) Deals the Same Game Without the Shuffle
+    if corpus is not None:
+        game = corpus.game(index)
+    else:
+        game = DungeonDrawGame(seed=game_seed(root_seed, index))
+    game.record_events = False
+    return play_headless(game, policy)
+
+
+class RunStats:
+    # Integer-Only Aggregates so Merging is Exact in Any Order
+    def __init__(self):
+        self.runs = 0
+        self.outcomes = {"cleared": 0, "dead": 0, "quit": 0}
+        self.score_total = 0
+        self.score_squares = 0
+        self.gold_total = 0
+        self.hp_total = 0
+        self.streak_total = 0
+        self.turns_total = 0
+        self.score_counts = {}
+
+    def add(self, game: DungeonDrawGame):
+        self.runs += 1
+        self.outcomes[game.outcome] += 1
+        self.score_total += game.score
+        self.score_squares += game.score * game.score
+        self.gold_total += game.gold
+        self.hp_total += game.hp
+        self.streak_total += game.best_streak
+        self.turns_total += game.turns
+        self.score_counts[game.score] = self.score_counts.get(game.score, 0) + 1
+
+    def merge(self, other: "RunStats"):
+        self.runs += other.runs
+        for outcome, count in other.outcomes.items():
+            self.outcomes[outcome] += count
+        self.score_total += other.score_total
+        self.score_squares += other.score_squares
+        self.gold_total += other.gold_total
+        self.hp_total += other.hp_total
+        self.streak_total += other.streak_total
+        self.turns_total += other.turns_total
+        for score, count in other.score_counts.items():
+            self.score_counts[score] = self.score_counts.get(score, 0) + count
+        return self
+
+    def score_percentile(self, p: float) -> int:
+        target = p / 100 * self.runs
+        seen = 0
+        for score in sorted(self.score_counts):
+            seen += self.score_counts[score]
+            if seen >= target:
+                return score
+        return 0
+
+    def summary(self) -> dict:
+        runs = max(1, self.runs)
+        mean = self.score_total / runs
+        return {
+            "runs": self.runs,
+            "win_rate": self.outcomes["cleared"] / runs,
+            "death_rate": self.outcomes["dead"] / runs,
+            "mean_score": mean,
+            "score_std": max(0.0, self.score_squares / runs - mean * mean) ** 0.5,
+            "score_percentiles": {p: self.score_percentile(p) for p in (5, 25, 50, 75, 95)},
+            "mean_gold": self.gold_total / runs,
+            "mean_hp": self.hp_total / runs,
+            "mean_best_streak": self.streak_total / runs,
+            "mean_turns": self.turns_total / runs,
+        }
+
+
+def run_chunk(root_seed: int, start: int, stop: int, policy=midpoint_policy,
+              corpus_path: str = None) -> RunStats:
+    corpus = None
+    if corpus_path is not None:
+        from dungeon_corpus import open_corpus
+        corpus = open_corpus(corpus_path)
+    stats = RunStats()
+    for index in range(start, stop):
+        stats.add(run_game(root_seed, index, policy, corpus))
+    return stats
+
+
+def _run_chunk(args) -> RunStats:
+    return run_chunk(*args)
+
+
+def simulate(runs: int, seed: int = 0, workers: int = None, chunk_size: int = 2000,
+             policy=midpoint_policy, corpus_path: str = None) -> RunStats:
+    # Chunks Depend Only on the Run Count, so Results Never Depend on the Worker Count.
+    # Workers Map the Corpus Themselves; Only its Path Crosses the Process Boundary
+    chunks = [(seed, start, min(start + chunk_size, runs), policy, corpus_path)
+              for start in range(0, runs, chunk_size)]
+    workers = workers or os.cpu_count() or 1
+
+    total = RunStats()
+    if workers == 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            total.merge(_run_chunk(chunk))
+        return total
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for stats in pool.map(_run_chunk, chunks):
+            total.merge(stats)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo Dungeon Draw runs across every core.")
+    parser.add_argument("--runs", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    parser.add_argument("--replay", type=int, default=None, metavar="INDEX",
+                        help="re-run a single game of the batch by its index")
+    parser.add_argument("--corpus", metavar="PATH",
+                        help="deal from a pre-dealt deck corpus (its root seed replaces --seed)")
+    args = parser.parse_args()
+
+    corpus = None
+    if args.corpus:
+        from dungeon_corpus import open_corpus
+        corpus = open_corpus(args.corpus)
+        args.seed = corpus.seed
+        needed = args.runs if args.replay is None else args.replay + 1
+        if needed > len(corpus):
+            parser.error(f"{args.corpus} only holds {len(corpus)} decks")
+
+    if args.replay is not None:
+        game = run_game(args.seed, args.replay, corpus=corpus)
+        print(f"Game #{args.replay} (seed {game.seed}): {game.outcome} after {game.turns} turns")
+        print(f"HP {game.hp}/{game.max_hp}  Gold {game.gold}  Score {game.score}  "
+              f"Best Streak {game.best_streak}")
+        return
+
+    start = time.perf_counter()
+    stats = simulate(args.runs, args.seed, args.workers, args.chunk_size,
+                     corpus_path=args.corpus).summary()
+    elapsed = time.perf_counter() - start
+
+    print(f"Simulated {stats['runs']} runs in {elapsed:.2f}s")
+    print(f"Win rate: {stats['win_rate']:.2%}   Death rate: {stats['death_rate']:.2%}")
+    print(f"Score: mean {stats['mean_score']:.1f}, std {stats['score_std']:.1f}")
+    print("Score percentiles: " + ", ".join(
+        f"p{p}={v}" for p, v in stats["score_percentiles"].items()))
+    print(f"Mean gold: {stats['mean_gold']:.1f}   Mean best streak: "
+          f"{stats['mean_best_streak']:.2f}   Mean turns: {stats['mean_turns']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
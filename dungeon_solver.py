@@ -0,0 +1,507 @@
+import argparse
+import statistics
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from operator import mul
+
+from dungeon_draw import RANK_VALUES, SUITS, DungeonDrawGame
+from dungeon_effects import Timeline
+from dungeon_rules import DEFAULT_TABLES, RuleTables
+
+
+# Compact Solver State
+# The deck is a tuple of the 52 card counts by suit class (suit * 13 + value - 2), plus the
+# number of Jesters left. Player stats are a plain tuple in this field order:
+HP, MAX_HP, ARMOR, POISON_TURNS, POISON_DAMAGE, REGEN_TURNS, REGEN_AMOUNT, \
+    TOTEM, ROPE, JESTER_LEFT, JESTER_CORRECT = range(11)
+
+HEARTS, DIAMONDS, CLUBS, SPADES = range(4)
+VALUES = range(2, 15)
+JESTER_VALUE = RANK_VALUES['J']
+INDEX_VALUES = [value for suit in range(4) for value in VALUES] + [JESTER_VALUE]
+
+
+def deck_key(deck) -> tuple:
+    # A Tuple Whatever the Counts are Stored As (Big Decks Outgrow Bytes)
+    return tuple(deck.card_counts), deck.jesters
+
+
+def game_stats(game: DungeonDrawGame) -> tuple:
+    return (
+        game.hp, game.max_hp, game.armor,
+        game.poison_turns, game.poison_damage_per_turn,
+        game.regen_turns, game.regen_amount_per_turn,
+        game.totem_charges, game.escape_rope_charges,
+        game.jester_turns_left if game.in_jester_fight else 0, game.jester_correct,
+    )
+
+
+# Rule Helpers on a Mutable Stats List (Mirrors DungeonDrawGame)
+
+def _hurt(s: list, amount: int, rules: RuleTables):
+    if amount <= 0:
+        return
+    s[HP] -= amount
+    if s[HP] <= 0 and s[TOTEM] > 0:
+        s[TOTEM] -= 1
+        s[HP] = s[MAX_HP] // rules.totem_revive_div
+    if s[HP] < 0:
+        s[HP] = 0
+
+
+def _heal(s: list, amount: int):
+    s[HP] = min(s[MAX_HP], s[HP] + amount)
+
+
+def _tick(s: list, rules: RuleTables):
+    if s[POISON_TURNS] > 0 and s[POISON_DAMAGE] > 0 and s[HP] > 0:
+        _hurt(s, s[POISON_DAMAGE], rules)
+        s[POISON_TURNS] -= 1
+        if s[POISON_TURNS] == 0:
+            s[POISON_DAMAGE] = 0
+    if s[REGEN_TURNS] > 0 and s[REGEN_AMOUNT] > 0 and s[HP] > 0:
+        _heal(s, s[REGEN_AMOUNT])
+        s[REGEN_TURNS] -= 1
+        if s[REGEN_TURNS] == 0:
+            s[REGEN_AMOUNT] = 0
+
+
+def _end_jester(s: list, rules: RuleTables) -> int:
+    # Returns the Score Reward of the Fight
+    won = s[JESTER_CORRECT] >= rules.jester_wins_needed
+    if won:
+        _heal(s, rules.jester_win_heal)
+    else:
+        _hurt(s, rules.jester_loss_hp, rules)
+    s[JESTER_LEFT] = 0
+    s[JESTER_CORRECT] = 0
+    return rules.jester_win_score if won else 0
+
+
+class _Horizon:
+    # The Bare Game Timeline.fast_forward Ticks Past the Search Horizon: HP, Max HP and
+    # Totems, Hurt and Healed as in DungeonDrawGame, with No Events
+    __slots__ = ("hp", "max_hp", "totems", "revive_div")
+
+    def __init__(self, hp: int, max_hp: int, totems: int, revive_div: int):
+        self.hp = hp
+        self.max_hp = max_hp
+        self.totems = totems
+        self.revive_div = revive_div
+
+    def emit(self, kind: str, **data):
+        pass
+
+    def take_damage(self, amount: int, source: str = ""):
+        self.hp -= amount
+        if self.hp <= 0 and self.totems > 0:
+            self.totems -= 1
+            self.hp = self.max_hp // self.revive_div
+        if self.hp < 0:
+            self.hp = 0
+
+    def heal(self, amount: int, source: str = "") -> int:
+        old_hp = self.hp
+        self.hp = min(self.max_hp, self.hp + amount)
+        return self.hp - old_hp
+
+
+@lru_cache(maxsize=1 << 16)
+def outlasts_effects(stats: tuple, turns: int, revive_div: int) -> bool:
+    # Whether the Player Lives Through `turns` More Ticks of Their Poison and Regen,
+    # Skipped in Closed Form Rather than Ticked One by One
+    effects = Timeline()
+    if stats[POISON_TURNS] and stats[POISON_DAMAGE]:
+        effects.apply("poison", stats[POISON_DAMAGE], stats[POISON_TURNS])
+    if stats[REGEN_TURNS] and stats[REGEN_AMOUNT]:
+        effects.apply("regen", stats[REGEN_AMOUNT], stats[REGEN_TURNS])
+    horizon = _Horizon(stats[HP], stats[MAX_HP], stats[TOTEM], revive_div)
+    return effects.fast_forward(horizon, turns)[1] is None
+
+
+def room_outcomes(stats: tuple, suit: int, value: int, correct: bool,
+                  rules: RuleTables = DEFAULT_TABLES) -> list:
+    # Every (Probability, Stats) a Non-Equal Room Can Lead To
+    options = rules.choices[SUITS[suit], correct]
+    share = 1 / len(options)
+    outcomes = []
+    for variant, slot in options:
+        at = slot * 16 + value
+        after = list(stats)
+        if variant in ("goblin", "warlock", "treasure"):
+            _hurt(after, rules.damage_for(slot, value, stats[HP], stats[ARMOR]), rules)
+        elif variant == "slime":
+            _hurt(after, rules.damage_for(slot, value, stats[HP], stats[ARMOR]), rules)
+            after[POISON_TURNS] += rules.poison_turns[at]
+            after[POISON_DAMAGE] = max(after[POISON_DAMAGE], rules.poison[at])
+        elif variant == "pure":
+            _heal(after, rules.heal[at])
+        elif variant == "regen":
+            after[REGEN_TURNS] += rules.regen_turns[at]
+            after[REGEN_AMOUNT] = max(after[REGEN_AMOUNT], rules.regen[at])
+        elif variant == "blessing":
+            chance = rules.chance[slot]
+            _heal(after, rules.heal[at])
+            boost = list(stats)
+            boost[MAX_HP] += rules.boost[at]
+            boost[HP] += rules.boost[at]
+            outcomes.append((share * chance, after))
+            outcomes.append((share * (1 - chance), boost))
+            continue
+        elif variant == "totem":
+            if after[TOTEM] == 0:
+                after[TOTEM] = rules.totem[at]
+            else:
+                after[ARMOR] += rules.armor[at]
+        elif variant == "escape":
+            after[ROPE] += rules.rope[at]
+        elif variant == "stone":
+            after[ARMOR] += rules.armor[at]
+        elif variant == "trap":
+            _hurt(after, rules.damage_for(slot, value, stats[HP], stats[ARMOR]), rules)
+            if after[ARMOR] > 0:
+                chance = rules.chance[slot]
+                broken = list(after)
+                broken[ARMOR] -= 1
+                outcomes.append((share * (1 - chance), after))
+                outcomes.append((share * chance, broken))
+                continue
+        outcomes.append((share, after))
+    return outcomes
+
+
+def room_reward(result: str, value: int, rules: RuleTables = DEFAULT_TABLES) -> int:
+    # Score Change of a Room (the Floor at Zero is Ignored by the Solver)
+    if result == 'equal':
+        return rules.score_equal
+    if result == 'correct':
+        return rules.score_correct[value]
+    return -rules.score_incorrect
+
+
+def compare(guess: str, current: int, value: int) -> str:
+    if value == current:
+        return 'equal'
+    if (value > current) == (guess == 'h'):
+        return 'correct'
+    return 'incorrect'
+
+
+class Decision:
+    def __init__(self, action: str, value: float, survival: float, action_values: dict):
+        self.action = action
+        self.value = value
+        self.survival = survival
+        self.action_values = action_values
+
+    def __repr__(self) -> str:
+        return (f"Decision({self.action!r}, value={self.value:.2f}, "
+                f"survival={self.survival:.3f})")
+
+
+class Solver:
+    # Depth-Limited Expectimax over the Remaining Deck with a Bounded Memo
+    # Values are (expected score gained, survival probability) pairs. Choices
+    # add card_value for every card still left at the horizon when alive, and
+    # quitting is never weighed since playing on always has the better EV.
+    # Past the horizon no card is searched, but running poison still ticks on
+    # every turn left, so a line whose poison kills later doesn't count as alive.
+    def __init__(self, depth: int = 2, memo_size: int = 200_000, hp_bucket: int = 1,
+                 card_value: float = 6.0, rules: RuleTables = None):
+        self.depth = depth
+        self.rules = rules or DEFAULT_TABLES
+        self.memo_size = memo_size
+        self.hp_bucket = hp_bucket
+        self.card_value = card_value
+        self.poison_reach = max(self.rules.poison_turns)
+        self.memo = OrderedDict()
+        self.tables = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # State Compression
+
+    def stats_key(self, stats: tuple, depth: int) -> tuple:
+        # Charges Past the Horizon can Never Matter, so Cap Them. Poison Still Ticks
+        # Past it, so it Stays Whole; Regen Only Counts While Poison Might Be Running
+        poison_reach = stats[POISON_TURNS] + depth * (self.poison_reach + 1)
+        return (
+            stats[HP] // self.hp_bucket, stats[MAX_HP], min(stats[ARMOR], 20),
+            stats[POISON_TURNS], stats[POISON_DAMAGE],
+            min(stats[REGEN_TURNS], poison_reach), stats[REGEN_AMOUNT],
+            stats[TOTEM], min(stats[ROPE], depth), stats[JESTER_LEFT], stats[JESTER_CORRECT],
+        )
+
+    def lookup(self, memo: OrderedDict, key):
+        cached = memo.get(key)
+        if cached is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        memo.move_to_end(key)
+        return cached
+
+    def remember(self, memo: OrderedDict, key, result):
+        memo[key] = result
+        if len(memo) > self.memo_size:
+            memo.popitem(last=False)
+            self.evictions += 1
+
+    def horizon_weight(self, remaining: int, depth: int) -> float:
+        return self.card_value * max(0, remaining - depth)
+
+    def horizon_survival(self, stats: tuple, remaining: int) -> float:
+        # This Turn's Effects Have Ticked; Every Card Left but the Last Ticks Once More
+        if not (stats[POISON_TURNS] and stats[POISON_DAMAGE]):
+            return 1.0
+        return float(outlasts_effects(stats, remaining - 1, self.rules.totem_revive_div))
+
+    def horizon_key(self, stats: tuple, remaining: int) -> int:
+        # The Cards Left Matter to a Last-Layer Table Only Until they Outlast Any Poison
+        # its Room Can Leave Running
+        return min(remaining, stats[POISON_TURNS] + self.poison_reach + 2)
+
+    # Search
+
+    def value(self, counts: tuple, jesters: int, remaining: int, current: int,
+              stats: tuple, depth: int):
+        if remaining == 0:
+            return 0.0, 1.0
+        if depth == 0:
+            return 0.0, self.horizon_survival(stats, remaining)
+
+        key = (counts, jesters, current, depth, self.stats_key(stats, depth))
+        cached = self.lookup(self.memo, key)
+        if cached is not None:
+            return cached
+
+        weight = self.horizon_weight(remaining, depth)
+        best = None
+        for action in ('h', 'l'):
+            result = self.action_value(counts, jesters, remaining, current, stats,
+                                       depth, action)
+            if best is None or result[0] + weight * result[1] > best[0] + weight * best[1]:
+                best = result
+        self.remember(self.memo, key, best)
+        return best
+
+    def action_value(self, counts: tuple, jesters: int, remaining: int, current: int,
+                     stats: tuple, depth: int, action: str):
+        if depth == 1 and remaining >= 2:
+            # Last Layer: Per-Card Outcomes Don't Depend on the Deck, Only Their Weights Do
+            rewards, survivals = self.card_table(counts, jesters, remaining, current,
+                                                 stats, action)
+            reward = sum(map(mul, counts, rewards)) + jesters * rewards[52]
+            survival = sum(map(mul, counts, survivals)) + jesters * survivals[52]
+            return reward / remaining, survival / remaining
+
+        reward = survival = 0.0
+        for index in range(52):
+            count = counts[index]
+            if count:
+                child = list(counts)
+                child[index] -= 1
+                r, s = self.card_outcome(tuple(child), jesters, remaining - 1, current,
+                                         stats, depth, action, index)
+                reward += count * r
+                survival += count * s
+        if jesters:
+            r, s = self.card_outcome(counts, jesters - 1, remaining - 1, current,
+                                     stats, depth, action, 52)
+            reward += jesters * r
+            survival += jesters * s
+        return reward / remaining, survival / remaining
+
+    def card_table(self, counts: tuple, jesters: int, remaining: int, current: int,
+                   stats: tuple, action: str):
+        key = (current, action, self.stats_key(stats, 1), self.horizon_key(stats, remaining))
+        cached = self.lookup(self.tables, key)
+        if cached is not None:
+            return cached
+        outcomes = self.outcome_table(counts, jesters, remaining, stats)
+        rewards = []
+        survivals = []
+        for index, card_value in enumerate(INDEX_VALUES):
+            result_rewards, result_survivals = outcomes[compare(action, current, card_value)]
+            rewards.append(result_rewards[index])
+            survivals.append(result_survivals[index])
+        table = (rewards, survivals)
+        self.remember(self.tables, key, table)
+        return table
+
+    def outcome_table(self, counts: tuple, jesters: int, remaining: int, stats: tuple):
+        # Per-Card Outcomes Only Depend on the Guess Result, Not the Current Card
+        key = (self.stats_key(stats, 1), self.horizon_key(stats, remaining))
+        cached = self.lookup(self.tables, key)
+        if cached is not None:
+            return cached
+        # Any Non-Empty Deck Works Here: the Horizon is Reached Right After the Draw, and
+        # Past it Only the Number of Cards Left Counts
+        table = {}
+        for result in ('correct', 'incorrect', 'equal'):
+            rewards = []
+            survivals = []
+            for index in range(53):
+                r, s = self.resolve(counts, jesters, remaining - 1, 0, stats, 1, index, result)
+                rewards.append(r)
+                survivals.append(s)
+            table[result] = (rewards, survivals)
+        self.remember(self.tables, key, table)
+        return table
+
+    def card_outcome(self, counts: tuple, jesters: int, remaining: int, current: int,
+                     stats: tuple, depth: int, action: str, index: int):
+        result = compare(action, current, INDEX_VALUES[index])
+        return self.resolve(counts, jesters, remaining, current, stats, depth, index, result)
+
+    def resolve(self, counts: tuple, jesters: int, remaining: int, current: int,
+                stats: tuple, depth: int, index: int, result: str):
+        # Draw Card `index` (52 = Jester); counts/jesters/remaining are After the Draw
+        card_value = INDEX_VALUES[index]
+        if stats[JESTER_LEFT]:
+            return self.jester_round(counts, jesters, remaining, stats, depth,
+                                     card_value, result)
+
+        if index == 52:
+            fight = list(stats)
+            fight[JESTER_LEFT] = self.rules.jester_rounds
+            fight[JESTER_CORRECT] = 0
+            reward = _end_jester(fight, self.rules) if remaining == 0 else 0
+            return self.after(counts, jesters, remaining, current, fight, depth, reward)
+
+        suit = index // 13
+        if stats[ROPE] > 0 and suit in (CLUBS, SPADES):
+            rope = list(stats)
+            rope[ROPE] -= 1
+            return self.after(counts, jesters, remaining, card_value, rope, depth, 0)
+
+        reward = room_reward(result, card_value, self.rules)
+        if result == 'equal':
+            return self.after(counts, jesters, remaining, card_value, list(stats),
+                              depth, reward)
+
+        total_reward = total_survival = 0.0
+        for p, outcome in room_outcomes(stats, suit, card_value, result == 'correct',
+                                        self.rules):
+            r, s = self.after(counts, jesters, remaining, card_value, outcome, depth, reward)
+            total_reward += p * r
+            total_survival += p * s
+        return total_reward, total_survival
+
+    def jester_round(self, counts: tuple, jesters: int, remaining: int, stats: tuple,
+                     depth: int, card_value: int, result: str):
+        fight = list(stats)
+        if result == 'correct':
+            fight[JESTER_CORRECT] += 1
+        fight[JESTER_LEFT] -= 1
+        reward = 0
+        if fight[JESTER_LEFT] == 0 or remaining == 0:
+            reward = _end_jester(fight, self.rules)
+        return self.after(counts, jesters, remaining, card_value, fight, depth, reward)
+
+    def after(self, counts: tuple, jesters: int, remaining: int, current: int,
+              stats: list, depth: int, reward: float):
+        # Death, End of Deck, then the Next Turn's Over Time Effects
+        if stats[HP] <= 0:
+            return reward, 0.0
+        if remaining == 0:
+            return reward, 1.0
+        _tick(stats, self.rules)
+        if stats[HP] <= 0:
+            if stats[JESTER_LEFT]:
+                reward += _end_jester(stats, self.rules)
+            return reward, 0.0
+        r, s = self.value(counts, jesters, remaining, current, tuple(stats), depth - 1)
+        return reward + r, s
+
+    # Public Entry Points
+
+    def solve(self, counts: tuple, jesters: int, current: int, stats: tuple) -> Decision:
+        remaining = sum(counts) + jesters
+        weight = self.horizon_weight(remaining, self.depth)
+        action_values = {}
+        for action in ('h', 'l'):
+            reward, survival = self.action_value(counts, jesters, remaining, current,
+                                                 stats, self.depth, action)
+            action_values[action] = (reward + weight * survival, survival)
+        action = max(action_values, key=lambda a: action_values[a][0])
+        value, survival = action_values[action]
+        return Decision(action, value, survival, action_values)
+
+    def use_rules(self, rules: RuleTables):
+        # Memo Entries Hold Values Under One Rule Set, so a New One Starts Them Over
+        if rules is not self.rules:
+            self.rules = rules
+            self.poison_reach = max(rules.poison_turns)
+            self.memo.clear()
+            self.tables.clear()
+
+    def decide(self, game: DungeonDrawGame) -> Decision:
+        self.use_rules(game.rules)
+        counts, jesters = deck_key(game.deck)
+        return self.solve(counts, jesters, game.current_card.value, game_stats(game))
+
+    def policy(self, game: DungeonDrawGame) -> str:
+        return self.decide(game).action
+
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+def benchmark(games: int = 20, seed: int = 0, **solver_options) -> dict:
+    # Time Every Decision the Solver Makes Over Full Games
+    solver = Solver(**solver_options)
+    timings = []
+    scores = []
+    wins = 0
+    for index in range(games):
+        game = DungeonDrawGame(seed=seed + index)
+        while not game.over:
+            start = time.perf_counter()
+            action = solver.policy(game)
+            timings.append(time.perf_counter() - start)
+            game.step(action)
+        scores.append(game.score)
+        wins += game.outcome == "cleared"
+
+    timings.sort()
+    return {
+        "decisions": len(timings),
+        "mean_ms": statistics.mean(timings) * 1000,
+        "p50_ms": timings[len(timings) // 2] * 1000,
+        "p99_ms": timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1000,
+        "max_ms": timings[-1] * 1000,
+        "memo_entries": len(solver.memo) + len(solver.tables),
+        "memo_hit_rate": solver.hit_rate(),
+        "memo_evictions": solver.evictions,
+        "win_rate": wins / games,
+        "mean_score": statistics.mean(scores),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Higher/Lower solver.")
+    parser.add_argument("--games", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--memo-size", type=int, default=200_000)
+    parser.add_argument("--hp-bucket", type=int, default=1)
+    parser.add_argument("--card-value", type=float, default=6.0,
+                        help="score credited per card left at the search horizon")
+    args = parser.parse_args()
+
+    stats = benchmark(args.games, args.seed, depth=args.depth, memo_size=args.memo_size,
+                      hp_bucket=args.hp_bucket, card_value=args.card_value)
+    print(f"{stats['decisions']} decisions over {args.games} games (depth {args.depth})")
+    print(f"Solve time: mean {stats['mean_ms']:.2f} ms, p50 {stats['p50_ms']:.2f} ms, "
+          f"p99 {stats['p99_ms']:.2f} ms, max {stats['max_ms']:.2f} ms")
+    print(f"Memo: {stats['memo_entries']} entries, {stats['memo_hit_rate']:.1%} hits, "
+          f"{stats['memo_evictions']} evictions")
+    print(f"Win rate: {stats['win_rate']:.1%}   Mean score: {stats['mean_score']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+import argparse
+import copy
+import itertools
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from dungeon_batch import CLEARED, BatchSimulator
+from dungeon_rules import RULES, compile_rules
+
+
+# Parameters are Dotted Paths into the Rules Spec, e.g.
+#   player.max_hp, jester.loss_hp, rooms.Spades.slime.correct.poison_turns,
+#   rooms.Diamonds.treasure.correct.gold.mul
+def set_path(spec: dict, path: str, value):
+    *parents, last = path.split(".")
+    node = spec
+    for key in parents:
+        if not isinstance(node.get(key), dict):
+            raise KeyError(f"{path}: {key!r} is not a table in the rules")
+        node = node[key]
+    if last not in node:
+        raise KeyError(f"{path}: no rule named {last!r}")
+    node[last] = value
+
+
+def build_spec(params: dict) -> dict:
+    spec = copy.deepcopy(RULES)
+    for path, value in params.items():
+        set_path(spec, path, value)
+    return spec
+
+
+def parse_value(text: str):
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def parse_param(text: str) -> tuple:
+    # path=1,2,3 is a Grid Axis; path=lo:hi is a Range for Random Search
+    path, _, values = text.partition("=")
+    if ":" in values:
+        low, high = (parse_value(v) for v in values.split(":", 1))
+        return path, (low, high)
+    return path, [parse_value(v) for v in values.split(",")]
+
+
+def configurations(space: dict, samples: int, seed: int) -> list:
+    # Full Grid Unless Any Axis is a Range, Then Random Search
+    if all(isinstance(axis, list) for axis in space.values()):
+        paths = list(space)
+        return [dict(zip(paths, combo)) for combo in itertools.product(*space.values())]
+    rng = random.Random(seed)
+    configs = []
+    for _ in range(samples):
+        config = {}
+        for path, axis in space.items():
+            if isinstance(axis, list):
+                config[path] = rng.choice(axis)
+            elif isinstance(axis[0], int) and isinstance(axis[1], int):
+                config[path] = rng.randint(*axis)
+            else:
+                config[path] = rng.uniform(*axis)
+        configs.append(config)
+    return configs
+
+
+# Evaluation: Integer Totals so Chunks Merge Exactly
+
+def evaluate(task) -> tuple:
+    index, params, seed, games, threshold = task
+    tables = compile_rules(build_spec(params))
+    results = BatchSimulator(games, seed, threshold, rules=tables).run().results()
+    score = results["score"].astype(np.int64)
+    return (index, games, int(np.sum(results["outcome"] == CLEARED)),
+            int(score.sum()), int((score * score).sum()))
+
+
+class Trial:
+    def __init__(self, params: dict):
+        self.params = params
+        self.games = 0
+        self.wins = 0
+        self.score_total = 0
+        self.score_squares = 0
+
+    def add(self, games: int, wins: int, score_total: int, score_squares: int):
+        self.games += games
+        self.wins += wins
+        self.score_total += score_total
+        self.score_squares += score_squares
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / max(1, self.games)
+
+    @property
+    def mean_score(self) -> float:
+        return self.score_total / max(1, self.games)
+
+    @property
+    def score_variance(self) -> float:
+        mean = self.mean_score
+        return max(0.0, self.score_squares / max(1, self.games) - mean * mean)
+
+    def objective(self, metric: str, target: float = None) -> float:
+        value = getattr(self, metric)
+        # With a Target, Closer is Better (Balance Tuning Rather than Maximising)
+        return -abs(value - target) if target is not None else value
+
+
+def successive_halving(configs: list, min_games: int = 2000, eta: int = 3, rungs: int = None,
+                       metric: str = "win_rate", target: float = None, seed: int = 0,
+                       threshold: int = 8, workers: int = None, chunk: int = 20_000,
+                       log=print) -> list:
+    # Every Config Plays the Same Seeds at Each Rung (Common Random Numbers),
+    # Then Only the Top 1/eta Move On to Play eta Times as Many Games
+    trials = [Trial(params) for params in configs]
+    alive = list(range(len(trials)))
+    if rungs is None:
+        rungs = 1
+        while len(configs) > eta ** rungs:
+            rungs += 1
+    workers = workers or os.cpu_count() or 1
+    seeds = np.random.SeedSequence(seed)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        budget = min_games
+        for rung in range(rungs):
+            target_games = budget * eta ** rung
+            rung_seeds = seeds.spawn(1)[0]
+            needed = target_games - trials[alive[0]].games
+            sizes = [min(chunk, needed - start) for start in range(0, needed, chunk)]
+            chunk_seeds = rung_seeds.spawn(len(sizes))
+            tasks = [(index, trials[index].params, chunk_seed, size, threshold)
+                     for index in alive for chunk_seed, size in zip(chunk_seeds, sizes)]
+            start = time.perf_counter()
+            for index, *totals in pool.map(evaluate, tasks):
+                trials[index].add(*totals)
+            alive.sort(key=lambda i: trials[i].objective(metric, target), reverse=True)
+            log(f"Rung {rung + 1}/{rungs}: {len(alive)} configs x {target_games} games "
+                f"in {time.perf_counter() - start:.1f}s")
+            if rung < rungs - 1:
+                alive = alive[:max(1, len(alive) // eta)]
+
+    return sorted(trials, key=lambda t: (t.games, t.objective(metric, target)), reverse=True)
+
+
+def format_table(trials: list, top: int) -> str:
+    rows = [f"{'#':>3}  {'win rate':>8}  {'mean score':>10}  {'score var':>10}  {'games':>7}  params"]
+    for rank, trial in enumerate(trials[:top], start=1):
+        params = ", ".join(f"{path}={value:.4g}" if isinstance(value, float) else f"{path}={value}"
+                           for path, value in trial.params.items())
+        rows.append(f"{rank:>3}  {trial.win_rate:>8.2%}  {trial.mean_score:>10.1f}  "
+                    f"{trial.score_variance:>10.1f}  {trial.games:>7}  {params}")
+    return "\n".join(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep Dungeon Draw balance rules with successive halving.")
+    parser.add_argument("--param", action="append", default=[], metavar="PATH=VALUES",
+                        help="rule to vary: path=a,b,c for a grid, path=lo:hi for random search")
+    parser.add_argument("--space", metavar="FILE",
+                        help='JSON search space: {path: [values]} for a grid or {path: "lo:hi"} for a range')
+    parser.add_argument("--samples", type=int, default=64, help="configs to draw for random search")
+    parser.add_argument("--min-games", type=int, default=2000, help="games per config in the first rung")
+    parser.add_argument("--eta", type=int, default=3, help="keep the top 1/eta configs each rung")
+    parser.add_argument("--rungs", type=int, default=None)
+    parser.add_argument("--metric", choices=("win_rate", "mean_score"), default="win_rate")
+    parser.add_argument("--target", type=float, default=None,
+                        help="aim the metric at this value instead of maximising it")
+    parser.add_argument("--threshold", type=int, default=8, help="bot guesses Higher at or below this value")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--json", metavar="FILE", help="also write the ranked results as JSON")
+    args = parser.parse_args()
+
+    space = dict(parse_param(text) for text in args.param)
+    if args.space:
+        with open(args.space) as handle:
+            for path, axis in json.load(handle).items():
+                space[path] = parse_param(f"{path}={axis}")[1] if isinstance(axis, str) else axis
+    if not space:
+        parser.error("give at least one --param or a --space file")
+
+    configs = configurations(space, args.samples, args.seed)
+    try:
+        for params in configs:
+            compile_rules(build_spec(params))   # Fail Fast on a Bad Path or Value
+    except (KeyError, TypeError, ValueError) as error:
+        parser.error(str(error))
+    print(f"Sweeping {len(configs)} configs")
+
+    start = time.perf_counter()
+    ranked = successive_halving(configs, args.min_games, args.eta, args.rungs, args.metric,
+                                args.target, args.seed, args.threshold, args.workers)
+    print(f"Done in {time.perf_counter() - start:.1f}s\n")
+    print(format_table(ranked, args.top))
+
+    if args.json:
+        with open(args.json, "w") as handle:
+            json.dump([{"params": t.params, "games": t.games, "win_rate": t.win_rate,
+                        "mean_score": t.mean_score, "score_variance": t.score_variance}
+                       for t in ranked], handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,414 @@
+import argparse
+import json
+import math
+import os
+import struct
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from dungeon_draw import JESTER_SUIT, SUITS, DungeonDrawGame
+from dungeon_sim import game_seed, midpoint_policy
+
+
+# Telemetry File Layout (Little Endian)
+# header: magic, format version, column count, then per column its name and typecode
+# batches: row count, then every column's values back to back (one array per column)
+MAGIC = b"DDTL"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sBB")
+COLUMN = struct.Struct("<16sc")
+BATCH = struct.Struct("<I")
+BATCH_ROWS = 1 << 16
+
+# One Row per Decision. Cards are Card Codes (0 = None), Suits and Variants Count
+# from 1 (0 = No Room), and hp/gold/score/armor are Changes Over the Decision
+COLUMNS = (
+    ("game", 'I'), ("turn", 'I'), ("kind", 'B'), ("current", 'B'), ("card", 'B'),
+    ("guess", 'B'), ("result", 'B'), ("suit", 'B'), ("variant", 'B'),
+    ("hp", 'h'), ("gold", 'h'), ("score", 'i'), ("armor", 'b'),
+    ("poison", 'B'), ("regen", 'B'), ("flags", 'B'),
+)
+COLUMN_NAMES = tuple(name for name, _ in COLUMNS)
+
+ROOM, JESTER_ROUND, QUIT = range(3)
+KINDS = ("room", "jester_round", "quit")
+GUESSES = {'h': 1, 'l': 2, 'q': 3}
+RESULTS = {'correct': 1, 'incorrect': 2, 'equal': 3}
+
+# Flags
+ROPE = 1
+TOTEM = 2
+JESTER_START = 4
+JESTER_END = 8
+JESTER_WON = 16
+DEATH = 32
+FLAG_EVENTS = {"rope": ROPE, "totem": TOTEM, "jester_start": JESTER_START,
+               "jester_end": JESTER_END, "jester_won": JESTER_WON}
+
+
+class QuantileSketch:
+    # Log-Spaced Buckets: Any Quantile Comes Back Within `accuracy` (Relative) of the
+    # True Value, in Memory that Grows with log(max / min) Rather than the Sample
+    # Count. Bucket Counts Just Add Up, so Sketches from Different Workers Merge Exactly
+    def __init__(self, accuracy: float = 0.01):
+        self.accuracy = accuracy
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.count = 0
+        self.zeros = 0
+        self.buckets = {}
+
+    def add(self, value: float, count: int = 1):
+        self.count += count
+        if value <= 0:
+            self.zeros += count
+            return
+        key = math.ceil(math.log(value) / self.log_gamma)
+        self.buckets[key] = self.buckets.get(key, 0) + count
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        self.count += other.count
+        self.zeros += other.zeros
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        return self
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                # The Middle of the Bucket, Within `accuracy` of Anything in it
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+
+class TelemetryStats:
+    # Online Aggregates, Kept as Integer Sums and Sketches so Merging is Exact
+    def __init__(self, accuracy: float = 0.01):
+        self.games = 0
+        self.turns = 0
+        self.outcomes = {"cleared": 0, "dead": 0, "quit": 0}
+        self.death_causes = {}
+        self.jester_fights = 0
+        self.jester_wins = 0
+        self.totems_used = 0
+        self.ropes_used = 0
+        self.score_total = 0
+        self.score_squares = 0
+        self.gold_total = 0
+        self.gold_squares = 0
+        self.scores = QuantileSketch(accuracy)
+        self.lengths = QuantileSketch(accuracy)
+
+    def add(self, game: DungeonDrawGame, cause: str = None):
+        self.games += 1
+        self.turns += game.turns
+        self.outcomes[game.outcome] += 1
+        if cause is not None:
+            self.death_causes[cause] = self.death_causes.get(cause, 0) + 1
+        self.score_total += game.score
+        self.score_squares += game.score * game.score
+        self.gold_total += game.gold
+        self.gold_squares += game.gold * game.gold
+        self.scores.add(game.score)
+        self.lengths.add(game.turns)
+
+    def add_flags(self, flags: int):
+        self.jester_fights += bool(flags & JESTER_START)
+        self.jester_wins += bool(flags & JESTER_WON)
+        self.totems_used += bool(flags & TOTEM)
+        self.ropes_used += bool(flags & ROPE)
+
+    def merge(self, other: "TelemetryStats") -> "TelemetryStats":
+        self.games += other.games
+        self.turns += other.turns
+        for outcome, count in other.outcomes.items():
+            self.outcomes[outcome] += count
+        for cause, count in other.death_causes.items():
+            self.death_causes[cause] = self.death_causes.get(cause, 0) + count
+        self.jester_fights += other.jester_fights
+        self.jester_wins += other.jester_wins
+        self.totems_used += other.totems_used
+        self.ropes_used += other.ropes_used
+        self.score_total += other.score_total
+        self.score_squares += other.score_squares
+        self.gold_total += other.gold_total
+        self.gold_squares += other.gold_squares
+        self.scores.merge(other.scores)
+        self.lengths.merge(other.lengths)
+        return self
+
+    def summary(self) -> dict:
+        games = max(1, self.games)
+        score_mean = self.score_total / games
+        gold_mean = self.gold_total / games
+        quantiles = (0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+        return {
+            "games": self.games,
+            "turns": self.turns,
+            "outcomes": dict(self.outcomes),
+            "death_causes": dict(sorted(self.death_causes.items(), key=lambda item: -item[1])),
+            "mean_score": score_mean,
+            "score_var": max(0.0, self.score_squares / games - score_mean * score_mean),
+            "score_quantiles": {str(q): self.scores.quantile(q) for q in quantiles},
+            "mean_gold": gold_mean,
+            "gold_var": max(0.0, self.gold_squares / games - gold_mean * gold_mean),
+            "turn_quantiles": {str(q): self.lengths.quantile(q) for q in quantiles},
+            "jester_fights": self.jester_fights,
+            "jester_wins": self.jester_wins,
+            "totems_used": self.totems_used,
+            "ropes_used": self.ropes_used,
+        }
+
+
+class TelemetryWriter:
+    # Buffers Rows into Fixed-Size Column Arrays and Writes Each Full Batch in One Go
+    def __init__(self, path: str, batch_rows: int = BATCH_ROWS, accuracy: float = 0.01):
+        self.path = path
+        self.batch_rows = batch_rows
+        self.stats = TelemetryStats(accuracy)
+        self.batches = 0
+        self.rows = 0
+        self.handle = open(path, "wb")
+        self.handle.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(COLUMNS)))
+        for name, typecode in COLUMNS:
+            self.handle.write(COLUMN.pack(name.encode(), typecode.encode()))
+        self.reset()
+        self.variants = {}
+
+    def reset(self):
+        self.columns = [array(typecode) for _, typecode in COLUMNS]
+        # Bound Appenders, One per Column, Skip an Attribute Lookup per Value
+        self.appends = [column.append for column in self.columns]
+
+    def add(self, row: tuple):
+        for append, value in zip(self.appends, row):
+            append(value)
+        if len(self.columns[0]) >= self.batch_rows:
+            self.flush()
+
+    def flush(self):
+        count = len(self.columns[0])
+        if not count:
+            return
+        self.handle.write(BATCH.pack(count) + b"".join(column.tobytes() for column in self.columns))
+        self.batches += 1
+        self.rows += count
+        self.reset()
+
+    def close(self):
+        if self.handle is None:
+            return
+        self.flush()
+        self.handle.close()
+        self.handle = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def variant_index(self, rules, suit: str, name: str) -> int:
+        key = (id(rules), suit, name)
+        index = self.variants.get(key)
+        if index is None:
+            variants = rules.variants.get(suit, ())
+            index = self.variants[key] = variants.index(name) + 1 if name in variants else 0
+        return index
+
+    def record(self, game: DungeonDrawGame, action: str, index: int) -> list:
+        # Steps the Game and Writes One Row from What the Step Reported
+        hp, gold, score, armor = game.hp, game.gold, game.score, game.armor
+        current = game.current_card.code
+        kind = JESTER_ROUND if game.in_jester_fight else (QUIT if action == 'q' else ROOM)
+        events = game.step(action)
+
+        card = result = suit = variant = flags = 0
+        room = cause = None
+        for event in events:
+            name = event.kind
+            if name in ("reveal", "jester_round"):
+                card = event["card"].code
+                result = RESULTS[event["result"]]
+                if event["card"].suit != JESTER_SUIT:
+                    suit = SUITS.index(event["card"].suit) + 1
+            elif name == "room":
+                room = f"{event['suit']}.{event['variant']}"
+                variant = self.variant_index(game.rules, event["suit"], event["variant"])
+            elif name == "damage":
+                cause = event["source"] or room
+            elif name in FLAG_EVENTS:
+                flags |= FLAG_EVENTS[name]
+                if name in ("rope", "jester_start"):
+                    card = event["card"].code
+        if game.outcome == "dead":
+            flags |= DEATH
+
+        self.add((index, game.turns, kind, current, card, GUESSES[action], result, suit,
+                  variant, game.hp - hp, game.gold - gold, game.score - score,
+                  game.armor - armor, min(game.poison_turns, 255), min(game.regen_turns, 255),
+                  flags))
+        self.stats.add_flags(flags)
+        if game.over:
+            self.stats.add(game, (cause or "unknown") if game.outcome == "dead" else None)
+        return events
+
+    def play(self, game: DungeonDrawGame, index: int, policy=midpoint_policy) -> DungeonDrawGame:
+        game.record_events = True
+        while not game.over:
+            self.record(game, policy(game), index)
+        return game
+
+
+# Reading
+
+def read_batches(path: str, columns=None):
+    # Yields {column name: array} per Batch; `columns` Picks a Subset, and the Rest
+    # are Skipped Over Without Being Decoded
+    with open(path, "rb") as handle:
+        magic, version, count = HEADER.unpack(handle.read(HEADER.size))
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a Dungeon Draw telemetry file")
+        layout = []
+        for _ in range(count):
+            name, typecode = COLUMN.unpack(handle.read(COLUMN.size))
+            layout.append((name.rstrip(b"\0").decode(), typecode.decode()))
+        wanted = set(columns or (name for name, _ in layout))
+
+        while True:
+            head = handle.read(BATCH.size)
+            if not head:
+                return
+            (rows,) = BATCH.unpack(head)
+            batch = {}
+            for name, typecode in layout:
+                size = rows * array(typecode).itemsize
+                if name not in wanted:
+                    handle.seek(size, os.SEEK_CUR)
+                    continue
+                values = array(typecode)
+                values.frombytes(handle.read(size))
+                batch[name] = values
+            yield batch
+
+
+def telemetry_files(directory: str) -> list:
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                  if name.endswith(".ddt"))
+
+
+# Batch Runs: Every Chunk Writes its Own File, and the Aggregates are Merged
+
+def record_chunk(directory: str, root_seed: int, start: int, stop: int,
+                 batch_rows: int = BATCH_ROWS) -> TelemetryStats:
+    path = os.path.join(directory, f"turns-{start:010d}.ddt")
+    with TelemetryWriter(path, batch_rows) as writer:
+        for index in range(start, stop):
+            # Same Seeds as dungeon_sim, so `dungeon_sim.py --replay INDEX` Re-Runs a Game
+            writer.play(DungeonDrawGame(seed=game_seed(root_seed, index)), index)
+    return writer.stats
+
+
+def _record_chunk(args) -> TelemetryStats:
+    return record_chunk(*args)
+
+
+def record(directory: str, runs: int, seed: int = 0, workers: int = None,
+           chunk_size: int = 2000, batch_rows: int = BATCH_ROWS) -> TelemetryStats:
+    os.makedirs(directory, exist_ok=True)
+    chunks = [(directory, seed, start, min(start + chunk_size, runs), batch_rows)
+              for start in range(0, runs, chunk_size)]
+    workers = workers or os.cpu_count() or 1
+
+    total = TelemetryStats()
+    if workers == 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            total.merge(_record_chunk(chunk))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for stats in pool.map(_record_chunk, chunks):
+                total.merge(stats)
+
+    with open(os.path.join(directory, "summary.json"), "w") as handle:
+        json.dump(total.summary(), handle, indent=2)
+    return total
+
+
+def room_table(directory: str) -> dict:
+    # An Example Scan: Reads Only the Three Columns it Needs from Every Batch
+    table = {}
+    for path in telemetry_files(directory):
+        for batch in read_batches(path, ("suit", "result", "hp")):
+            for suit, result, hp in zip(batch["suit"], batch["result"], batch["hp"]):
+                if suit:
+                    entry = table.setdefault((SUITS[suit - 1], result), [0, 0])
+                    entry[0] += 1
+                    entry[1] += hp
+    return table
+
+
+def print_summary(summary: dict):
+    games = max(1, summary["games"])
+    print(f"{summary['games']} games, {summary['turns']} turns")
+    print("Outcomes: " + ", ".join(f"{outcome} {count / games:.2%}"
+                                   for outcome, count in summary["outcomes"].items()))
+    print(f"Score: mean {summary['mean_score']:.1f}, std {summary['score_var'] ** 0.5:.1f}, "
+          + ", ".join(f"p{float(q) * 100:g}≈{value:.0f}"
+                      for q, value in summary["score_quantiles"].items()))
+    print("Deaths by cause: " + ", ".join(f"{cause} {count}"
+                                          for cause, count in summary["death_causes"].items()))
+    print(f"Jester fights: {summary['jester_fights']} ({summary['jester_wins']} won)   "
+          f"Totems used: {summary['totems_used']}   Ropes used: {summary['ropes_used']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record and summarise per-turn telemetry.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_cmd = commands.add_parser("record", help="play games and write every turn to DIR")
+    record_cmd.add_argument("directory")
+    record_cmd.add_argument("--runs", type=int, default=10_000)
+    record_cmd.add_argument("--seed", type=int, default=0)
+    record_cmd.add_argument("--workers", type=int, default=None,
+                            help="worker processes (default: all cores)")
+    record_cmd.add_argument("--chunk-size", type=int, default=2000)
+    record_cmd.add_argument("--batch-rows", type=int, default=BATCH_ROWS)
+
+    summary_cmd = commands.add_parser("summary", help="print the aggregates kept while recording")
+    summary_cmd.add_argument("directory")
+
+    rooms_cmd = commands.add_parser("rooms", help="scan the turn files for HP change per room")
+    rooms_cmd.add_argument("directory")
+
+    args = parser.parse_args()
+
+    if args.command == "record":
+        start = time.perf_counter()
+        stats = record(args.directory, args.runs, args.seed, args.workers, args.chunk_size,
+                       args.batch_rows)
+        elapsed = time.perf_counter() - start
+        print(f"Recorded {stats.turns} turns from {stats.games} games in {elapsed:.2f}s")
+        print_summary(stats.summary())
+    elif args.command == "summary":
+        with open(os.path.join(args.directory, "summary.json")) as handle:
+            print_summary(json.load(handle))
+    else:
+        start = time.perf_counter()
+        table = room_table(args.directory)
+        elapsed = time.perf_counter() - start
+        names = {code: name for name, code in RESULTS.items()}
+        for (suit, result), (rooms, hp) in sorted(table.items()):
+            print(f"{suit:9} {names[result]:9} {rooms:>10} rooms   mean HP change {hp / rooms:+.2f}")
+        print(f"Scanned in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from dungeon_draw import DungeonDrawGame
+from dungeon_policy import make_policy
+from dungeon_sim import game_seed, play_headless
+
+Z_95 = 1.959964
+
+
+class Standings:
+    # Integer-Only Sums per Policy and per Pair of Policies, so Merging is Exact
+    def __init__(self, count: int):
+        self.games = 0
+        self.score = [0] * count
+        self.score_squares = [0] * count
+        self.wins = [0] * count
+        # [i][j]: Sums of (i - j) over Decks, Score and Win
+        self.score_diff = [[0] * count for _ in range(count)]
+        self.score_diff_squares = [[0] * count for _ in range(count)]
+        self.win_diff = [[0] * count for _ in range(count)]
+        self.win_diff_squares = [[0] * count for _ in range(count)]
+
+    def add(self, results: list):
+        # One (score, won) per Policy, All on the Same Deck
+        self.games += 1
+        for i, (score, won) in enumerate(results):
+            self.score[i] += score
+            self.score_squares[i] += score * score
+            self.wins[i] += won
+            for j, (other_score, other_won) in enumerate(results):
+                self.score_diff[i][j] += score - other_score
+                self.score_diff_squares[i][j] += (score - other_score) ** 2
+                self.win_diff[i][j] += won - other_won
+                self.win_diff_squares[i][j] += (won - other_won) ** 2
+
+    def merge(self, other: "Standings") -> "Standings":
+        self.games += other.games
+        for mine, theirs in ((self.score, other.score), (self.score_squares, other.score_squares),
+                             (self.wins, other.wins)):
+            for i, value in enumerate(theirs):
+                mine[i] += value
+        for mine, theirs in ((self.score_diff, other.score_diff),
+                             (self.score_diff_squares, other.score_diff_squares),
+                             (self.win_diff, other.win_diff),
+                             (self.win_diff_squares, other.win_diff_squares)):
+            for i, row in enumerate(theirs):
+                for j, value in enumerate(row):
+                    mine[i][j] += value
+        return self
+
+    def mean_var(self, total: int, squares: int) -> tuple:
+        games = max(1, self.games)
+        mean = total / games
+        return mean, max(0.0, squares / games - mean * mean)
+
+    def interval(self, variance: float) -> float:
+        # Half-Width of a 95% Confidence Interval on a Mean over Every Deck
+        return Z_95 * (variance / max(1, self.games)) ** 0.5
+
+    def policy(self, i: int) -> dict:
+        score, score_var = self.mean_var(self.score[i], self.score_squares[i])
+        wins, win_var = self.mean_var(self.wins[i], self.wins[i])
+        return {"mean_score": score, "score_ci": self.interval(score_var),
+                "win_rate": wins, "win_ci": self.interval(win_var),
+                "score_var": score_var, "win_var": win_var}
+
+    def paired(self, i: int, j: int) -> dict:
+        # Paired Differences (i - j), Next to the Interval Independent Samples of the
+        # Same Size Would Give; their Variance Ratio is How Many Times Fewer Games the
+        # Pairing Needs for the Same Precision
+        a, b = self.policy(i), self.policy(j)
+        score, score_var = self.mean_var(self.score_diff[i][j], self.score_diff_squares[i][j])
+        wins, win_var = self.mean_var(self.win_diff[i][j], self.win_diff_squares[i][j])
+        unpaired_var = a["score_var"] + b["score_var"]
+        return {"score_diff": score, "score_ci": self.interval(score_var),
+                "unpaired_score_ci": self.interval(unpaired_var),
+                "score_variance_ratio": unpaired_var / score_var if score_var else float("inf"),
+                "win_diff": wins, "win_ci": self.interval(win_var),
+                "unpaired_win_ci": self.interval(a["win_var"] + b["win_var"])}
+
+
+def play_chunk(specs: list, root_seed: int, start: int, stop: int, common: bool,
+               corpus_path: str = None) -> Standings:
+    # Common Random Numbers: Every Policy Plays Deck i with the Same Seed, so the Shuffles
+    # Match, and Room Rolls Key on the Card's Place in the Deck (See CounterRNG), so a
+    # Different Guess Earlier On Never Shifts the Rolls that Come After
+    policies = [make_policy(spec) for spec in specs]
+    corpus = None
+    if corpus_path is not None:
+        from dungeon_corpus import open_corpus
+        corpus = open_corpus(corpus_path)
+    standings = Standings(len(policies))
+    for index in range(start, stop):
+        results = []
+        for slot, policy in enumerate(policies):
+            # Without Common Numbers, Every Policy Gets Decks of its Own
+            deck = index if common else index * len(policies) + slot
+            if corpus is not None:
+                game = corpus.game(deck)
+            else:
+                game = DungeonDrawGame(seed=game_seed(root_seed, deck))
+            game.record_events = False
+            play_headless(game, policy)
+            results.append((game.score, int(game.outcome == "cleared")))
+        standings.add(results)
+    return standings
+
+
+def _play_chunk(args) -> Standings:
+    return play_chunk(*args)
+
+
+def tournament(specs: list, games: int, seed: int = 0, workers: int = None,
+               chunk_size: int = 500, common: bool = True, corpus_path: str = None) -> Standings:
+    # Chunks Depend Only on the Game Count, so Results Never Depend on the Worker Count
+    chunks = [(specs, seed, start, min(start + chunk_size, games), common, corpus_path)
+              for start in range(0, games, chunk_size)]
+    workers = workers or os.cpu_count() or 1
+
+    total = Standings(len(specs))
+    if workers == 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            total.merge(_play_chunk(chunk))
+        return total
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for standings in pool.map(_play_chunk, chunks):
+            total.merge(standings)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play policies against the same decks and compare them pairwise.")
+    parser.add_argument("policies", nargs="+",
+                        help="policies to compare, the first is the baseline "
+                             "(midpoint, counting, random, solver; name:arg for options)")
+    parser.add_argument("--games", type=int, default=10_000, help="decks every policy plays")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--independent", action="store_true",
+                        help="give every policy its own decks and rolls (no pairing)")
+    parser.add_argument("--json", metavar="FILE", help="write every policy and pair as JSON")
+    parser.add_argument("--corpus", metavar="PATH",
+                        help="deal from a pre-dealt deck corpus (its root seed replaces --seed)")
+    args = parser.parse_args()
+
+    for spec in args.policies:
+        make_policy(spec)   # Fail Fast on a Bad Name
+    if args.corpus:
+        from dungeon_corpus import open_corpus
+        corpus = open_corpus(args.corpus)
+        args.seed = corpus.seed
+        needed = args.games * (1 if not args.independent else len(args.policies))
+        if needed > len(corpus):
+            parser.error(f"{args.corpus} only holds {len(corpus)} decks, {needed} are needed")
+
+    start = time.perf_counter()
+    standings = tournament(args.policies, args.games, args.seed, args.workers, args.chunk_size,
+                           not args.independent, args.corpus)
+    elapsed = time.perf_counter() - start
+
+    mode = "independent decks" if args.independent else "common random numbers"
+    print(f"Played {args.games} decks x {len(args.policies)} policies in {elapsed:.2f}s ({mode})")
+    print(f"{'policy':16} {'mean score':>18} {'win rate':>20}")
+    for i, spec in enumerate(args.policies):
+        stats = standings.policy(i)
+        print(f"{spec:16} {stats['mean_score']:>9.2f} ± {stats['score_ci']:<6.2f} "
+              f"{stats['win_rate']:>11.2%} ± {stats['win_ci']:<6.2%}")
+
+    baseline = args.policies[0]
+    print(f"\nPaired differences against {baseline} (95% intervals):")
+    for i, spec in enumerate(args.policies[1:], start=1):
+        pair = standings.paired(i, 0)
+        print(f"{spec:16} score {pair['score_diff']:+8.2f} ± {pair['score_ci']:.2f} "
+              f"(unpaired ± {pair['unpaired_score_ci']:.2f}, "
+              f"{pair['score_variance_ratio']:.1f}x fewer games)   "
+              f"win {pair['win_diff']:+.2%} ± {pair['win_ci']:.2%} "
+              f"(unpaired ± {pair['unpaired_win_ci']:.2%})")
+
+    if args.json:
+        report = {
+            "games": args.games,
+            "seed": args.seed,
+            "common_random_numbers": not args.independent,
+            "policies": {spec: standings.policy(i) for i, spec in enumerate(args.policies)},
+            "pairs": {f"{a} - {b}": standings.paired(i, j)
+                      for i, a in enumerate(args.policies)
+                      for j, b in enumerate(args.policies) if i != j},
+        }
+        with open(args.json, "w") as handle:
+            json.dump(report, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+import pytest
+
+from dungeon_draw import DungeonDrawGame
+from dungeon_effects import ADD, EFFECT_KINDS, EffectKind, register_effect
+
+
+@pytest.fixture
+def curse():
+    kind = register_effect(EffectKind("curse", heals=False, priority=0, stacking=ADD))
+    yield kind
+    del EFFECT_KINDS[kind.name]
+
+
+def test_snapshot_keeps_every_effect_in_tick_order(curse):
+    game = DungeonDrawGame(seed=4)
+    game.effects.apply("curse", 1, 5)
+    game.effects.apply("poison", 2, 3)
+    game.effects.apply("regen", 1, 4)
+    restored = DungeonDrawGame.from_bytes(game.to_bytes())
+    assert repr(restored.effects) == repr(game.effects)
+    assert restored.to_bytes() == game.to_bytes()
+    for _ in range(3):
+        game.apply_over_time_effects()
+        restored.apply_over_time_effects()
+    assert restored.hp == game.hp
+
+
+def test_snapshot_refuses_an_effect_this_build_lacks(curse):
+    game = DungeonDrawGame(seed=4)
+    game.effects.apply("curse", 1, 5)
+    blob = game.to_bytes()
+    del EFFECT_KINDS["curse"]
+    with pytest.raises(ValueError):
+        DungeonDrawGame.from_bytes(blob)
+    EFFECT_KINDS["curse"] = curse
@@ -0,0 +1,38 @@
+import random
+
+from dungeon_draw import DungeonDrawGame
+from dungeon_replay import HEADER, SUMMARY, _verify_chunk, decode, encode, game_summary, replay
+
+
+def recorded_games(count: int) -> list:
+    # Random Play, Quits Included, Then Every Third Replay Gets a Decision Flipped
+    rng = random.Random(5)
+    blobs = []
+    for index in range(count):
+        game = DungeonDrawGame(seed=rng.getrandbits(64))
+        game.record_events = False
+        while not game.over:
+            legal = game.legal_actions()
+            game.step('q' if 'q' in legal and rng.random() < 0.02 else rng.choice("hl"))
+        blob = bytearray(encode(game))
+        if index % 3 == 0:
+            blob[HEADER.size + SUMMARY.size + rng.randrange(len(blob) - HEADER.size
+                                                            - SUMMARY.size)] ^= 1
+        blobs.append(bytes(blob))
+    return blobs
+
+
+def full_step_verdict(blob: bytes) -> bool:
+    try:
+        record = decode(blob)
+        game = replay(record)
+    except ValueError:
+        return False
+    return game.over and game_summary(game) == tuple(record.summary)
+
+
+def test_batched_verify_agrees_with_full_step_replay():
+    blobs = recorded_games(600)
+    verdicts = [full_step_verdict(blob) for blob in blobs]
+    assert any(verdicts) and not all(verdicts)
+    assert _verify_chunk(blobs) == verdicts
@@ -0,0 +1,54 @@
+import random
+
+from dungeon_draw import DeckSpec, DungeonDrawGame
+from dungeon_rules import DEFAULT_TABLES
+from dungeon_solver import (HP, MAX_HP, POISON_DAMAGE, POISON_TURNS, REGEN_AMOUNT, REGEN_TURNS,
+                            TOTEM, Solver, _tick, deck_key, outlasts_effects)
+
+
+def big_game() -> DungeonDrawGame:
+    # 300 Copies of Every Card: Past What a Byte Holds, so card_counts is array('I')
+    return DungeonDrawGame(seed=1, deck=DeckSpec.parse("decks=300"))
+
+
+def test_deck_key_holds_52_counts_past_a_byte():
+    game = big_game()
+    counts, jesters = deck_key(game.deck)
+    assert len(counts) == 52
+    assert max(counts) > 255
+    assert sum(counts) + jesters == game.deck.remaining()
+
+
+def test_solver_decides_on_a_deck_past_a_byte():
+    game = big_game()
+    for depth in (1, 2):
+        decision = Solver(depth=depth).decide(game)
+        assert decision.action in ("h", "l")
+        assert 0.0 <= decision.survival <= 1.0
+    game.step(Solver(depth=2).policy(game))
+    assert deck_key(game.deck)[0] != deck_key(big_game().deck)[0]
+
+
+def test_horizon_skip_matches_ticking_turn_by_turn():
+    # The Closed-Form Skip Past the Horizon Against the Solver's Own Per-Turn _tick
+    rng = random.Random(3)
+    for _ in range(2000):
+        stats = [0] * 11
+        stats[MAX_HP] = rng.randrange(5, 40)
+        stats[HP] = rng.randrange(1, stats[MAX_HP] + 1)
+        stats[POISON_TURNS], stats[POISON_DAMAGE] = rng.randrange(1, 12), rng.randrange(1, 6)
+        stats[REGEN_TURNS], stats[REGEN_AMOUNT] = rng.randrange(0, 12), rng.randrange(0, 5)
+        stats[TOTEM] = rng.choice((0, 0, 1))
+        turns = rng.randrange(0, 15)
+        ticked = list(stats)
+        for _ in range(turns):
+            _tick(ticked, DEFAULT_TABLES)
+        assert outlasts_effects(tuple(stats), turns, DEFAULT_TABLES.totem_revive_div) == \
+            (ticked[HP] > 0)
+
+
+def test_poison_that_kills_past_the_horizon_counts():
+    game = DungeonDrawGame(seed=1)
+    game.hp = 6
+    game.poison_turns, game.poison_damage_per_turn = 10, 2
+    assert Solver(depth=1).decide(game).survival == 0.0